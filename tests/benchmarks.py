@@ -0,0 +1,235 @@
+"""Benchmark tipgstac Python layer (search parameters and responses building).
+
+PgSTAC calls are replaced by synthetic pages of items so only the Python code is
+measured.
+
+    python -m pytest tests/benchmarks.py --benchmark-only
+
+"""
+
+import json
+import math
+import os
+from typing import Dict, List
+
+import pytest
+from geojson_pydantic.geometries import parse_geometry_obj
+from pygeofilter.parsers.cql2_text import parse as cql2_text_parser
+
+from tipg.collections import ItemList
+from tipgstac import intersects
+from tipgstac.dependencies import ItemsSearchParams
+from tipgstac.intersects import preprocess_intersects, simplify_geometry
+from tipgstac.models import ItemsSearch
+
+from .test_startup import startup
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+with open(os.path.join(DATA_DIR, "noaa-eri-nashville2020.json")) as f:
+    FIXTURE_ITEMS = [json.loads(line) for line in f]
+
+PAGE_SIZES = [10, 100, 1000]
+
+AOI_VERTICES = 20000
+
+
+def make_aoi(n: int) -> Dict:
+    """Create a (circular) Polygon with `n` vertices around the fixture items."""
+    ring = [
+        [
+            -86.7 + 0.5 * math.cos(2 * math.pi * i / n),
+            36.1 + 0.5 * math.sin(2 * math.pi * i / n),
+        ]
+        for i in range(n)
+    ]
+    return {"type": "Polygon", "coordinates": [ring + [ring[0]]]}
+
+
+def make_items(n: int) -> List[Dict]:
+    """Create `n` unique items from the fixture items."""
+    items = []
+    for i in range(n):
+        item = json.loads(json.dumps(FIXTURE_ITEMS[i % len(FIXTURE_ITEMS)]))
+        item["id"] = f"{item['id']}-{i}"
+        item["properties"]["datetime"] = f"2020-03-{1 + i % 28:02}T00:00:00Z"
+        items.append(item)
+
+    return items
+
+
+@pytest.fixture
+def pgstac_page(monkeypatch):
+    """Replace PgSTAC calls with a synthetic page of items."""
+
+    def _set(n: int):
+        items = make_items(n)
+
+        async def pgstac_search(pool, *, search, **kwargs):
+            return ItemList(items=items, matched=n * 10, next="next", prev=None)
+
+        async def search_queryables(pool, collections):
+            return None
+
+        monkeypatch.setattr("tipgstac.factory.pgstac_search", pgstac_search)
+        monkeypatch.setattr("tipgstac.export.pgstac_search", pgstac_search)
+        monkeypatch.setattr("tipgstac.factory.search_queryables", search_queryables)
+
+    return _set
+
+
+def test_benchmark_startup(benchmark):
+    """Benchmark cold start (new interpreter, import to first response)."""
+    benchmark.group = "startup"
+
+    benchmark.pedantic(startup, rounds=10, iterations=1)
+
+
+def test_benchmark_search_validation(benchmark):
+    """Benchmark ItemsSearch validation."""
+    benchmark.group = "search-validation"
+
+    body = {
+        "collections": ["noaa-emergency-response"],
+        "bbox": [-85.6, 36.0, -85.4, 36.2],
+        "datetime": "2020-03-01T00:00:00Z/2020-03-31T23:59:59Z",
+        "filter": {
+            "op": "=",
+            "args": [{"property": "event"}, "Nashville Tornado"],
+        },
+        "filter-lang": "cql2-json",
+        "sortby": [{"field": "datetime", "direction": "desc"}],
+        "fields": {"include": ["id", "properties.datetime"]},
+        "limit": 100,
+    }
+    benchmark(ItemsSearch.model_validate, body)
+
+
+def test_benchmark_search_params(benchmark):
+    """Benchmark search parameters (sortby, datetime, CQL2 filter) building."""
+    benchmark.group = "search-params"
+
+    cql_filter = cql2_text_parser(
+        "event = 'Nashville Tornado' AND datetime > TIMESTAMP('2020-03-01T00:00:00Z')"
+    )
+    benchmark(
+        ItemsSearchParams,
+        collections_filter=["noaa-emergency-response"],
+        ids_filter=None,
+        bbox_filter=[-85.6, 36.0, -85.4, 36.2],
+        datetime_filter=["2020-03-01T00:00:00Z", "2020-03-31T23:59:59Z"],
+        properties=["event", "datetime"],
+        cql_filter=cql_filter,
+        sortby="-datetime,+id",
+        query=None,
+        limit=100,
+        offset=None,
+    )
+
+
+@pytest.mark.parametrize("n", PAGE_SIZES)
+def test_benchmark_wkt(benchmark, n):
+    """Benchmark WKT conversion (JSON/NDJSON outputs)."""
+    benchmark.group = "wkt"
+    benchmark.name = f"wkt-{n}"
+
+    geometries = [item["geometry"] for item in make_items(n)]
+
+    def wkt():
+        return [parse_geometry_obj(geom).wkt for geom in geometries]
+
+    benchmark(wkt)
+
+
+@pytest.mark.parametrize("n", PAGE_SIZES)
+@pytest.mark.parametrize(
+    "output", ["geojson", "geojsonseq", "csv", "json", "ndjson", "html"]
+)
+def test_benchmark_search(benchmark, app, pgstac_page, output, n):
+    """Benchmark /search responses (links, conversion and serialization)."""
+    benchmark.group = f"search-{output}"
+    benchmark.name = f"{output}-{n}"
+
+    pgstac_page(n)
+
+    def search():
+        response = app.get("/search", params={"f": output, "limit": n})
+        assert response.status_code == 200
+        return response.content
+
+    benchmark(search)
+
+
+@pytest.mark.parametrize("n", PAGE_SIZES)
+def test_benchmark_items(benchmark, app, pgstac_page, n):
+    """Benchmark /collections/{collectionId}/items GeoJSON responses."""
+    benchmark.group = "items-geojson"
+    benchmark.name = f"geojson-{n}"
+
+    pgstac_page(n)
+
+    def items():
+        response = app.get(
+            "/collections/noaa-emergency-response/items", params={"limit": n}
+        )
+        assert response.status_code == 200
+        return response.content
+
+    benchmark(items)
+
+
+@pytest.mark.parametrize("cache", ["miss", "hit"])
+def test_benchmark_intersects_simplify(benchmark, app, monkeypatch, cache):
+    """Benchmark `intersects` simplification (cache miss/hit) of a large AOI."""
+    benchmark.group = "intersects"
+    benchmark.name = f"simplify-{cache}"
+
+    monkeypatch.setattr(intersects.intersects_settings, "simplify_tolerance", 0.01)
+    pool = app.app.state.pool
+    search = ItemsSearch(intersects=make_aoi(AOI_VERTICES))
+
+    def setup():
+        if cache == "miss":
+            app.portal.call(simplify_geometry.cache.clear)
+        else:
+            app.portal.call(preprocess_intersects, pool, search)
+
+    benchmark.pedantic(
+        app.portal.call,
+        args=(preprocess_intersects, pool, search),
+        setup=setup,
+        rounds=20,
+    )
+
+
+def test_benchmark_intersects_off(benchmark, app):
+    """Benchmark `intersects` preprocessing of a large AOI without simplification."""
+    benchmark.group = "intersects"
+    benchmark.name = "simplify-off"
+
+    pool = app.app.state.pool
+    search = ItemsSearch(intersects=make_aoi(AOI_VERTICES))
+    benchmark(app.portal.call, preprocess_intersects, pool, search)
+
+
+@pytest.mark.parametrize("simplify", ["on", "off"])
+def test_benchmark_search_intersects(benchmark, app, monkeypatch, simplify):
+    """Benchmark /search with a large `intersects` AOI, with/without simplification."""
+    benchmark.group = "search-intersects"
+    benchmark.name = f"simplify-{simplify}"
+
+    if simplify == "on":
+        monkeypatch.setattr(intersects.intersects_settings, "simplify_tolerance", 0.01)
+
+    body = {
+        "collections": ["noaa-emergency-response"],
+        "intersects": make_aoi(AOI_VERTICES),
+        "limit": 100,
+    }
+
+    def search():
+        response = app.post("/search", json=body)
+        assert response.status_code == 200
+        return response.content
+
+    benchmark(search)
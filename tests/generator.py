@@ -0,0 +1,184 @@
+"""Deterministic synthetic STAC catalog generator.
+
+    # Write 10 collections and 1 million items as ndjson (e.g for `pypgstac load`)
+    python -m tests.generator --collections 10 --items 1000000 --output synthetic
+
+"""
+
+import argparse
+import datetime
+import os
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from pypgstac.db import PgstacDB
+from pypgstac.load import Loader, Methods
+
+START = datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Collections cover one region of a `columns x rows` grid and `YEARS` years (starting
+# between 2015 and 2021), so their extents differ like in a real catalog
+GRID = (4, 2)
+YEARS = 3
+
+PLATFORMS = ["sentinel-2a", "sentinel-2b", "landsat-8", "landsat-9"]
+
+# PgSTAC items partitioning of the collections (by collection, year or month)
+PARTITIONS: List[Optional[str]] = [None, "year", "month"]
+
+
+def collection_id(index: int) -> str:
+    """Synthetic collection id."""
+    return f"synthetic-{index:04}"
+
+
+def collection_extent(
+    index: int,
+) -> Tuple[List[float], datetime.datetime, datetime.datetime]:
+    """Bounding box and time interval of a collection."""
+    columns, rows = GRID
+    column, row = index % columns, (index // columns) % rows
+    width, height = 360 / columns, 170 / rows
+    bbox = [
+        -180 + column * width,
+        -85 + row * height,
+        -180 + (column + 1) * width,
+        -85 + (row + 1) * height,
+    ]
+    start = START.replace(year=START.year + (3 * index) % 7)
+    return bbox, start, start.replace(year=start.year + YEARS)
+
+
+def items_per_collection(collections: int, items: int) -> List[int]:
+    """Split `items` between `collections`."""
+    return [
+        items // collections + (1 if i < items % collections else 0)
+        for i in range(collections)
+    ]
+
+
+def generate_collections(n: int) -> Iterator[Dict]:
+    """Yield `n` collections."""
+    for i in range(n):
+        cid = collection_id(i)
+        bbox, start, end = collection_extent(i)
+        yield {
+            "type": "Collection",
+            "stac_version": "1.0.0",
+            "id": cid,
+            "title": f"Synthetic collection {i}",
+            "description": f"Synthetic collection {i} for benchmarks.",
+            "license": "proprietary",
+            "links": [],
+            "extent": {
+                "spatial": {"bbox": [bbox]},
+                "temporal": {
+                    "interval": [[start.isoformat(), end.isoformat()]],
+                },
+            },
+            "item_assets": {
+                "data": {"type": "image/tiff; application=geotiff"},
+            },
+        }
+
+
+def generate_items(index: int, n: int, seed: int = 0) -> Iterator[Dict]:
+    """Yield `n` items of a collection (the same for a given seed)."""
+    collection = collection_id(index)
+    (west, south, east, north), start, end = collection_extent(index)
+    seconds = int((end - start).total_seconds())
+
+    rnd = random.Random(f"{seed}-{collection}")
+    for i in range(n):
+        item_id = f"{collection}-{i:08}"
+        size = rnd.uniform(0.01, 1.0)
+        minx = rnd.uniform(west, east - size)
+        miny = rnd.uniform(south, north - size)
+        maxx, maxy = minx + size, miny + size
+        dt = start + datetime.timedelta(seconds=rnd.randrange(seconds))
+        yield {
+            "type": "Feature",
+            "stac_version": "1.0.0",
+            "stac_extensions": [],
+            "id": item_id,
+            "collection": collection,
+            "bbox": [minx, miny, maxx, maxy],
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [minx, miny],
+                        [maxx, miny],
+                        [maxx, maxy],
+                        [minx, maxy],
+                        [minx, miny],
+                    ]
+                ],
+            },
+            "properties": {
+                "datetime": dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "platform": rnd.choice(PLATFORMS),
+                "eo:cloud_cover": round(rnd.uniform(0, 100), 2),
+                "gsd": rnd.choice([10, 15, 30]),
+            },
+            "links": [],
+            "assets": {
+                "data": {
+                    "href": f"s3://synthetic/{collection}/{item_id}.tif",
+                    "type": "image/tiff; application=geotiff",
+                    "roles": ["data"],
+                },
+                "thumbnail": {
+                    "href": f"s3://synthetic/{collection}/{item_id}.png",
+                    "type": "image/png",
+                    "roles": ["thumbnail"],
+                },
+            },
+        }
+
+
+def load_catalog(dsn: str, collections: int, items: int, seed: int = 0) -> None:
+    """Load `collections` collections with a total of `items` items into PgSTAC."""
+    with PgstacDB(dsn=dsn) as db:
+        loader = Loader(db=db)
+        loader.load_collections(
+            generate_collections(collections), insert_mode=Methods.upsert
+        )
+        for i in range(collections):
+            # NOTE: `query_one` fetches the result, so the UPDATE must return a row
+            db.query_one(
+                "UPDATE pgstac.collections SET partition_trunc = %s WHERE id = %s RETURNING id;",
+                [PARTITIONS[i % len(PARTITIONS)], collection_id(i)],
+            )
+
+        for i, n in enumerate(items_per_collection(collections, items)):
+            loader.load_items(
+                generate_items(i, n, seed=seed),
+                insert_mode=Methods.insert,
+            )
+
+
+def main():
+    """Write collections and items ndjson files."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--collections", type=int, default=10)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, "collections.ndjson"), "wb") as f:
+        for collection in generate_collections(args.collections):
+            f.write(orjson.dumps(collection) + b"\n")
+
+    with open(os.path.join(args.output, "items.ndjson"), "wb") as f:
+        per_collection = items_per_collection(args.collections, args.items)
+        for i, n in enumerate(per_collection):
+            for item in generate_items(i, n, seed=args.seed):
+                f.write(orjson.dumps(item) + b"\n")
+
+
+if __name__ == "__main__":
+    main()
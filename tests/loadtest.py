@@ -0,0 +1,152 @@
+"""End-to-end load benchmark on a synthetic catalog.
+
+Loads a deterministic synthetic catalog (see `tests/generator.py`) in the test
+database, then sends concurrent requests to each endpoint (in-process, no network)
+and reports throughput and latency percentiles.
+
+    TIPGSTAC_LOAD_ITEMS=1000000 python -m pytest tests/loadtest.py -s
+
+Options (environment variables):
+
+- `TIPGSTAC_LOAD_COLLECTIONS`: number of collections (default 10)
+- `TIPGSTAC_LOAD_ITEMS`: total number of items (default 100000)
+- `TIPGSTAC_LOAD_REQUESTS`: number of requests per endpoint (default 200)
+- `TIPGSTAC_LOAD_CONCURRENCY`: number of concurrent requests (default 8)
+- `TIPGSTAC_LOAD_OUTPUT`: JSON file to write the results to
+
+"""
+
+import functools
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pytest
+
+from .generator import collection_id, load_catalog
+
+COLLECTIONS = int(os.environ.get("TIPGSTAC_LOAD_COLLECTIONS", 10))
+ITEMS = int(os.environ.get("TIPGSTAC_LOAD_ITEMS", 100000))
+REQUESTS = int(os.environ.get("TIPGSTAC_LOAD_REQUESTS", 200))
+CONCURRENCY = int(os.environ.get("TIPGSTAC_LOAD_CONCURRENCY", 8))
+
+CID = collection_id(0)
+
+# (name, method, path, params or body)
+ENDPOINTS = [
+    ("collections", "GET", "/collections", {"limit": 10}),
+    ("collection", "GET", f"/collections/{CID}", None),
+    ("items", "GET", f"/collections/{CID}/items", {"limit": 100}),
+    ("item", "GET", f"/collections/{CID}/items/{CID}-00000000", None),
+    ("search", "GET", "/search", {"limit": 100}),
+    (
+        "search-bbox-datetime",
+        "GET",
+        "/search",
+        {
+            "bbox": "-10,30,30,60",
+            "datetime": "2020-01-01T00:00:00Z/2020-12-31T23:59:59Z",
+            "limit": 100,
+        },
+    ),
+    (
+        "search-sortby",
+        "GET",
+        "/search",
+        {"collections": CID, "sortby": "-datetime", "limit": 100},
+    ),
+    (
+        "search-filter",
+        "POST",
+        "/search",
+        {
+            "collections": [CID],
+            "filter": {
+                "op": "and",
+                "args": [
+                    {"op": "<", "args": [{"property": "eo:cloud_cover"}, 10]},
+                    {"op": "=", "args": [{"property": "platform"}, "landsat-8"]},
+                ],
+            },
+            "limit": 100,
+        },
+    ),
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Return the `p` percentile of sorted values."""
+    index = min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def timed_request(client, method: str, path: str, data) -> float:
+    """Send a request and return its duration."""
+    start = time.perf_counter()
+    if method == "POST":
+        response = client.post(path, json=data)
+    else:
+        response = client.get(path, params=data)
+
+    assert response.status_code == 200, response.text
+    return time.perf_counter() - start
+
+
+@pytest.fixture(scope="module")
+def synthetic_catalog(database_url):
+    """Load the synthetic catalog."""
+    start = time.perf_counter()
+    load_catalog(database_url, COLLECTIONS, ITEMS)
+    print(
+        f"\nLoaded {ITEMS} items in {COLLECTIONS} collections "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+def test_load(app, synthetic_catalog):
+    """Report throughput and latency percentiles per endpoint."""
+    results: List[Dict] = []
+
+    for name, method, path, data in ENDPOINTS:
+        request = functools.partial(timed_request, app, method, path, data)
+
+        # warm up
+        request()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+            futures = [executor.submit(request) for _ in range(REQUESTS)]
+            latencies = sorted(f.result() for f in futures)
+        duration = time.perf_counter() - start
+
+        results.append(
+            {
+                "endpoint": name,
+                "requests": REQUESTS,
+                "concurrency": CONCURRENCY,
+                "throughput": REQUESTS / duration,
+                "mean": statistics.mean(latencies) * 1000,
+                "p50": percentile(latencies, 50) * 1000,
+                "p90": percentile(latencies, 90) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+            }
+        )
+
+    print(
+        f"\n{'endpoint':<22}{'req/s':>10}{'mean ms':>10}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['endpoint']:<22}{r['throughput']:>10.1f}{r['mean']:>10.1f}"
+            f"{r['p50']:>10.1f}{r['p90']:>10.1f}{r['p99']:>10.1f}"
+        )
+
+    if output := os.environ.get("TIPGSTAC_LOAD_OUTPUT"):
+        with open(output, "w") as f:
+            json.dump(
+                {"collections": COLLECTIONS, "items": ITEMS, "results": results}, f
+            )
@@ -0,0 +1,198 @@
+"""test tipgstac.backend."""
+
+import json
+import os
+import time
+
+import jinja2
+import pytest
+from fastapi import FastAPI, HTTPException
+from starlette.templating import Jinja2Templates
+from starlette.testclient import TestClient
+
+from tipgstac.backend import MemoryBackend, PgSTACBackend, cql2_match, get_backend
+from tipgstac.collections import get_collection_index
+from tipgstac.factory import OGCFeaturesFactory
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+with open(os.path.join(DATA_DIR, "noaa-emergency-response.json")) as f:
+    COLLECTIONS = [json.loads(line) for line in f]
+
+with open(os.path.join(DATA_DIR, "noaa-eri-nashville2020.json")) as f:
+    ITEMS = [json.loads(line) for line in f]
+
+COLLECTION_ID = COLLECTIONS[0]["id"]
+COLLECTION_ITEMS = [item for item in ITEMS if item["collection"] == COLLECTION_ID]
+
+
+def create_app(latency: float = 0.0) -> TestClient:
+    """Create app with a MemoryBackend."""
+    app = FastAPI()
+    templates = Jinja2Templates(
+        env=jinja2.Environment(
+            loader=jinja2.ChoiceLoader(
+                [
+                    jinja2.PackageLoader("tipgstac", "templates"),
+                    jinja2.PackageLoader("tipg", "templates"),
+                ]
+            )
+        )
+    )
+    app.include_router(OGCFeaturesFactory(templates=templates).router)
+    app.state.pool = MemoryBackend(
+        collections=COLLECTIONS, items=ITEMS, latency=latency
+    )
+    return TestClient(app)
+
+
+def test_get_backend():
+    """Test get_backend."""
+    backend = MemoryBackend()
+    assert get_backend(backend) is backend
+    assert isinstance(get_backend(object()), PgSTACBackend)
+
+
+def test_cql2_match():
+    """Test cql2_match."""
+    item = ITEMS[0]
+    assert cql2_match(item, {"op": "=", "args": [{"property": "id"}, item["id"]]})
+    assert cql2_match(
+        item,
+        {
+            "op": "and",
+            "args": [
+                {"op": "=", "args": [{"property": "event"}, "Nashville Tornado"]},
+                {
+                    "op": "<",
+                    "args": [
+                        {"property": "datetime"},
+                        {"timestamp": "2021-01-01T00:00:00Z"},
+                    ],
+                },
+            ],
+        },
+    )
+    assert not cql2_match(
+        item, {"op": "not", "args": [{"op": "isNull", "args": [{"property": "a"}]}]}
+    )
+
+    with pytest.raises(HTTPException) as e:
+        cql2_match(item, {"op": "s_intersects", "args": []})
+    assert e.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        cql2_match(item, {"op": "<", "args": [{"property": "datetime"}, 1]})
+
+
+def test_memory_collections():
+    """Test collections endpoints with a MemoryBackend."""
+    client = create_app()
+
+    response = client.get("/collections")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["numberMatched"] == 2
+    assert body["collections"][0]["id"] == COLLECTION_ID
+
+    response = client.get(f"/collections/{COLLECTION_ID}")
+    assert response.status_code == 200
+    assert response.json()["id"] == COLLECTION_ID
+
+    response = client.get("/collections/unknown")
+    assert response.status_code == 404
+
+
+def test_memory_items():
+    """Test items endpoints with a MemoryBackend."""
+    client = create_app()
+
+    response = client.get(f"/collections/{COLLECTION_ID}/items", params={"limit": 15})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["numberMatched"] == len(COLLECTION_ITEMS)
+    assert len(body["features"]) == 15
+
+    # Paginate through all the items
+    ids = [f["id"] for f in body["features"]]
+    while next_link := [link for link in body["links"] if link["rel"] == "next"]:
+        body = client.get(next_link[0]["href"]).json()
+        ids += [f["id"] for f in body["features"]]
+
+    assert sorted(ids) == sorted(item["id"] for item in COLLECTION_ITEMS)
+
+    response = client.get(
+        "/search", params={"ids": f"{ITEMS[0]['id']},{ITEMS[1]['id']}"}
+    )
+    assert response.status_code == 200
+    assert response.json()["numberMatched"] == 2
+
+    response = client.get("/search", params={"f": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    response = client.get("/search", params={"collections": "unknown"})
+    assert response.status_code == 200
+    assert response.json()["numberMatched"] == 0
+
+    # Invalid tokens
+    for token in ["next", "next:a"]:
+        response = client.get("/search", params={"offset": token})
+        assert response.status_code == 400
+        assert response.json()["detail"] == f"Invalid token: {token}."
+
+
+def test_memory_unsupported():
+    """Test unsupported requests with a MemoryBackend."""
+    client = create_app()
+
+    # Unsupported CQL2 operators
+    response = client.post(
+        "/search",
+        json={
+            "filter": {
+                "op": "s_intersects",
+                "args": [
+                    {"property": "geometry"},
+                    {"type": "Point", "coordinates": [0, 0]},
+                ],
+            },
+            "filter-lang": "cql2-json",
+        },
+    )
+    assert response.status_code == 400
+    assert "Unsupported CQL2 operator" in response.json()["detail"]
+
+    # Endpoints running their own SQL
+    response = client.get("/search", params={"snapshot": True})
+    assert response.status_code == 501
+
+    response = client.post(
+        "/batch/items",
+        json={"items": [{"collection": COLLECTION_ID, "id": ITEMS[0]["id"]}]},
+    )
+    assert response.status_code == 501
+
+    response = client.get("/aggregate")
+    assert response.status_code == 501
+
+    response = client.get("/coverage")
+    assert response.status_code == 501
+
+
+@pytest.mark.asyncio
+async def test_memory_collection_index():
+    """Test the collection catalog with a MemoryBackend."""
+    catalog = await get_collection_index(MemoryBackend(collections=COLLECTIONS))
+    assert list(catalog["collections"]) == [c["id"] for c in COLLECTIONS]
+    assert not catalog["extents_current"]
+
+
+def test_memory_latency():
+    """Test MemoryBackend latency."""
+    client = create_app(latency=0.05)
+
+    start = time.perf_counter()
+    response = client.get("/search")
+    assert response.status_code == 200
+    assert time.perf_counter() - start >= 0.05
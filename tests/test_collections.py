@@ -141,3 +141,47 @@ def test_collection_queryables(app):
     assert response.status_code == 200
     assert "text/html" in response.headers["content-type"]
     assert "Queryables" in response.text
+
+
+def test_collections_catalog_index(app):
+    """Test /collections endpoint using the in-memory catalog index."""
+    from tipgstac.collections import register_collection_catalog
+
+    app.portal.call(register_collection_catalog, app.app)
+    assert len(app.app.state.collection_catalog["index"]) == 2
+
+    try:
+        response = app.get("/collections")
+        body = response.json()
+        assert body["numberMatched"] == 2
+        assert [x["id"] for x in body["collections"]] == [
+            "noaa-emergency-response",
+            "noaa-emergency-response-copy",
+        ]
+
+        response = app.get("/collections", params={"limit": 1, "offset": 1})
+        body = response.json()
+        assert body["numberMatched"] == 2
+        assert body["numberReturned"] == 1
+        assert [x["rel"] for x in body["links"]] == ["self", "prev"]
+
+        response = app.get("/collections", params={"sortby": "-id"})
+        body = response.json()
+        assert body["collections"][0]["id"] == "noaa-emergency-response-copy"
+
+        response = app.get("/collections", params={"bbox": "1,1,180,90"})
+        assert response.json()["numberMatched"] == 1
+
+        response = app.get(
+            "/collections", params={"datetime": "2010-01-01T00:00:00Z/.."}
+        )
+        assert response.json()["numberMatched"] == 1
+
+        response = app.get(
+            "/collections",
+            params={"datetime": "2003-01-01T00:00:00Z/2004-01-01T00:00:00Z"},
+        )
+        assert response.json()["numberMatched"] == 1
+
+    finally:
+        del app.app.state.collection_catalog
@@ -0,0 +1,59 @@
+"""test tipgstac.export."""
+
+import asyncio
+import csv
+import io
+import json
+
+from tipgstac.export import EXTRA_FIELD, Field, schema_fields, stream_csv
+
+items = [
+    {
+        "id": f"item-{i}",
+        "collection": "c",
+        "geometry": {"type": "Point", "coordinates": [i, i]},
+        "properties": {"value": i, **({"late": "yes"} if i >= 2 else {})},
+    }
+    for i in range(4)
+]
+
+
+async def _pages(size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+async def _read(pages, **kwargs):
+    return b"".join([chunk async for chunk in stream_csv(pages, **kwargs)]).decode()
+
+
+def test_schema_fields():
+    """Test export columns."""
+    fields = schema_fields(
+        {"datetime": {"type": "string", "format": "date-time"}}, items[:2]
+    )
+    assert fields == [
+        Field("datetime", "datetime"),
+        Field("value", "integer"),
+        EXTRA_FIELD,
+    ]
+
+    fields = schema_fields(None, items[:2], properties=["value"])
+    assert fields == [Field("value", "integer")]
+
+
+def test_stream_csv():
+    """Properties found after the first page are kept in the `properties` column."""
+    rows = list(csv.reader(io.StringIO(asyncio.run(_read(_pages(2))))))
+    assert rows[0] == ["collectionId", "itemId", "value", "properties", "geometry"]
+    assert len(rows) == 5
+    assert rows[1][3] == ""
+    assert json.loads(rows[3][3]) == {"late": "yes"}
+    assert rows[3][4] == "POINT (2.0 2.0)"
+
+    # Requested properties only
+    rows = list(
+        csv.reader(io.StringIO(asyncio.run(_read(_pages(2), properties=["late"]))))
+    )
+    assert rows[0] == ["collectionId", "itemId", "late", "geometry"]
+    assert [row[2] for row in rows[1:]] == ["", "", "yes", "yes"]
@@ -0,0 +1,70 @@
+"""test FlatGeobuf encoding."""
+
+import asyncio
+
+import pytest
+
+from tipgstac import fgb
+from tipgstac.export import EXTRA_FIELD, Field
+
+pytest.importorskip("flatbuffers")
+
+items = [
+    {
+        "id": f"item-{x}-{y}",
+        "collection": "grid",
+        "geometry": {"type": "Point", "coordinates": [x, y]},
+        "properties": {"value": x * y},
+    }
+    for x in range(10)
+    for y in range(10)
+]
+
+
+async def _pages(size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+async def _read(pages):
+    return b"".join([chunk async for chunk in fgb.stream_fgb(pages)])
+
+
+def test_packed_rtree():
+    """Test packed Hilbert R-Tree."""
+    assert fgb._level_bounds(1) == [(1, 2), (0, 1)]
+    assert fgb._level_bounds(100) == [(8, 108), (1, 8), (0, 1)]
+
+    boxes = [[i, i, i + 1, i + 1] for i in range(20)]
+    tree = fgb.packed_rtree(boxes, list(range(20)))
+    assert len(tree) == (20 + 2 + 1) * 40
+
+    # root node covers all the items
+    assert fgb.struct.unpack("<4dQ", tree[:40]) == (0, 0, 20, 20, 1)
+
+
+def test_stream_fgb(monkeypatch):
+    """Test FlatGeobuf output with and without index."""
+    monkeypatch.setattr(fgb.export_settings, "fgb_index_max_features", 1000)
+    data = asyncio.run(_read(_pages(30)))
+    assert data.startswith(fgb.MAGIC_BYTES)
+    header_size = int.from_bytes(data[8:12], "little")
+    index_size = (100 + 7 + 1) * 40
+    features = data[12 + header_size + index_size :]
+
+    count = 0
+    while features:
+        size = int.from_bytes(features[:4], "little")
+        features = features[4 + size :]
+        count += 1
+    assert count == 100
+
+    # Too many features for the index
+    monkeypatch.setattr(fgb.export_settings, "fgb_index_max_features", 50)
+    unindexed = asyncio.run(_read(_pages(30)))
+    assert len(unindexed) < len(data)
+    header_size = int.from_bytes(unindexed[8:12], "little")
+    assert (
+        fgb.header([Field("value", "integer"), EXTRA_FIELD])
+        == unindexed[8 : 12 + header_size]
+    )
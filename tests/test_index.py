@@ -0,0 +1,141 @@
+"""test tipgstac.index."""
+
+import datetime
+
+from tipgstac import collections as catalog_module
+from tipgstac.collections import catalog_fresh, prune_search
+from tipgstac.index import ExtentIndex
+from tipgstac.models import ItemsSearch
+
+collections = [
+    {
+        "id": "europe",
+        "title": "Europe",
+        "extent": {
+            "spatial": {"bbox": [[-10, 35, 30, 70]]},
+            "temporal": {
+                "interval": [["2010-01-01T00:00:00Z", "2015-01-01T00:00:00Z"]]
+            },
+        },
+    },
+    {
+        "id": "fiji",
+        "title": "Fiji",
+        "extent": {
+            "spatial": {"bbox": [[177, -20, -178, -15]]},
+            "temporal": {"interval": [["2020-01-01T00:00:00Z", None]]},
+        },
+    },
+    {
+        "id": "world",
+        "title": "A World",
+        "extent": {
+            "spatial": {"bbox": [[-180, -90, 180, 90]]},
+            "temporal": {"interval": [[None, "2000-01-01T00:00:00Z"]]},
+        },
+    },
+    {"id": "noextent"},
+]
+
+
+def test_index_filters():
+    """Test bbox/datetime/ids filtering."""
+    index = ExtentIndex(collections)
+    assert len(index) == 4
+
+    assert index.search() == ["europe", "fiji", "world", "noextent"]
+    assert index.search(ids=["world", "fiji", "missing"]) == ["fiji", "world"]
+
+    assert index.search(bbox=[0, 40, 1, 41]) == ["europe", "world"]
+    assert index.search(bbox=[-179, -18, -178.5, -17]) == ["fiji", "world"]
+    assert index.search(bbox=[170, -18, -170, -17]) == ["fiji", "world"]
+    assert index.search(bbox=[100, -10, 110, 10, 0, 100]) == ["world"]
+
+    assert index.search(datetime=["2012-01-01T00:00:00Z"]) == ["europe", "noextent"]
+    assert index.search(datetime=["..", "2005-01-01T00:00:00Z"]) == [
+        "world",
+        "noextent",
+    ]
+    assert index.search(datetime=["2014-01-01T00:00:00Z", ".."]) == [
+        "europe",
+        "fiji",
+        "noextent",
+    ]
+
+    assert index.search(bbox=[0, 40, 1, 41], datetime=["2012-01-01T00:00:00Z"]) == [
+        "europe"
+    ]
+    assert index.search(ids=["fiji"], bbox=[0, 40, 1, 41]) == []
+
+    # collections without spatial extent
+    assert index.search(bbox=[0, 40, 1, 41], include_unbounded=True) == [
+        "europe",
+        "world",
+        "noextent",
+    ]
+
+
+def test_prune_search():
+    """Test search pruning with the index."""
+    catalog = {"index": ExtentIndex(collections)}
+
+    search = prune_search(catalog, ItemsSearch(bbox=[0, 40, 1, 41]))
+    assert search.collections == ["europe", "world", "noextent"]
+
+    search = prune_search(
+        catalog, ItemsSearch(bbox=[0, 40, 1, 41], datetime="2016-01-01T00:00:00Z")
+    )
+    assert search.collections == ["noextent"]
+
+    search = ItemsSearch(collections=["fiji"], bbox=[0, 40, 1, 41])
+    assert prune_search(catalog, search) is search
+
+
+def test_catalog_fresh(monkeypatch):
+    """Test catalog freshness (pruning is skipped with stale catalogs)."""
+    monkeypatch.setattr(catalog_module.catalog_settings, "ttl", 300)
+    now = datetime.datetime.now()
+    assert catalog_fresh({"last_updated": now})
+    assert not catalog_fresh({"last_updated": now - datetime.timedelta(seconds=301)})
+
+
+def test_index_rtree():
+    """Test spatial queries against a multi-level R-Tree."""
+    grid = [
+        {"id": f"{x}_{y}", "extent": {"spatial": {"bbox": [[x, y, x + 1, y + 1]]}}}
+        for x in range(-180, 180, 10)
+        for y in range(-90, 90, 10)
+    ]
+    index = ExtentIndex(grid)
+    assert index.root and not index.root.leaf
+
+    assert index.search(bbox=[0.2, 0.2, 0.8, 0.8]) == ["0_0"]
+    assert index.search(bbox=[2, 2, 8, 8]) == []
+    assert sorted(index.search(bbox=[-0.5, -0.5, 10.5, 0.5])) == ["0_0", "10_0"]
+    assert len(index.search(bbox=[-180, -90, 180, 90])) == len(grid)
+
+
+def test_index_sort():
+    """Test collection sorting."""
+    index = ExtentIndex(collections)
+    ids = index.search()
+
+    assert index.sort(ids) == ["europe", "fiji", "noextent", "world"]
+    assert index.sort(ids, [{"field": "id", "direction": "desc"}]) == [
+        "world",
+        "noextent",
+        "fiji",
+        "europe",
+    ]
+    assert index.sort(ids, [{"field": "title", "direction": "asc"}]) == [
+        "noextent",
+        "world",
+        "europe",
+        "fiji",
+    ]
+    assert index.sort(ids, [{"field": "datetime", "direction": "asc"}]) == [
+        "world",
+        "noextent",
+        "europe",
+        "fiji",
+    ]
@@ -0,0 +1,100 @@
+"""test tipgstac.intersects."""
+
+import pytest
+from fastapi import HTTPException
+
+from tipgstac import intersects
+from tipgstac.intersects import count_vertices, preprocess_intersects, rectangle_bbox
+from tipgstac.models import ItemsSearch
+
+rectangle = {
+    "type": "Polygon",
+    "coordinates": [[[-10, 35], [30, 35], [30, 70], [-10, 70], [-10, 35]]],
+}
+
+triangle = {
+    "type": "Polygon",
+    "coordinates": [[[-10, 35], [30, 35], [30, 70], [-10, 35]]],
+}
+
+
+class FakeDB:
+    """Return a triangle for any simplification query."""
+
+    calls = 0
+
+    async def fetchval(self, query, *args):
+        """Count calls."""
+        self.calls += 1
+        return triangle
+
+
+def test_count_vertices():
+    """Test count_vertices."""
+    assert count_vertices({"type": "Point", "coordinates": [0, 0]}) == 1
+    assert count_vertices(rectangle) == 5
+    assert (
+        count_vertices(
+            {
+                "type": "GeometryCollection",
+                "geometries": [
+                    rectangle,
+                    {"type": "MultiPoint", "coordinates": [[0, 0], [1, 1]]},
+                ],
+            }
+        )
+        == 7
+    )
+
+
+def test_rectangle_bbox():
+    """Test rectangle_bbox."""
+    assert rectangle_bbox(rectangle) == [-10, 35, 30, 70]
+    assert rectangle_bbox(triangle) is None
+    assert (
+        rectangle_bbox(
+            {
+                "type": "Polygon",
+                "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]],
+            }
+        )
+        is None
+    )
+    assert rectangle_bbox({"type": "Point", "coordinates": [0, 0]}) is None
+
+
+@pytest.mark.asyncio
+async def test_preprocess_intersects(monkeypatch):
+    """Test preprocess_intersects."""
+    db = FakeDB()
+
+    search = ItemsSearch(collections=["a"])
+    assert await preprocess_intersects(db, search) is search
+
+    search = await preprocess_intersects(db, ItemsSearch(intersects=rectangle))
+    assert search.intersects is None
+    assert list(search.bbox) == [-10, 35, 30, 70]
+
+    # No simplification by default
+    search = ItemsSearch(intersects=triangle)
+    assert await preprocess_intersects(db, search) is search
+    assert db.calls == 0
+
+    big = {
+        "type": "LineString",
+        "coordinates": [[i / 100, i / 100] for i in range(2000)],
+    }
+    settings = intersects.intersects_settings
+    monkeypatch.setattr(settings, "simplify_tolerance", 0.1)
+    search = await preprocess_intersects(db, ItemsSearch(intersects=big))
+    assert search.intersects.type == "Polygon"
+    assert db.calls == 1
+
+    # simplified geometries are cached
+    search = await preprocess_intersects(db, ItemsSearch(intersects=big))
+    assert db.calls == 1
+
+    monkeypatch.setattr(settings, "simplify_tolerance", None)
+    monkeypatch.setattr(settings, "max_vertices", 1000)
+    with pytest.raises(HTTPException):
+        await preprocess_intersects(db, ItemsSearch(intersects=big))
@@ -1,8 +1,12 @@
 """Test /items and /item endpoints."""
 
+import io
 import json
+import tempfile
 from urllib.parse import quote_plus
 
+import pytest
+
 
 def test_items(app):
     """Test /items endpoint."""
@@ -308,6 +312,13 @@ def test_output_response_type(app):
         "event,datetime,collectionId,name,geometry,itemId".split(",")
     )
 
+    response = app.get(
+        "/collections/noaa-emergency-response/items?f=csv&properties=event"
+    )
+    assert response.status_code == 200
+    body = response.text.splitlines()
+    assert body[0] == "collectionId,itemId,event,geometry"
+
     # we only accept csv
     response = app.get(
         "/collections/noaa-emergency-response/items", headers={"accept": "text/csv"}
@@ -463,3 +474,110 @@ def test_item(app):
     # not found
     response = app.get("/collections/noaa-emergency-response/items/yoooooooooo")
     assert response.status_code == 404
+
+
+def test_items_precision(app):
+    """Test /items endpoint with precision and simplify options."""
+    response = app.get(
+        "/collections/noaa-emergency-response/items?precision=3&simplify=0.01"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["features"]) == 10
+    for feat in body["features"]:
+        ring = feat["geometry"]["coordinates"][0]
+        assert all(round(v, 3) == v for c in ring for v in c)
+
+    response = app.get("/collections/noaa-emergency-response/items?precision=-1")
+    assert response.status_code == 422
+
+
+def test_item_html_precision(app, monkeypatch):
+    """Test /item HTML view uses the HTML precision/simplify defaults."""
+    from tipgstac import collections, factory
+
+    calls = []
+    search = collections.pgstac_search
+
+    async def pgstac_search(pool, **kwargs):
+        calls.append(kwargs)
+        return await search(pool, **kwargs)
+
+    monkeypatch.setattr(collections, "pgstac_search", pgstac_search)
+    monkeypatch.setattr(factory.api_settings, "html_precision", 3)
+    monkeypatch.setattr(factory.api_settings, "html_simplify", 0.01)
+
+    url = "/collections/noaa-emergency-response/items/20200307aC0853130w360900"
+    response = app.get(url, params={"f": "html"})
+    assert response.status_code == 200
+    assert calls[-1]["precision"] == 3
+    assert calls[-1]["simplify"] == 0.01
+
+    response = app.get(url)
+    assert response.status_code == 200
+    assert calls[-1]["precision"] is None
+    assert calls[-1]["simplify"] is None
+
+
+def test_items_compact(app):
+    """Test /items endpoint with compact responses."""
+    response = app.get(
+        "/collections/noaa-emergency-response/items?compact=true&limit=5"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["columns"] == ["collection", "id", "bbox", "datetime"]
+    assert len(body["items"]) == 5
+    assert body["items"][0][0] == "noaa-emergency-response"
+    assert "features" not in body
+
+
+def test_items_arrow(app):
+    """Test /items endpoint with Arrow/GeoParquet outputs."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    response = app.get("/collections/noaa-emergency-response/items?f=arrow&limit=15")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 15
+    assert table.column_names[:3] == ["id", "collection", "geometry"]
+    assert "datetime" in table.column_names
+    assert table.schema.field("datetime").type == pa.timestamp("us", tz="UTC")
+    assert table.schema.field("geometry").type == pa.binary()
+
+    response = app.get(
+        "/collections/noaa-emergency-response/items?f=parquet&limit=100&properties=event"
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 20
+    assert table.column_names == ["id", "collection", "geometry", "event"]
+    geo = json.loads(table.schema.metadata[b"geo"])
+    assert geo["primary_column"] == "geometry"
+    assert geo["columns"]["geometry"]["encoding"] == "WKB"
+
+
+def test_items_fgb(app):
+    """Test /items endpoint with FlatGeobuf output."""
+    pytest.importorskip("flatbuffers")
+
+    response = app.get("/collections/noaa-emergency-response/items?f=fgb&limit=100")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/flatgeobuf"
+    assert response.content[:8] == b"fgb\x03fgb\x00"
+
+    pyogrio = pytest.importorskip("pyogrio")
+    with tempfile.NamedTemporaryFile(suffix=".fgb") as f:
+        f.write(response.content)
+        f.flush()
+
+        info = pyogrio.read_info(f.name)
+        assert info["features"] == 20
+        assert info["capabilities"]["fast_spatial_filter"]
+        assert {"id", "collection", "datetime"}.issubset(info["fields"])
+
+        _, _, geometries, _ = pyogrio.raw.read(f.name, bbox=(-85.5, 36.1, -85.4, 36.2))
+        assert 0 < len(geometries) < 20
@@ -0,0 +1,189 @@
+"""test tipgstac.keyset."""
+
+import pytest
+from fastapi import HTTPException
+
+from tipgstac.keyset import (
+    DEFAULT_SORTBY,
+    decode_keyset_token,
+    encode_keyset_token,
+    is_keyset_token,
+    keyset_filter,
+    keyset_page,
+    keyset_search,
+    keyset_sortby,
+)
+from tipgstac.models import ItemsSearch
+
+items = [
+    {"id": "c", "collection": "c1", "properties": {"datetime": "2020-01-03T00:00:00Z"}},
+    {"id": "b", "collection": "c1", "properties": {"datetime": "2020-01-02T00:00:00Z"}},
+    {"id": "a", "collection": "c2", "properties": {"datetime": "2020-01-02T00:00:00Z"}},
+]
+
+
+def test_keyset_sortby():
+    """Test keyset_sortby."""
+    assert keyset_sortby(ItemsSearch()) == DEFAULT_SORTBY
+    assert keyset_sortby(
+        ItemsSearch(sortby=[{"field": "datetime", "direction": "asc"}])
+    ) == [
+        {"field": "datetime", "direction": "asc"},
+        {"field": "id", "direction": "asc"},
+        {"field": "collection", "direction": "asc"},
+    ]
+    assert keyset_sortby(ItemsSearch(sortby=[{"field": "id"}])) == [
+        {"field": "id", "direction": "asc"},
+        {"field": "collection", "direction": "asc"},
+    ]
+    assert keyset_sortby(
+        ItemsSearch(
+            sortby=[
+                {"field": "id", "direction": "desc"},
+                {"field": "collection", "direction": "asc"},
+            ]
+        )
+    ) == [
+        {"field": "id", "direction": "desc"},
+        {"field": "collection", "direction": "asc"},
+    ]
+
+    # other sort orders or PgSTAC tokens
+    assert not keyset_sortby(ItemsSearch(sortby=[{"field": "properties.event"}]))
+    assert not keyset_sortby(ItemsSearch(sortby=[{"field": "collection"}]))
+    assert not keyset_sortby(ItemsSearch(token="next:collection:item"))
+    assert not keyset_sortby(
+        ItemsSearch.model_validate(
+            {"filter": {"eq": [{"property": "id"}, "a"]}, "filter-lang": "cql-json"}
+        )
+    )
+
+
+def test_keyset_token():
+    """Test keyset tokens."""
+    token = encode_keyset_token("next", ["2020-01-02T00:00:00Z", "a"], 20)
+    assert is_keyset_token(token)
+    assert not is_keyset_token("collection:item")
+    assert decode_keyset_token(token) == {
+        "d": "next",
+        "v": ["2020-01-02T00:00:00Z", "a"],
+        "m": 20,
+    }
+
+    with pytest.raises(HTTPException):
+        decode_keyset_token("keyset:notbase64")
+
+
+def test_keyset_filter():
+    """Test keyset_filter."""
+    assert keyset_filter([{"field": "id", "direction": "asc"}], ["a"]) == {
+        "op": "and",
+        "args": [{"op": ">", "args": [{"property": "id"}, "a"]}],
+    }
+
+    cql = keyset_filter(DEFAULT_SORTBY, ["2020-01-02T00:00:00Z", "a", "c1"])
+    assert cql["op"] == "or"
+    before, same_datetime, same_id = cql["args"]
+    assert before["args"] == [
+        {
+            "op": "<",
+            "args": [{"property": "datetime"}, {"timestamp": "2020-01-02T00:00:00Z"}],
+        }
+    ]
+    assert [arg["op"] for arg in same_datetime["args"]] == ["=", "<"]
+    # items with the same id in other collections are not skipped
+    assert same_id["args"] == [
+        {
+            "op": "=",
+            "args": [{"property": "datetime"}, {"timestamp": "2020-01-02T00:00:00Z"}],
+        },
+        {"op": "=", "args": [{"property": "id"}, "a"]},
+        {"op": "<", "args": [{"property": "collection"}, "c1"]},
+    ]
+
+
+def test_keyset_pages():
+    """Test keyset_search and keyset_page."""
+    search = ItemsSearch.model_validate(
+        {
+            "filter": {"op": "=", "args": [{"property": "collection"}, "c"]},
+            "filter-lang": "cql2-json",
+            "limit": 3,
+        }
+    )
+    sortby = keyset_sortby(search)
+
+    query, token = keyset_search(search, sortby)
+    assert token is None
+    assert query.sortby == DEFAULT_SORTBY
+    assert query.filter == search.filter
+
+    page = keyset_page(
+        {"items": items, "matched": 10, "next": "pgstac", "prev": None},
+        sortby,
+        token,
+    )
+    assert page["matched"] == 10
+    assert page["prev"] is None
+    assert decode_keyset_token(page["next"])["v"] == [
+        "2020-01-02T00:00:00Z",
+        "a",
+        "c2",
+    ]
+
+    # next page
+    query, token = keyset_search(
+        search.model_copy(update={"token": page["next"]}), sortby
+    )
+    assert token["m"] == 10
+    assert query.token is None
+    assert query.filter["op"] == "and"
+    assert query.filter["args"][0] == search.filter
+
+    # previous page, fetched in the reverse order
+    search = search.model_copy(
+        update={
+            "token": encode_keyset_token(
+                "prev", ["2020-01-01T00:00:00Z", "z", "c1"], 10
+            )
+        }
+    )
+    query, token = keyset_search(search, sortby)
+    assert [s["direction"] for s in query.sortby] == ["asc", "asc", "asc"]
+
+    page = keyset_page(
+        {"items": items[::-1], "matched": 3, "next": None, "prev": None},
+        sortby,
+        token,
+    )
+    assert [item["id"] for item in page["items"]] == ["c", "b", "a"]
+    assert page["matched"] == 10
+    assert page["prev"] is None
+    assert decode_keyset_token(page["next"])["v"] == [
+        "2020-01-02T00:00:00Z",
+        "a",
+        "c2",
+    ]
+
+    # Tokens without the collection tie-breaker
+    with pytest.raises(HTTPException):
+        keyset_search(
+            search.model_copy(
+                update={
+                    "token": encode_keyset_token(
+                        "next", ["2020-01-02T00:00:00Z", "a"], 10
+                    )
+                }
+            ),
+            sortby,
+        )
+
+    # Missing sort values
+    assert (
+        keyset_page(
+            {"items": [{"id": "a"}], "matched": 1, "next": None, "prev": None},
+            sortby,
+            None,
+        )
+        is None
+    )
@@ -0,0 +1,86 @@
+"""test tipgstac.metrics."""
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from tipgstac import metrics
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+
+def _value(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    """Enable metrics."""
+    monkeypatch.setattr(metrics, "enabled", True)
+
+
+@pytest.mark.asyncio
+async def test_cache_metrics(enabled):
+    """Test cache hits/misses metrics."""
+    cache = {}
+
+    @metrics.cache_metrics("test")
+    async def cached(key):
+        if key in cache:
+            return cache[key]
+
+        metrics.cache_miss()
+        cache[key] = key
+        return key
+
+    name = "tipgstac_cache_requests_total"
+    hits = _value(name, cache="test", result="hit")
+    misses = _value(name, cache="test", result="miss")
+
+    assert await cached("a") == "a"
+    assert await cached("a") == "a"
+    assert await cached("b") == "b"
+
+    assert _value(name, cache="test", result="hit") == hits + 1
+    assert _value(name, cache="test", result="miss") == misses + 2
+
+
+def test_search_metrics(enabled):
+    """Test pgstac.search metrics."""
+    count = _value("tipgstac_pgstac_search_duration_seconds_count")
+    errors = _value("tipgstac_pgstac_search_errors_total")
+
+    with metrics.search_metrics():
+        pass
+
+    with pytest.raises(ValueError):
+        with metrics.search_metrics():
+            raise ValueError("error")
+
+    assert _value("tipgstac_pgstac_search_duration_seconds_count") == count + 2
+    assert _value("tipgstac_pgstac_search_errors_total") == errors + 1
+
+
+def test_metrics_middleware(enabled):
+    """Test MetricsMiddleware and /metrics endpoint."""
+    app = FastAPI()
+
+    @app.get("/items/{itemId}")
+    def item(itemId: str):
+        return {"id": itemId}
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.add_api_route("/metrics", metrics.metrics)
+
+    client = TestClient(app)
+    assert client.get("/items/a").status_code == 200
+    assert client.get("/items/b").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert (
+        'tipgstac_request_duration_seconds_count{media_type="application/json",method="GET",route="/items/{itemId}",status="200"} 2.0'
+        in response.text
+    )
+    assert "tipgstac_response_size_bytes" in response.text
+    assert "tipgstac_requests_in_flight" in response.text
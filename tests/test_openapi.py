@@ -0,0 +1,86 @@
+"""test tipgstac.openapi."""
+
+import cramjam
+import orjson
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from tipgstac.openapi import OpenAPIRoutes
+
+
+def create_app(**kwargs) -> FastAPI:
+    """Create app with precomputed OpenAPI routes."""
+    app = FastAPI(openapi_url=None, docs_url=None, **kwargs)
+    app.state.openapi = OpenAPIRoutes(app)
+
+    @app.get("/healthz")
+    def ping():
+        """Health check."""
+        return {"ping": "pong!"}
+
+    return app
+
+
+def test_openapi():
+    """Test OpenAPI document responses."""
+    app = create_app()
+    app.state.openapi.build()
+    client = TestClient(app)
+
+    response = client.get("/api", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "content-encoding" not in response.headers
+    assert response.json() == app.openapi()
+    assert "/healthz" in response.json()["paths"]
+    etag = response.headers["etag"]
+
+    response = client.get("/api", headers={"Accept-Encoding": "gzip, br"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] != etag
+    assert response.headers["vary"] == "Accept-Encoding"
+
+    response = client.get("/api", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    gzip_etag = response.headers["etag"]
+
+    # Not Modified
+    for tag in [etag, gzip_etag, f"W/{etag}", f'"other", {etag}', "*"]:
+        response = client.get("/api", headers={"If-None-Match": tag})
+        assert response.status_code == 304
+        assert not response.content
+
+    response = client.get("/api", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_openapi_compressed():
+    """Test precompressed variants."""
+    app = create_app()
+    routes = app.state.openapi
+
+    document = routes.openapi_document()
+    assert routes.openapi_document() is document
+    assert orjson.loads(bytes(cramjam.gzip.decompress(document.encoded["gzip"])))
+    assert orjson.loads(bytes(cramjam.brotli.decompress(document.encoded["br"])))
+    assert document.etag("br") != document.etag()
+
+    # Documents are rebuilt when the schema changes
+    app.openapi_schema = None
+    app.add_api_route("/other", lambda: None)
+    assert "/other" in orjson.loads(routes.openapi_document().body)["paths"]
+
+
+def test_openapi_root_path():
+    """Test documents with a root_path."""
+    client = TestClient(create_app(), root_path="/stac")
+
+    response = client.get("/api")
+    assert response.status_code == 200
+    assert response.json()["servers"] == [{"url": "/stac"}]
+
+    response = client.get("/api.html")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert "/stac/api" in response.text
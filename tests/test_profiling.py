@@ -0,0 +1,109 @@
+"""test tipgstac.profiling."""
+
+import time
+
+from fastapi import Depends, FastAPI
+from starlette.testclient import TestClient
+
+from tipgstac import profiling
+from tipgstac.profiling import ProfilingMiddleware, tracemalloc_endpoint
+
+
+def busy_function():
+    """Function to find in the profile."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < 0.05:
+        pass
+
+
+def create_app() -> FastAPI:
+    """Create profiled app."""
+    app = FastAPI()
+
+    @app.get("/")
+    async def route():
+        busy_function()
+        return {"value": "value"}
+
+    def sync_dependency():
+        """Sync dependency (run in the threadpool)."""
+        busy_function()
+
+    @app.get("/sync", dependencies=[Depends(sync_dependency)])
+    async def sync_route():
+        return {"value": "value"}
+
+    app.add_api_route("/debug/tracemalloc", tracemalloc_endpoint)
+    app.add_middleware(ProfilingMiddleware, token="secret")
+    return app
+
+
+def test_profiling_middleware():
+    """Test ProfilingMiddleware."""
+    client = TestClient(create_app())
+
+    response = client.get("/")
+    assert response.status_code == 200
+    assert response.json() == {"value": "value"}
+
+    response = client.get("/", headers={"TiPgSTAC-Profile": "invalid"})
+    assert response.status_code == 403
+
+    response = client.get("/", headers={"TiPgSTAC-Profile": "secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["TiPgSTAC-Profile-Status"] == "200"
+    assert int(response.headers["TiPgSTAC-Profile-Size"]) == 17
+
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+
+    assert any("busy_function" in line for line in lines)
+    loop_threads = {line.split(";")[0] for line in lines if "busy_function" in line}
+
+    # Sync dependencies run in the threadpool
+    response = client.get("/sync", headers={"TiPgSTAC-Profile": "secret"})
+    assert response.status_code == 200
+    lines = [line for line in response.text.splitlines() if "sync_dependency" in line]
+    assert lines
+    assert not {line.split(";")[0] for line in lines} & loop_threads
+
+
+def test_tracemalloc(monkeypatch):
+    """Test /debug/tracemalloc endpoint."""
+    client = TestClient(create_app())
+
+    # Disabled without token
+    response = client.get("/debug/tracemalloc", params={"seconds": 0.01})
+    assert response.status_code == 403
+
+    monkeypatch.setattr(profiling.profiling_settings, "token", "secret")
+    response = client.get(
+        "/debug/tracemalloc",
+        params={"seconds": 0.01},
+        headers={"Authorization": "Bearer invalid"},
+    )
+    assert response.status_code == 403
+
+    response = client.get(
+        "/debug/tracemalloc",
+        params={"seconds": 0.01, "limit": 5},
+        headers={"Authorization": "Bearer secret"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["seconds"] == 0.01
+    assert len(body["stats"]) <= 5
+    assert {"traceback", "size", "size_diff", "count", "count_diff"} <= set(
+        body["stats"][0]
+    )
+
+    response = client.get(
+        "/debug/tracemalloc",
+        params={"seconds": 1000},
+        headers={"Authorization": "Bearer secret"},
+    )
+    assert response.status_code == 422
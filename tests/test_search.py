@@ -1,8 +1,14 @@
 """Test /search endpoints."""
 
+import csv
+import io
 import json
 from urllib.parse import quote_plus
 
+import pytest
+
+from tipgstac import collections, snapshot
+
 
 def test_search(app):
     """Test /search endpoint."""
@@ -465,3 +471,542 @@ def test_search_query(app):
     assert body["links"]
     assert body["numberMatched"] == 40
     assert body["numberReturned"] == 10
+
+
+def test_search_collection_pruning(app, monkeypatch):
+    """Test /search restricted to the collections matching bbox/datetime."""
+    from tipgstac.collections import register_collection_catalog
+
+    monkeypatch.setattr(collections.catalog_settings, "search_pruning", True)
+    app.portal.call(register_collection_catalog, app.app)
+
+    try:
+        # only `noaa-emergency-response` extent intersects
+        response = app.get("/search", params={"bbox": "1,1,180,90"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["numberMatched"] == 20
+        assert {f["collection"] for f in body["features"]} == {
+            "noaa-emergency-response"
+        }
+
+        response = app.post(
+            "/search", json={"datetime": "2019-01-01T00:00:00Z/2021-01-01T00:00:00Z"}
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["numberMatched"] == 20
+        # the user search is returned unchanged
+        assert "collections" not in json.loads(body["description"])
+
+        # no collection extent intersects
+        response = app.get("/search", params={"datetime": "1990-01-01T00:00:00Z"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["numberMatched"] == 0
+        assert body["features"] == []
+
+    finally:
+        del app.app.state.collection_catalog
+
+
+def test_aggregate(app):
+    """Test /aggregate endpoints."""
+    response = app.get("/aggregate")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["type"] == "AggregationCollection"
+    assert body["aggregations"] == [
+        {"name": "total_count", "data_type": "integer", "value": 40}
+    ]
+
+    aggregations = [
+        {"type": "total_count"},
+        {"type": "datetime_frequency", "interval": "day"},
+        {"type": "term_frequency", "property": "collection", "name": "collections"},
+        {"type": "geohash_frequency", "precision": 2},
+        {"type": "grid_frequency", "resolution": 10},
+    ]
+    response = app.get(
+        "/aggregate",
+        params={
+            "collections": "noaa-emergency-response",
+            "aggregations": json.dumps(aggregations[0:3]),
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [agg["name"] for agg in body["aggregations"]] == [
+        "total_count",
+        "datetime_frequency",
+        "collections",
+    ]
+    assert body["aggregations"][0]["value"] == 20
+    days = body["aggregations"][1]["buckets"]
+    assert sum(b["frequency"] for b in days) == 20
+    assert days[0]["key"] == "2020-03-06T00:00:00Z"
+    assert body["aggregations"][2]["buckets"] == [
+        {
+            "key": "noaa-emergency-response",
+            "data_type": "frequency_distribution",
+            "frequency": 20,
+        }
+    ]
+
+    response = app.post(
+        "/aggregate",
+        json={
+            "bbox": [-85.6, 36.0, -85.3, 36.3],
+            "aggregations": [aggregations[0], *aggregations[3:]],
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    total = body["aggregations"][0]["value"]
+    assert total > 0
+    geohash = body["aggregations"][1]["buckets"]
+    assert [b["key"] for b in geohash] == ["dn"]
+    assert geohash[0]["frequency"] == total
+    grid = body["aggregations"][2]["buckets"]
+    assert grid[0]["key"] == [-90, 30]
+    assert grid[0]["frequency"] == total
+
+    # invalid aggregations
+    response = app.get("/aggregate", params={"aggregations": "[{"})
+    assert response.status_code == 422
+
+    response = app.get(
+        "/aggregate", params={"aggregations": json.dumps([{"type": "term_frequency"}])}
+    )
+    assert response.status_code == 422
+
+    response = app.post("/aggregate", json={"aggregations": []})
+    assert response.status_code == 422
+
+
+def test_coverage(app):
+    """Test /coverage endpoints."""
+    response = app.get("/coverage", params={"collections": "noaa-emergency-response"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/geo+json"
+    body = response.json()
+    assert body["type"] == "Feature"
+    assert body["properties"]["numberMatched"] == 20
+    assert body["geometry"]["type"] in ["Polygon", "MultiPolygon"]
+    assert body["links"][0]["rel"] == "self"
+
+    response = app.get(
+        "/coverage",
+        params={
+            "collections": "noaa-emergency-response",
+            "simplify": 0.01,
+            "precision": 2,
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["properties"]["numberMatched"] == 20
+    coords = body["geometry"]["coordinates"]
+    while isinstance(coords[0], list):
+        coords = coords[0]
+    assert all(round(c, 2) == c for c in coords)
+
+    response = app.post(
+        "/coverage",
+        json={
+            "collections": ["noaa-emergency-response"],
+            "datetime": "2010-01-01T00:00:00Z",
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["properties"]["numberMatched"] == 0
+    assert body["geometry"] is None
+
+    response = app.get("/coverage", params={"precision": 20})
+    assert response.status_code == 422
+
+
+def test_search_arrow(app):
+    """Test /search endpoints with Arrow/GeoParquet outputs."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    response = app.get("/search?f=arrow&limit=100")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 40
+    assert set(table.column("collection").to_pylist()) == {
+        "noaa-emergency-response",
+        "noaa-emergency-response-copy",
+    }
+
+    response = app.post(
+        "/search",
+        json={"collections": ["noaa-emergency-response-copy"], "limit": 5},
+        headers={"accept": "application/vnd.apache.parquet"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 5
+
+    # no items
+    response = app.get("/search?f=arrow&datetime=2010-01-01T00:00:00Z")
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 0
+
+
+def test_search_csv(app):
+    """Test /search endpoints with CSV output."""
+    response = app.get("/search?f=csv&limit=100")
+    assert response.status_code == 200
+    assert "text/csv" in response.headers["content-type"]
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert len(rows) == 41
+    assert rows[0] == [
+        "collectionId",
+        "itemId",
+        "datetime",
+        "event",
+        "name",
+        "properties",
+        "geometry",
+    ]
+    assert all(len(row) == 7 for row in rows)
+    assert rows[1][-1].startswith("POLYGON ((")
+
+    response = app.post(
+        "/search",
+        json={"collections": ["noaa-emergency-response"], "limit": 5},
+        headers={"accept": "text/csv"},
+    )
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert len(rows) == 6
+
+    # No items
+    response = app.get("/search?f=csv&datetime=2010-01-01T00:00:00Z")
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows == [["collectionId", "itemId", "datetime", "properties", "geometry"]]
+
+
+def test_search_precision_simplify(app):
+    """Test /search endpoints with precision and simplify options."""
+
+    def coords(geometry):
+        return [c for ring in geometry["coordinates"] for c in ring]
+
+    response = app.get("/search?collections=noaa-emergency-response&limit=5")
+    assert response.status_code == 200
+    features = response.json()["features"]
+
+    response = app.get(
+        "/search?collections=noaa-emergency-response&limit=5&precision=2"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [f["id"] for f in body["features"]] == [f["id"] for f in features]
+    for feat in body["features"]:
+        assert all(round(v, 2) == v for c in coords(feat["geometry"]) for v in c)
+
+    response = app.get(
+        "/search?collections=noaa-emergency-response&limit=5&simplify=0.1"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    for feat, ref in zip(body["features"], features):
+        assert len(coords(feat["geometry"])) <= len(coords(ref["geometry"]))
+
+    response = app.post(
+        "/search?precision=1",
+        json={"collections": ["noaa-emergency-response"], "limit": 5},
+    )
+    assert response.status_code == 200
+    for feat in response.json()["features"]:
+        assert all(round(v, 1) == v for c in coords(feat["geometry"]) for v in c)
+
+    response = app.get("/search?precision=20")
+    assert response.status_code == 422
+
+    response = app.get("/search?simplify=-1")
+    assert response.status_code == 422
+
+
+def test_search_compact(app):
+    """Test /search endpoints with compact responses."""
+    response = app.get("/search?collections=noaa-emergency-response&compact=true")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["columns"] == ["collection", "id", "bbox", "datetime"]
+    assert body["numberReturned"] == 10
+    assert len(body["items"]) == 10
+    collection, item_id, bbox, dt = body["items"][0]
+    assert collection == "noaa-emergency-response"
+    assert item_id
+    assert len(bbox) == 4
+    assert dt.startswith("2020-")
+    assert "next" in [link["rel"] for link in body["links"]]
+
+    response = app.post(
+        "/search?compact=true",
+        json={"collections": ["noaa-emergency-response"], "limit": 5},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 5
+    assert all(len(row) == 4 for row in body["items"])
+
+    response = app.get("/search?compact=true&f=csv")
+    assert response.status_code == 400
+
+
+def test_batch_items(app):
+    """Test /batch/items endpoint."""
+    response = app.get("/search?collections=noaa-emergency-response&limit=3")
+    ids = [f["id"] for f in response.json()["features"]]
+
+    items = [
+        {"collection": "noaa-emergency-response", "id": ids[2]},
+        {"collection": "noaa-emergency-response", "id": "not-an-item"},
+        {"collection": "not-a-collection", "id": ids[0]},
+        {"collection": "noaa-emergency-response", "id": ids[0]},
+    ]
+    response = app.post("/batch/items", json={"items": items})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/geo+json"
+    body = response.json()
+    assert body["numberRequested"] == 4
+    assert body["numberReturned"] == 2
+    assert [f["id"] for f in body["features"]] == [ids[2], ids[0]]
+    assert body["features"][0]["links"]
+    assert body["missing"] == [
+        {"collection": "noaa-emergency-response", "id": "not-an-item", "index": 1},
+        {"collection": "not-a-collection", "id": ids[0], "index": 2},
+    ]
+
+    response = app.post("/batch/items", json={"items": []})
+    assert response.status_code == 422
+
+
+def test_search_database_error(app):
+    """PgSTAC errors are returned, not empty results."""
+    response = app.post(
+        "/search",
+        json={
+            "filter": {"op": "unknown", "args": [{"property": "id"}, "a"]},
+            "filter-lang": "cql2-json",
+        },
+    )
+    assert response.status_code == 400
+    assert "Not Supported" in response.json()["detail"]
+
+
+def test_batch_search(app):
+    """Test /batch/search endpoint."""
+    searches = [
+        {"collections": ["noaa-emergency-response"], "limit": 5},
+        {"collections": ["noaa-emergency-response"], "ids": ["not-an-item"]},
+        {"collections": ["noaa-emergency-response"], "limit": 100000},
+        {"collections": ["noaa-emergency-response"], "limit": 30},
+        {"collections": ["noaa-emergency-response"], "bbox": [0, 0]},
+        {
+            "collections": ["noaa-emergency-response"],
+            "filter": {"op": "unknown", "args": [{"property": "id"}, "a"]},
+            "filter-lang": "cql2-json",
+        },
+    ]
+    response = app.post("/batch/search", json={"searches": searches})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == 6
+
+    assert body[0]["status"] == 200
+    assert body[0]["numberReturned"] == 5
+    assert body[0]["numberMatched"] == 20
+    assert [link["rel"] for link in body[0]["links"]] == ["next"]
+    assert body[0]["links"][0]["body"]["limit"] == 5
+
+    assert body[1]["status"] == 200
+    assert body[1]["features"] == []
+
+    # errors are returned per search
+    assert body[2]["status"] == 422
+    assert "Limit" in body[2]["detail"]
+
+    assert body[3]["numberReturned"] == 20
+    assert body[3]["links"] == []
+
+    # invalid searches only fail their own result
+    assert body[4]["status"] == 422
+    assert "Invalid search" in body[4]["detail"]
+
+    # database errors only fail their own result
+    assert body[5]["status"] == 400
+    assert "Could not run search" in body[5]["detail"]
+
+    response = app.post("/batch/search", json={"searches": []})
+    assert response.status_code == 422
+
+
+def test_search_intersects_rectangle(app):
+    """Rectangle `intersects` geometries are searched as `bbox`."""
+    bbox = [-85.6, 36.0, -85.4, 36.2]
+    response = app.post(
+        "/search",
+        json={"collections": ["noaa-emergency-response"], "bbox": bbox, "limit": 50},
+    )
+    assert response.status_code == 200
+    ids = [f["id"] for f in response.json()["features"]]
+    assert ids
+
+    xmin, ymin, xmax, ymax = bbox
+    intersects = {
+        "type": "Polygon",
+        "coordinates": [
+            [[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax], [xmin, ymin]]
+        ],
+    }
+    response = app.post(
+        "/search",
+        json={
+            "collections": ["noaa-emergency-response"],
+            "intersects": intersects,
+            "limit": 50,
+        },
+    )
+    assert response.status_code == 200
+    assert [f["id"] for f in response.json()["features"]] == ids
+
+
+@pytest.fixture
+def snapshots(app, monkeypatch):
+    """Enable snapshots."""
+    monkeypatch.setattr(snapshot.snapshot_settings, "enabled", True)
+    app.portal.call(snapshot.register_snapshots, app.app)
+    yield
+    app.portal.call(snapshot.close_snapshots, app.app)
+
+
+def test_search_snapshot_disabled(app):
+    """Snapshots are disabled by default."""
+    response = app.get("/search?snapshot=true")
+    assert response.status_code == 501
+
+
+def test_search_snapshot(app, snapshots):
+    """Test /search endpoints with snapshot pagination."""
+    response = app.get("/search?collections=noaa-emergency-response&limit=30")
+    ids = [f["id"] for f in response.json()["features"]]
+    assert len(ids) == 20
+
+    response = app.get(
+        "/search?collections=noaa-emergency-response&limit=8&snapshot=true"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["numberMatched"] == 20
+    assert [f["id"] for f in body["features"]] == ids[:8]
+
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    assert "offset=snapshot%3A" in links["next"]
+
+    response = app.get(links["next"])
+    assert response.status_code == 200
+    body = response.json()
+    assert [f["id"] for f in body["features"]] == ids[8:16]
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    assert "prev" in links
+
+    response = app.get(links["next"])
+    body = response.json()
+    assert [f["id"] for f in body["features"]] == ids[16:]
+    assert "next" not in [link["rel"] for link in body["links"]]
+
+    # POST
+    response = app.post(
+        "/search?snapshot=true",
+        json={"collections": ["noaa-emergency-response"], "limit": 15},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [f["id"] for f in body["features"]] == ids[:15]
+    next_link = [link for link in body["links"] if link["rel"] == "next"][0]
+    response = app.post("/search", json=next_link["body"])
+    assert [f["id"] for f in response.json()["features"]] == ids[15:]
+
+    response = app.get(
+        "/search?offset=snapshot:0c6a8a43-6c8f-4d55-9a30-6a2d3c1c0a50:10"
+    )
+    assert response.status_code == 404
+
+    # precision/simplify are applied to snapshot pages
+    response = app.get(
+        "/search?collections=noaa-emergency-response&limit=8&snapshot=true&precision=1"
+    )
+    assert response.status_code == 200
+    coords = response.json()["features"][0]["geometry"]["coordinates"][0]
+    assert all(round(c, 1) == c for point in coords for c in point)
+
+
+def test_search_snapshot_max_items(app, snapshots, monkeypatch):
+    """Test snapshots with more matching items than `max_items`."""
+    monkeypatch.setattr(snapshot.snapshot_settings, "max_items", 10)
+
+    response = app.get(
+        "/search?collections=noaa-emergency-response&limit=8&snapshot=true"
+    )
+    body = response.json()
+    assert body["numberMatched"] == 20
+    assert len(body["features"]) == 8
+
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    response = app.get(links["next"])
+    body = response.json()
+    assert body["numberMatched"] == 20
+    assert len(body["features"]) == 2
+    assert "next" not in [link["rel"] for link in body["links"]]
+
+
+def test_search_keyset_pagination(app, monkeypatch):
+    """Test /search pagination with keyset tokens."""
+    monkeypatch.setattr(collections.search_settings, "keyset_pagination", True)
+
+    response = app.get("/search?collections=noaa-emergency-response&limit=30")
+    ids = [f["id"] for f in response.json()["features"]]
+
+    url = "/search?collections=noaa-emergency-response&limit=6"
+    pages = []
+    while url:
+        response = app.get(url)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["numberMatched"] == 20
+        pages.append(body)
+        links = {link["rel"]: link["href"] for link in body["links"]}
+        url = links.get("next")
+
+    assert len(pages) == 4
+    assert [f["id"] for page in pages for f in page["features"]] == ids
+    assert "offset=keyset%3A" in {
+        link["rel"]: link["href"] for link in pages[0]["links"]
+    }.get("next")
+
+    # previous page
+    links = {link["rel"]: link["href"] for link in pages[-1]["links"]}
+    response = app.get(links["prev"])
+    assert [f["id"] for f in response.json()["features"]] == ids[12:18]
+
+    # datetime sort
+    response = app.get(
+        "/search?collections=noaa-emergency-response&limit=15&sortby=datetime"
+    )
+    body = response.json()
+    links = {link["rel"]: link["href"] for link in body["links"]}
+    response = app.get(links["next"])
+    assert len(response.json()["features"]) == 5
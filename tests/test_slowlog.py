@@ -0,0 +1,45 @@
+"""test tipgstac.slowlog."""
+
+import json
+import logging
+
+from tipgstac import slowlog
+from tipgstac.models import ItemsSearch
+
+
+def test_log_slow_search(caplog, monkeypatch):
+    """Test log_slow_search."""
+    search = ItemsSearch(collections=["noaa-emergency-response"], limit=2)
+    fc = {
+        "features": [{"id": "a"}, {"id": "b"}],
+        "context": {"limit": 2, "matched": 10, "returned": 2},
+    }
+
+    # Disabled by default
+    with caplog.at_level(logging.WARNING, logger="tipgstac.slow_search"):
+        slowlog.log_slow_search(None, search=search, duration=100, fc=fc)
+    assert not caplog.records
+
+    monkeypatch.setattr(slowlog.search_settings, "slow_threshold", 1.0)
+    with caplog.at_level(logging.WARNING, logger="tipgstac.slow_search"):
+        slowlog.log_slow_search(None, search=search, duration=0.5, fc=fc)
+        assert not caplog.records
+
+        slowlog.log_slow_search(None, search=search, duration=1.5, fc=fc)
+
+    assert len(caplog.records) == 1
+    log = json.loads(caplog.records[0].getMessage())
+    assert log["search"] == {"collections": ["noaa-emergency-response"], "limit": 2}
+    assert log["duration"] == 1.5
+    assert log["returned"] == 2
+    assert log["matched"] == 10
+    assert log["collections"] == ["noaa-emergency-response"]
+
+    # Failed search
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="tipgstac.slow_search"):
+        slowlog.log_slow_search(None, search=search, duration=2, fc={})
+
+    log = json.loads(caplog.records[0].getMessage())
+    assert log["returned"] == 0
+    assert log["matched"] is None
@@ -0,0 +1,46 @@
+"""test tipgstac.snapshot."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from tipgstac.models import ItemsSearch
+from tipgstac.snapshot import (
+    is_snapshot_token,
+    parse_snapshot_token,
+    snapshot_search,
+    snapshot_settings,
+    snapshot_token,
+)
+
+
+def test_snapshot_token():
+    """Test snapshot tokens."""
+    snapshot = "0c6a8a43-6c8f-4d55-9a30-6a2d3c1c0a50"
+    token = snapshot_token(snapshot, 20)
+    assert is_snapshot_token(token)
+    assert parse_snapshot_token(token) == (snapshot, 20)
+
+    assert not is_snapshot_token(None)
+    assert not is_snapshot_token(
+        "next:noaa-emergency-response:20200307aC0852700w360900"
+    )
+
+    with pytest.raises(HTTPException):
+        parse_snapshot_token("snapshot:not-a-uuid:0")
+
+    with pytest.raises(HTTPException):
+        parse_snapshot_token(f"snapshot:{snapshot}:a")
+
+
+def test_snapshot_disabled(monkeypatch):
+    """Snapshot tokens return a 501 error when snapshots are disabled."""
+    monkeypatch.setattr(snapshot_settings, "enabled", False)
+    search = ItemsSearch(
+        token=snapshot_token("0c6a8a43-6c8f-4d55-9a30-6a2d3c1c0a50", 10)
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(snapshot_search(None, search=search))  # type: ignore
+
+    assert excinfo.value.status_code == 501
@@ -0,0 +1,50 @@
+"""test Tiles endpoints."""
+
+
+def test_tilesets(app):
+    """Test /collections/{collectionId}/tiles endpoint."""
+    response = app.get("/collections/noaa-emergency-response/tiles")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["tilesets"]
+
+    response = app.get("/collections/noaa-emergency-response/tiles/WebMercatorQuad")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["boundingBox"]["lowerLeft"] == [-180, -90]
+
+
+def test_tile(app):
+    """Test /collections/{collectionId}/tiles/{z}/{x}/{y} endpoint."""
+    response = app.get("/collections/noaa-emergency-response/tiles/8/67/100")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert len(response.content) > 0
+
+    response = app.get(
+        "/collections/noaa-emergency-response/tiles/WebMercatorQuad/8/67/100?properties=event"
+    )
+    assert response.status_code == 200
+    assert len(response.content) > 0
+
+    # No items in the tile
+    response = app.get("/collections/noaa-emergency-response/tiles/8/0/0")
+    assert response.status_code == 200
+    assert len(response.content) == 0
+
+    # No items matching the filter
+    response = app.get(
+        "/collections/noaa-emergency-response/tiles/8/67/100?datetime=2010-01-01T00:00:00Z"
+    )
+    assert response.status_code == 200
+    assert len(response.content) == 0
+
+    response = app.get(
+        "/collections/noaa-emergency-response/tiles/8/67/100?limit=100000"
+    )
+    assert response.status_code == 422
+
+    response = app.get("/collections/noaa-emergency-response/tilejson.json")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["tiles"][0].endswith("/tiles/WebMercatorQuad/{z}/{x}/{y}")
@@ -0,0 +1,57 @@
+"""test tipgstac.timing."""
+
+import logging
+
+from fastapi import Depends, FastAPI
+from starlette.testclient import TestClient
+
+from tipgstac.timing import ServerTimingMiddleware, server_timing, timed, timer
+
+
+@timed("dependency")
+def dependency() -> str:
+    """Timed dependency."""
+    return "value"
+
+
+def test_timer_disabled():
+    """Timers are no-op outside of the middleware."""
+    with timer("phase"):
+        pass
+
+    assert dependency() == "value"
+
+
+def test_server_timing():
+    """Test server_timing."""
+    assert server_timing({"db": 1.234, "app": 10}) == "db;dur=1.23, app;dur=10.00"
+
+
+def test_server_timing_middleware(caplog):
+    """Test ServerTimingMiddleware."""
+    app = FastAPI()
+
+    @app.get("/")
+    async def route(value: str = Depends(dependency)):
+        with timer("db-query"):
+            pass
+
+        with timer("db-query"):
+            pass
+
+        return {"value": value}
+
+    app.add_middleware(ServerTimingMiddleware)
+
+    with caplog.at_level(logging.INFO, logger="tipgstac.access"):
+        response = TestClient(app).get("/?a=1")
+
+    assert response.status_code == 200
+    assert response.json() == {"value": "value"}
+    phases = [p.split(";")[0] for p in response.headers["server-timing"].split(", ")]
+    assert phases == ["dependency", "db-query", "app"]
+
+    record = [r for r in caplog.records if r.name == "tipgstac.access"][0]
+    assert '"path":"/"' in record.getMessage()
+    assert '"query":"a=1"' in record.getMessage()
+    assert '"status":200' in record.getMessage()
@@ -0,0 +1,161 @@
+"""test tipgstac.tracing."""
+
+import json
+
+import pytest
+from fastapi import Depends, FastAPI
+from starlette.testclient import TestClient
+
+from tipgstac.settings import TracingSettings
+from tipgstac.timing import timed, timer
+from tipgstac.tracing import (
+    FileExporter,
+    InMemoryExporter,
+    TracingMiddleware,
+    load_exporter,
+    parse_traceparent,
+    span,
+)
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@timed("dependency")
+def dependency() -> str:
+    """Timed dependency."""
+    return "value"
+
+
+def create_app(exporter, sample_rate: float = 1.0) -> FastAPI:
+    """Create traced app."""
+    app = FastAPI()
+
+    @app.get("/items/{itemId}")
+    async def route(itemId: str, value: str = Depends(dependency)):
+        with timer("db-query", function="pgstac.get_item"):
+            pass
+
+        if itemId == "error":
+            with span("failing"):
+                raise ValueError("failed")
+
+        return {"value": value}
+
+    app.add_middleware(TracingMiddleware, exporter=exporter, sample_rate=sample_rate)
+    return app
+
+
+def test_span_disabled():
+    """Spans are no-op outside of the middleware."""
+    with span("phase") as s:
+        assert s is None
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (TRACEPARENT, ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)),
+        (
+            TRACEPARENT[:-2] + "00",
+            ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", False),
+        ),
+        (None, None),
+        ("invalid", None),
+        ("00-00000000000000000000000000000000-00f067aa0ba902b7-01", None),
+        ("00-4bf92f3577b34da6a3ce929d0e0e4736-0000000000000000-01", None),
+        ("ff" + TRACEPARENT[2:], None),
+    ],
+)
+def test_parse_traceparent(value, expected):
+    """Test parse_traceparent."""
+    assert parse_traceparent(value) == expected
+
+
+def test_tracing_middleware():
+    """Test TracingMiddleware."""
+    exporter = InMemoryExporter()
+    client = TestClient(create_app(exporter))
+
+    response = client.get("/items/1", headers={"traceparent": TRACEPARENT})
+    assert response.status_code == 200
+
+    root, *children = exporter.spans
+    assert root.name == "GET /items/{itemId}"
+    assert root.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert root.parent_id == "00f067aa0ba902b7"
+    assert root.attributes["http.status_code"] == 200
+    assert root.attributes["http.target"] == "/items/1"
+    assert response.headers["traceresponse"] == (
+        f"00-4bf92f3577b34da6a3ce929d0e0e4736-{root.span_id}-01"
+    )
+
+    assert [s.name for s in children] == ["dependency", "db-query"]
+    assert all(s.trace_id == root.trace_id for s in children)
+    assert all(s.parent_id == root.span_id for s in children)
+    assert children[1].attributes == {"function": "pgstac.get_item"}
+    assert all(s.end_time >= s.start_time for s in exporter.spans)
+
+    # New trace
+    exporter.clear()
+    response = client.get("/items/1")
+    assert exporter.spans[0].trace_id != "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert exporter.spans[0].parent_id is None
+
+    # Not sampled by the caller
+    exporter.clear()
+    response = client.get("/items/1", headers={"traceparent": TRACEPARENT[:-2] + "00"})
+    assert response.status_code == 200
+    assert "traceresponse" not in response.headers
+    assert not exporter.spans
+
+    # Errors
+    with pytest.raises(ValueError):
+        client.get("/items/error")
+
+    failing = [s for s in exporter.spans if s.name == "failing"][0]
+    assert failing.status == "error"
+    assert "failed" in failing.attributes["exception"]
+    assert exporter.spans[0].status == "error"
+
+
+def test_tracing_sample_rate():
+    """Requests without traceparent are sampled."""
+    exporter = InMemoryExporter()
+    client = TestClient(create_app(exporter, sample_rate=0))
+
+    assert client.get("/items/1").status_code == 200
+    assert not exporter.spans
+
+    assert client.get("/items/1", headers={"traceparent": TRACEPARENT})
+    assert exporter.spans
+
+
+def test_file_exporter(tmp_path):
+    """Test FileExporter."""
+    path = str(tmp_path / "traces.jsonl")
+    exporter = load_exporter(TracingSettings(exporter="file", file=path))
+    assert isinstance(exporter, FileExporter)
+
+    client = TestClient(create_app(exporter))
+    client.get("/items/1")
+    client.get("/items/2")
+    exporter.flush()
+
+    with open(path) as f:
+        spans = [json.loads(line) for line in f]
+
+    assert len(spans) == 6
+    assert spans[0]["service"] == "tipgstac"
+    assert spans[0]["name"] == "GET /items/{itemId}"
+    assert spans[1]["parent_id"] == spans[0]["span_id"]
+
+
+def test_load_exporter():
+    """Test load_exporter."""
+    assert isinstance(
+        load_exporter(TracingSettings(exporter="memory")), InMemoryExporter
+    )
+    assert isinstance(
+        load_exporter(TracingSettings(exporter="tipgstac.tracing:InMemoryExporter")),
+        InMemoryExporter,
+    )
@@ -0,0 +1,215 @@
+"""tipgstac.aggregation: STAC Aggregations computed in the database.
+
+ref: https://github.com/stac-api-extensions/aggregation
+
+Each aggregation runs as a single SQL aggregate over the PgSTAC items matching the
+search, using the WHERE clause generated by `pgstac.stac_search_to_where`.
+
+"""
+
+from typing import Any, Dict, List, Optional
+
+from buildpg import asyncpg
+from fastapi import HTTPException
+
+from tipgstac.collections import pgstac_where
+from tipgstac.models import Aggregation, AggregationSearch, CoverageSearch
+
+
+async def property_expression(
+    conn: asyncpg.BuildPgConnection,
+    prop: str,
+    wrapper: Optional[str] = None,
+) -> str:
+    """Return the SQL expression PgSTAC uses for a queryable.
+
+    `wrapper` (e.g `to_float`) overrides the queryable's own JSON wrapper function.
+
+    """
+    row = await conn.fetchrow(
+        "SELECT path, expression, wrapper FROM pgstac.queryable($1);", prop
+    )
+    # `id`, `datetime`, `end_datetime`, `collection` and `geometry` are columns
+    if wrapper and row["wrapper"]:
+        return f"{wrapper}({row['path']})"
+
+    return row["expression"]
+
+
+def _bucket(key: Any, frequency: int, **kwargs: Any) -> Dict:
+    return {
+        "key": key,
+        "data_type": "frequency_distribution",
+        "frequency": frequency,
+        **kwargs,
+    }
+
+
+async def _aggregate(  # noqa: C901
+    conn: asyncpg.BuildPgConnection,
+    aggregation: Aggregation,
+    where: str,
+) -> Dict:
+    """Run one aggregation."""
+    if aggregation.type == "total_count":
+        value = await conn.fetchval(f"SELECT count(*) FROM items WHERE {where};")
+        return {"name": aggregation.name, "data_type": "integer", "value": value}
+
+    if aggregation.type == "datetime_frequency":
+        expr = "datetime"
+        if aggregation.property:
+            expr = await property_expression(
+                conn, aggregation.property, wrapper="to_tstz"
+            )
+
+        rows = await conn.fetch(
+            f"""
+            SELECT date_trunc($1, ({expr}) AT TIME ZONE 'UTC') AS key, count(*)
+            FROM items
+            WHERE {where}
+            GROUP BY 1
+            ORDER BY 1;
+            """,
+            aggregation.interval,
+        )
+        buckets = [
+            _bucket(r["key"].isoformat() + "Z", r["count"])
+            for r in rows
+            if r["key"] is not None
+        ]
+
+    elif aggregation.type == "numeric_range":
+        expr = await property_expression(
+            conn, aggregation.property, wrapper="to_float"  # type: ignore
+        )
+
+        counts: List[str] = []
+        params: List[float] = []
+        for start, end in aggregation.ranges:  # type: ignore
+            conditions = [f"({expr}) IS NOT NULL"]
+            if start is not None:
+                params.append(start)
+                conditions.append(f"({expr}) >= ${len(params)}")
+            if end is not None:
+                params.append(end)
+                conditions.append(f"({expr}) < ${len(params)}")
+
+            counts.append(f"count(*) FILTER (WHERE {' AND '.join(conditions)})")
+
+        row = await conn.fetchrow(
+            f"SELECT {', '.join(counts)} FROM items WHERE {where};", *params
+        )
+        buckets = [
+            _bucket(
+                f"{'*' if start is None else start}-{'*' if end is None else end}",
+                count,
+                **{"from": start, "to": end},
+            )
+            for (start, end), count in zip(aggregation.ranges, row)  # type: ignore
+        ]
+
+    elif aggregation.type == "term_frequency":
+        expr = await property_expression(conn, aggregation.property)  # type: ignore
+        rows = await conn.fetch(
+            f"""
+            SELECT ({expr}) AS key, count(*)
+            FROM items
+            WHERE {where}
+            GROUP BY 1
+            ORDER BY 2 DESC, 1
+            LIMIT $1;
+            """,
+            aggregation.limit,
+        )
+        buckets = [_bucket(r["key"], r["count"]) for r in rows]
+
+    elif aggregation.type == "geohash_frequency":
+        rows = await conn.fetch(
+            f"""
+            SELECT ST_GeoHash(ST_Centroid(geometry), $1) AS key, count(*)
+            FROM items
+            WHERE {where}
+            GROUP BY 1
+            ORDER BY 1;
+            """,
+            aggregation.precision,
+        )
+        buckets = [_bucket(r["key"], r["count"]) for r in rows]
+
+    elif aggregation.type == "grid_frequency":
+        rows = await conn.fetch(
+            f"""
+            WITH t AS (SELECT ST_Centroid(geometry) AS c FROM items WHERE {where})
+            SELECT
+                floor(ST_X(c) / $1) * $1 AS x,
+                floor(ST_Y(c) / $1) * $1 AS y,
+                count(*)
+            FROM t
+            GROUP BY 1, 2
+            ORDER BY 1, 2;
+            """,
+            aggregation.resolution,
+        )
+        buckets = [_bucket([r["x"], r["y"]], r["count"]) for r in rows]
+
+    return {
+        "name": aggregation.name,
+        "data_type": "frequency_distribution",
+        "buckets": buckets,
+    }
+
+
+async def pgstac_aggregate(
+    pool: asyncpg.BuildPgPool,
+    *,
+    search: AggregationSearch,
+) -> List[Dict]:
+    """Run the aggregations of a search."""
+    async with pool.acquire() as conn:
+        try:
+            where = await pgstac_where(conn, search)
+            return [
+                await _aggregate(conn, aggregation, where)
+                for aggregation in search.aggregations
+            ]
+
+        except asyncpg.PostgresError as e:
+            raise HTTPException(
+                status_code=400, detail=f"Could not compute aggregations: {e}"
+            ) from e
+
+
+async def pgstac_coverage(
+    pool: asyncpg.BuildPgPool,
+    *,
+    search: CoverageSearch,
+) -> Dict:
+    """Return the union of the footprints of the items matching a search."""
+    # NOTE: the WHERE clause can contain `:` so we can't use buildpg's render
+    params: List[Any] = [search.precision]
+    geom = "ST_Union(geometry)"
+    if search.simplify:
+        params.append(search.simplify)
+        geom = f"ST_SimplifyPreserveTopology({geom}, $2::float)"
+
+    async with pool.acquire() as conn:
+        try:
+            where = await pgstac_where(conn, search)
+            matched, geometry = await conn.fetchrow(
+                f"""
+                SELECT count(*), ST_AsGeoJSON({geom}, $1::int)::json
+                FROM items WHERE {where};
+                """,
+                *params,
+            )
+
+        except asyncpg.PostgresError as e:
+            raise HTTPException(
+                status_code=400, detail=f"Could not compute coverage: {e}"
+            ) from e
+
+    return {
+        "type": "Feature",
+        "geometry": geometry,
+        "properties": {"numberMatched": matched},
+    }
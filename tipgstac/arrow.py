@@ -0,0 +1,175 @@
+"""tipgstac.arrow: Arrow IPC stream and GeoParquet outputs.
+
+Requires `pyarrow` (`pip install tipgstac[arrow]`).
+
+"""
+
+import functools
+import importlib.util
+import json
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+
+from tipgstac.export import CONVERTERS, Field, property_values, schema_fields, wkb
+
+if TYPE_CHECKING:  # pragma: nocover
+    import pyarrow as pa
+
+# `pyarrow` is slow to import (~100ms), so it is only imported by the first Arrow
+# or GeoParquet output (see `_pyarrow`).
+available = importlib.util.find_spec("pyarrow") is not None
+
+
+GEOPARQUET_VERSION = "1.0.0"
+
+
+@functools.lru_cache(maxsize=None)
+def _pyarrow() -> Tuple:
+    """Import `pyarrow` and `pyarrow.parquet`."""
+    import pyarrow
+    import pyarrow.parquet
+
+    return pyarrow, pyarrow.parquet
+
+
+def _arrow_type(dtype: str):
+    pa, _ = _pyarrow()
+    return {
+        "number": pa.float64(),
+        "integer": pa.int64(),
+        "boolean": pa.bool_(),
+        "datetime": pa.timestamp("us", tz="UTC"),
+    }.get(dtype, pa.string())
+
+
+def arrow_schema(fields: List[Field], geoparquet: bool = False) -> "pa.Schema":
+    """Create Arrow schema (`id`, `collection`, `geometry` as WKB, properties)."""
+    assert available, "`pyarrow` must be installed to create Arrow outputs"
+    pa, _ = _pyarrow()
+
+    geometry = pa.field(
+        "geometry",
+        pa.binary(),
+        metadata={"ARROW:extension:name": "geoarrow.wkb"},
+    )
+    schema = pa.schema(
+        [
+            pa.field("id", pa.string()),
+            pa.field("collection", pa.string()),
+            geometry,
+            *[pa.field(f.name, _arrow_type(f.type)) for f in fields],
+        ]
+    )
+
+    if geoparquet:
+        metadata = {
+            "version": GEOPARQUET_VERSION,
+            "primary_column": "geometry",
+            "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+        }
+        schema = schema.with_metadata({"geo": json.dumps(metadata)})
+
+    return schema
+
+
+def record_batch(
+    items: List[Dict], fields: List[Field], schema: "pa.Schema"
+) -> "pa.RecordBatch":
+    """Convert a page of items to an Arrow RecordBatch."""
+    pa, _ = _pyarrow()
+    rows = [property_values(item, fields) for item in items]
+
+    columns = [
+        pa.array([item.get("id") for item in items], pa.string()),
+        pa.array([item.get("collection") for item in items], pa.string()),
+        pa.array([wkb(item.get("geometry")) for item in items], pa.binary()),
+    ]
+    for i, field in enumerate(fields):
+        convert = CONVERTERS[field.type]
+        columns.append(
+            pa.array(
+                [convert(row[i]) for row in rows],
+                schema.field(field.name).type,
+            )
+        )
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class ChunkSink:
+    """Writable file object keeping the written bytes until `pop()`."""
+
+    closed = False
+
+    def __init__(self):
+        """Create empty sink."""
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def write(self, data) -> int:
+        """Keep written bytes."""
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """Return current position."""
+        return self.position
+
+    def flush(self):
+        """Nothing to flush."""
+
+    def close(self):
+        """Close the sink."""
+        self.closed = True
+
+    def pop(self) -> bytes:
+        """Return and forget the bytes written since last call."""
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _writer(sink: ChunkSink, schema: "pa.Schema", geoparquet: bool):
+    pa, pq = _pyarrow()
+    if geoparquet:
+        return pq.ParquetWriter(sink, schema)
+
+    return pa.ipc.new_stream(sink, schema)
+
+
+async def stream_arrow(
+    pages: AsyncIterator[List[Dict]],
+    queryables: Optional[Dict] = None,
+    properties: Optional[List[str]] = None,
+    geoparquet: bool = False,
+) -> AsyncIterator[bytes]:
+    """Encode pages of items to an Arrow IPC stream or a GeoParquet file.
+
+    The schema is fixed from the queryables and the first page, then each page is
+    written as one record batch (or Parquet row group) and sent to the client.
+
+    """
+    sink = ChunkSink()
+    writer = None
+    fields: List[Field] = []
+    schema = None
+
+    async for items in pages:
+        if writer is None:
+            fields = schema_fields(queryables, items, properties)
+            schema = arrow_schema(fields, geoparquet=geoparquet)
+            writer = _writer(sink, schema, geoparquet)
+
+        writer.write_batch(record_batch(items, fields, schema))
+        if data := sink.pop():
+            yield data
+
+    # Empty output
+    if writer is None:
+        fields = schema_fields(queryables, [], properties)
+        schema = arrow_schema(fields, geoparquet=geoparquet)
+        writer = _writer(sink, schema, geoparquet)
+
+    writer.close()
+    yield sink.pop()
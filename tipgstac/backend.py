@@ -0,0 +1,460 @@
+"""tipgstac.backend: PgSTAC functions backends.
+
+`pgstac_search`, `CollectionParams`, `CollectionsParams` and `search_queryables` call
+the PgSTAC functions through a `Backend`. The application `pool` (`app.state.pool`)
+is wrapped in a `PgSTACBackend`, unless it already is a `Backend`.
+
+`MemoryBackend` serves in-memory collections and items, with an optional latency,
+to measure the Python layer (or simulate a slow database) without PostgreSQL:
+
+    app.state.pool = MemoryBackend(collections=collections, items=items, latency=0.01)
+
+Endpoints running their own SQL (aggregations, coverage, tiles, snapshots and batch
+items) need a database connection and return a `501` error with a `MemoryBackend`.
+
+"""
+
+import abc
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import orjson
+from buildpg import asyncpg, render
+from fastapi import HTTPException
+
+from tipgstac.metrics import search_metrics
+from tipgstac.models import CollectionsSearch, ItemsSearch
+from tipgstac.slowlog import log_slow_search
+from tipgstac.timing import acquire, timer
+
+SEARCH_QUERY = """
+    SELECT * FROM pgstac.search(:req::text::jsonb);
+"""
+
+# Apply precision/simplification to the items geometry
+GEOMETRY_SEARCH_QUERY = """
+    WITH s AS (
+        SELECT pgstac.search(:req::text::jsonb) AS fc
+    )
+    SELECT
+        s.fc || jsonb_build_object('features', COALESCE((
+            SELECT jsonb_agg(
+                CASE WHEN jsonb_typeof(f->'geometry') = 'object' THEN
+                    f || jsonb_build_object(
+                        'geometry',
+                        ST_AsGeoJSON(
+                            CASE WHEN :simplify::float > 0 THEN
+                                ST_SimplifyPreserveTopology(
+                                    ST_GeomFromGeoJSON(f->'geometry'),
+                                    :simplify::float
+                                )
+                            ELSE ST_GeomFromGeoJSON(f->'geometry') END,
+                            :precision::int
+                        )::jsonb
+                    )
+                ELSE f END
+                ORDER BY n
+            )
+            FROM jsonb_array_elements(s.fc->'features') WITH ORDINALITY AS t(f, n)
+        ), '[]'::jsonb))
+    FROM s;
+"""
+
+
+class Backend(metaclass=abc.ABCMeta):
+    """PgSTAC functions."""
+
+    @abc.abstractmethod
+    async def search(
+        self,
+        search: ItemsSearch,
+        precision: Optional[int] = None,
+        simplify: Optional[float] = None,
+    ) -> Dict:
+        """`pgstac.search`: return an items FeatureCollection."""
+        ...
+
+    @abc.abstractmethod
+    async def collection(self, collection_id: str) -> Optional[Dict]:
+        """`pgstac.get_collection`: return a collection with its `queryables`."""
+        ...
+
+    @abc.abstractmethod
+    async def collection_search(self, search: CollectionsSearch) -> Dict:
+        """`pgstac.collection_search`: return `collections` and `context`."""
+        ...
+
+    @abc.abstractmethod
+    async def queryables(self, collections: Optional[List[str]] = None) -> Dict:
+        """`pgstac.get_queryables`: return the queryables JSON schema."""
+        ...
+
+    @abc.abstractmethod
+    async def all_collections(self) -> List[Dict]:
+        """`pgstac.all_collections`: return all the collections."""
+        ...
+
+    async def get_setting_bool(self, name: str) -> bool:
+        """`pgstac.get_setting_bool`: return a PgSTAC boolean setting."""
+        return False
+
+
+class PgSTACBackend(Backend):
+    """PgSTAC database backend."""
+
+    def __init__(self, pool: asyncpg.BuildPgPool) -> None:
+        """Init backend."""
+        self.pool = pool
+
+    async def search(
+        self,
+        search: ItemsSearch,
+        precision: Optional[int] = None,
+        simplify: Optional[float] = None,
+    ) -> Dict:
+        """`pgstac.search`: return an items FeatureCollection."""
+        query = SEARCH_QUERY
+        if precision is not None or simplify:
+            query = GEOMETRY_SEARCH_QUERY
+
+        async with acquire(self.pool) as conn:
+            q, p = render(
+                query,
+                req=search.model_dump_json(exclude_none=True, by_alias=True),
+                precision=9 if precision is None else precision,
+                simplify=simplify or 0,
+            )
+            start = time.perf_counter()
+            with timer("db-query", function="pgstac.search"), search_metrics():
+                fc = await conn.fetchval(q, *p)
+
+        log_slow_search(
+            self.pool, search=search, duration=time.perf_counter() - start, fc=fc
+        )
+
+        return fc
+
+    async def collection(self, collection_id: str) -> Optional[Dict]:
+        """`pgstac.get_collection`: return a collection with its `queryables`."""
+        async with acquire(self.pool) as conn:
+            q, p = render(
+                """
+                WITH t AS (
+                    SELECT
+                        *
+                    FROM
+                        pgstac.get_collection(:id::text) c,
+                        pgstac.get_queryables(:id::text) q
+                )
+                SELECT
+                    COALESCE(c || jsonb_build_object('queryables', q))
+                FROM t;
+                """,
+                id=collection_id,
+            )
+            with timer("db-query", function="pgstac.get_collection"):
+                return await conn.fetchval(q, *p)
+
+    async def collection_search(self, search: CollectionsSearch) -> Dict:
+        """`pgstac.collection_search`: return `collections` and `context`."""
+        async with acquire(self.pool) as conn:
+            q, p = render(
+                """
+                SELECT * FROM pgstac.collection_search(:req::text::jsonb);
+                """,
+                req=search.model_dump_json(exclude_none=True, by_alias=True),
+            )
+            with timer("db-query", function="pgstac.collection_search"):
+                return await conn.fetchval(q, *p)
+
+    async def queryables(self, collections: Optional[List[str]] = None) -> Dict:
+        """`pgstac.get_queryables`: return the queryables JSON schema."""
+        async with acquire(self.pool) as conn:
+            q, p = render(
+                """
+                SELECT pgstac.get_queryables(:collections::text[]);
+                """,
+                collections=collections,
+            )
+            with timer("db-query", function="pgstac.get_queryables"):
+                return await conn.fetchval(q, *p)
+
+    async def all_collections(self) -> List[Dict]:
+        """`pgstac.all_collections`: return all the collections."""
+        async with acquire(self.pool) as conn:
+            with timer("db-query", function="pgstac.all_collections"):
+                return await conn.fetchval("SELECT * FROM pgstac.all_collections();")
+
+    async def get_setting_bool(self, name: str) -> bool:
+        """`pgstac.get_setting_bool`: return a PgSTAC boolean setting."""
+        async with acquire(self.pool) as conn:
+            try:
+                return bool(
+                    await conn.fetchval("SELECT pgstac.get_setting_bool($1);", name)
+                )
+            except asyncpg.PostgresError:
+                return False
+
+
+def get_backend(pool: Union[asyncpg.BuildPgPool, Backend]) -> Backend:
+    """Return the backend of an application `pool`."""
+    if isinstance(pool, Backend):
+        return pool
+
+    return PgSTACBackend(pool)
+
+
+DEFAULT_QUERYABLES = {
+    "$schema": "https://json-schema.org/draft/2019-09/schema",
+    "type": "object",
+    "properties": {
+        "id": {"title": "Item ID", "type": "string"},
+        "collection": {"title": "Collection ID", "type": "string"},
+        "datetime": {"title": "Acquired", "type": "string", "format": "date-time"},
+        "geometry": {
+            "title": "Item Geometry",
+            "$ref": "https://geojson.org/schema/Feature.json",
+        },
+    },
+    "additionalProperties": True,
+}
+
+DEFAULT_SORTBY = [
+    {"field": "datetime", "direction": "desc"},
+    {"field": "id", "direction": "desc"},
+]
+
+
+def _value(item: Dict, name: str) -> Any:
+    if name in ["id", "collection"]:
+        return item.get(name)
+
+    if name.startswith("properties."):
+        name = name[len("properties.") :]
+
+    return (item.get("properties") or {}).get(name)
+
+
+def _sort_key(name: str) -> Callable[[Dict], Tuple[bool, Any]]:
+    def key(item: Dict) -> Tuple[bool, Any]:
+        value = _value(item, name)
+        return (False, "") if value is None else (True, value)
+
+    return key
+
+
+def _literal(item: Dict, arg: Any) -> Any:
+    if isinstance(arg, dict):
+        if "property" in arg:
+            return _value(item, arg["property"])
+
+        if "timestamp" in arg:
+            return arg["timestamp"]
+
+        if "date" in arg:
+            return arg["date"]
+
+    return arg
+
+
+COMPARISONS = {
+    "=": lambda a, b: a == b,
+    "eq": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+    "neq": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "lt": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    "lte": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "gt": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def cql2_match(item: Dict, expr: Dict) -> bool:
+    """Evaluate simple CQL2-JSON expressions (logical and comparison operators)."""
+    op, args = expr["op"].lower(), expr.get("args", [])
+    if op == "and":
+        return all(cql2_match(item, arg) for arg in args)
+
+    if op == "or":
+        return any(cql2_match(item, arg) for arg in args)
+
+    if op == "not":
+        return not cql2_match(item, args[0])
+
+    if op == "isnull":
+        return _literal(item, args[0]) is None
+
+    if op not in COMPARISONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported CQL2 operator: {op}.")
+
+    left, right = (_literal(item, arg) for arg in args)
+    if left is None or right is None:
+        return False
+
+    try:
+        return COMPARISONS[op](left, right)
+    except TypeError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid CQL2 comparison: {e}."
+        ) from e
+
+
+def _bbox_intersects(item: Dict, bbox: Sequence[float]) -> bool:
+    ibbox = item.get("bbox")
+    if not ibbox:
+        return False
+
+    half = len(bbox) // 2
+    ihalf = len(ibbox) // 2
+    return not (
+        ibbox[0] > bbox[half]
+        or ibbox[ihalf] < bbox[0]
+        or ibbox[1] > bbox[half + 1]
+        or ibbox[ihalf + 1] < bbox[1]
+    )
+
+
+class MemoryBackend(Backend):
+    """In-memory backend.
+
+    Searches support `collections`, `ids`, `bbox`, simple CQL2-JSON `filter`
+    (logical and comparison operators, other operators return a `400` error),
+    `sortby` and `limit`/`token` pagination. Other search parameters (e.g
+    `intersects` or `datetime`), `precision` and `simplify` are ignored.
+
+    There is no database connection: `acquire` raises a `501` error.
+
+    """
+
+    def __init__(
+        self,
+        collections: Sequence[Dict] = (),
+        items: Sequence[Dict] = (),
+        latency: float = 0.0,
+        queryables: Optional[Dict] = None,
+    ) -> None:
+        """Init backend.
+
+        `latency` (in seconds) is added to each call.
+
+        """
+        self.collections = {c["id"]: c for c in collections}
+        self.items = list(items)
+        self.latency = latency
+        self._queryables = queryables or DEFAULT_QUERYABLES
+
+    async def _wait(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def search(
+        self,
+        search: ItemsSearch,
+        precision: Optional[int] = None,
+        simplify: Optional[float] = None,
+    ) -> Dict:
+        """Search items."""
+        await self._wait()
+
+        with timer("db-query", function="pgstac.search"):
+            items = self.items
+            if search.collections:
+                collections = set(search.collections)
+                items = [i for i in items if i.get("collection") in collections]
+
+            if search.ids:
+                ids = set(search.ids)
+                items = [i for i in items if i.get("id") in ids]
+
+            if search.bbox:
+                items = [i for i in items if _bbox_intersects(i, search.bbox)]
+
+            if search.filter:
+                items = [i for i in items if cql2_match(i, search.filter)]
+
+            for sort in reversed(search.sortby or DEFAULT_SORTBY):
+                items = sorted(
+                    items,
+                    key=_sort_key(sort["field"]),
+                    reverse=sort.get("direction", "asc") == "desc",
+                )
+
+            offset = 0
+            if search.token:
+                try:
+                    offset = max(int(search.token.split(":", 1)[1]), 0)
+
+                except (IndexError, ValueError) as e:
+                    raise HTTPException(
+                        status_code=400, detail=f"Invalid token: {search.token}."
+                    ) from e
+
+            limit = search.limit or 10
+            features = items[offset : offset + limit]
+
+        # items are decoded for each request, as they would be from the database
+        with timer("json-decode"):
+            features = orjson.loads(orjson.dumps(features))
+
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "next": f"next:{offset + limit}" if offset + limit < len(items) else None,
+            "prev": f"prev:{max(offset - limit, 0)}" if offset else None,
+            "context": {
+                "limit": limit,
+                "matched": len(items),
+                "returned": len(features),
+            },
+        }
+
+    async def collection(self, collection_id: str) -> Optional[Dict]:
+        """Return a collection with its `queryables`."""
+        await self._wait()
+
+        if collection := self.collections.get(collection_id):
+            return {**collection, "queryables": self._queryables}
+
+        return None
+
+    async def collection_search(self, search: CollectionsSearch) -> Dict:
+        """Search collections (`ids`, `limit` and `offset`)."""
+        await self._wait()
+
+        collections = list(self.collections.values())
+        if search.ids:
+            collections = [c for c in collections if c["id"] in search.ids]
+
+        offset = search.offset or 0
+        limit = search.limit or 10
+        page = collections[offset : offset + limit]
+        return {
+            "collections": page,
+            "context": {
+                "limit": limit,
+                "matched": len(collections),
+                "returned": len(page),
+            },
+        }
+
+    async def queryables(self, collections: Optional[List[str]] = None) -> Dict:
+        """Return the queryables JSON schema."""
+        await self._wait()
+        return self._queryables
+
+    async def all_collections(self) -> List[Dict]:
+        """Return all the collections."""
+        await self._wait()
+        return list(self.collections.values())
+
+    def acquire(self):
+        """Endpoints running their own SQL are not supported."""
+        raise HTTPException(
+            status_code=501,
+            detail="This endpoint requires a PgSTAC database (not supported by the in-memory backend).",
+        )
@@ -3,67 +3,284 @@
 PgSTACCollection and PgSTACCatalog are custom class extending tipg.Collection and tipg.Catalog classes.
 
 """
+import asyncio
 import datetime
 import json
 import re
-from typing import Any, Dict, List, Optional, TypedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypedDict, Union
 from urllib.parse import unquote_plus
 
 from buildpg import asyncpg, render
 from ciso8601 import parse_rfc3339
-from fastapi import HTTPException
-from pydantic import Field
+from fastapi import FastAPI, HTTPException
+from morecantile import Tile, TileMatrixSet
+from pydantic import Field, ValidationError
 from pygeofilter.ast import AstType
 from pygeofilter.backends.cql2_json import to_cql2
 
 from tipg.collections import Collection, Column, ItemList, Parameter
 from tipg.errors import InvalidDatetime, InvalidLimit
 from tipg.model import Extent
-from tipg.settings import FeaturesSettings
+from tipg.settings import FeaturesSettings, MVTSettings
+from tipgstac.backend import PgSTACBackend, get_backend
+from tipgstac.index import ExtentIndex
+from tipgstac.intersects import preprocess_intersects
+from tipgstac.keyset import keyset_page, keyset_search, keyset_sortby
 from tipgstac.models import ItemsSearch
+from tipgstac.settings import BatchSettings, CatalogSettings, SearchSettings
+from tipgstac.snapshot import is_snapshot_token, snapshot_search
+from tipgstac.timing import acquire, timer
 
 features_settings = FeaturesSettings()
+mvt_settings = MVTSettings()
+catalog_settings = CatalogSettings()
+batch_settings = BatchSettings()
+search_settings = SearchSettings()
+
+
+def geometry_bounds(geometry: Dict) -> List[float]:
+    """Return the bounds of a GeoJSON geometry."""
+    if geometry["type"] == "GeometryCollection":
+        bounds = [geometry_bounds(g) for g in geometry["geometries"]]
+        return [
+            min(b[0] for b in bounds),
+            min(b[1] for b in bounds),
+            max(b[2] for b in bounds),
+            max(b[3] for b in bounds),
+        ]
+
+    xs: List[float] = []
+    ys: List[float] = []
+
+    def _walk(coords):
+        if isinstance(coords[0], (int, float)):
+            xs.append(coords[0])
+            ys.append(coords[1])
+        else:
+            for c in coords:
+                _walk(c)
+
+    _walk(geometry["coordinates"])
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def catalog_fresh(catalog: "PgSTACCatalog") -> bool:
+    """Check that the catalog was refreshed less than `TIPG_STAC_CATALOG_TTL` ago."""
+    age = datetime.datetime.now() - catalog["last_updated"]
+    return age.total_seconds() <= catalog_settings.ttl
+
+
+def prune_search(
+    catalog: "PgSTACCatalog", search: ItemsSearch
+) -> Optional[ItemsSearch]:
+    """Restrict a search to the collections whose extent can match its filters.
+
+    Returns `None` when no collection can match.
+
+    """
+    if search.collections:
+        return search
+
+    bbox = None
+    if search.bbox:
+        bbox = list(search.bbox)
+    elif search.intersects:
+        bbox = geometry_bounds(search.intersects.model_dump(exclude_none=True))
+
+    interval = search.datetime.split("/") if search.datetime else None
+
+    if not bbox and not interval:
+        return search
+
+    # Collections without spatial extent are kept (their items can match any bbox)
+    collections = catalog["index"].search(
+        bbox=bbox, datetime=interval, include_unbounded=True
+    )
+    if not collections:
+        return None
+
+    return search.model_copy(update={"collections": collections})
 
 
 async def pgstac_search(  # noqa: C901
     pool: asyncpg.BuildPgPool,
     *,
     search: ItemsSearch,
+    catalog: Optional["PgSTACCatalog"] = None,
+    precision: Optional[int] = None,
+    simplify: Optional[float] = None,
+    snapshot: bool = False,
 ) -> ItemList:
-    """Build and run PgSTAC query."""
+    """Build and run PgSTAC query.
+
+    `precision` (number of decimal digits) and `simplify` (tolerance in degrees) are
+    applied to the items geometry in the database.
+
+    With `snapshot=True` (or a snapshot token), the page is read from a materialized
+    snapshot of the search results (see `tipgstac.snapshot`).
+
+    """
     if search.limit and search.limit > features_settings.max_features_per_query:
         raise InvalidLimit(
             f"Limit can not be set higher than the `tipg_max_features_per_query` setting of {features_settings.max_features_per_query}"
         )
 
+    if catalog and catalog_settings.search_pruning and catalog_fresh(catalog):
+        pruned = prune_search(catalog, search)
+        if pruned is None:
+            return ItemList(items=[], matched=0, next=None, prev=None)  # type: ignore
+
+        search = pruned
+
+    if snapshot or is_snapshot_token(search.token):
+        return await snapshot_search(
+            pool, search=search, precision=precision, simplify=simplify
+        )
+
+    backend = get_backend(pool)
+    if isinstance(backend, PgSTACBackend):
+        # `intersects` simplification runs in the database
+        search = await preprocess_intersects(pool, search)
+
+    keyset_token = None
+    sortby = keyset_sortby(search) if search_settings.keyset_pagination else None
+    if sortby:
+        search, keyset_token = keyset_search(search, sortby)
+
     try:
-        async with pool.acquire() as conn:
-            q, p = render(
-                """
-                SELECT * FROM pgstac.search(:req::text::jsonb);
-                """,
-                req=search.model_dump_json(exclude_none=True, by_alias=True),
-            )
-            fc = await conn.fetchval(q, *p)
+        fc = await backend.search(search, precision=precision, simplify=simplify)
+
+    except asyncpg.QueryCanceledError as e:
+        raise HTTPException(status_code=503, detail=f"Search was cancelled: {e}") from e
 
-    except Exception as e:
+    except asyncpg.PostgresError as e:
         if "Could not find item using token:" in repr(e):
             raise HTTPException(
                 status_code=404, detail=f"Invalid toke: {search.token}."
             ) from e
-        fc = {}
+
+        raise HTTPException(status_code=400, detail=f"Could not run search: {e}") from e
 
     matched = None
     if context := fc.get("context"):
         matched = context.get("matched")
 
-    return ItemList(  # type: ignore
+    item_list = ItemList(  # type: ignore
         items=fc.get("features", []),
         matched=matched,
         next=fc.get("next"),
         prev=fc.get("prev"),
     )
 
+    if sortby:
+        return keyset_page(item_list, sortby, keyset_token) or item_list
+
+    return item_list
+
+
+async def pgstac_items(
+    pool: asyncpg.BuildPgPool, items: List[Dict[str, str]]
+) -> List[Optional[Dict]]:
+    """Fetch Items from (collection, id) references.
+
+    References are grouped by collection and each collection is queried once (one
+    `id = ANY(...)` lookup in the collection partition, hydrated with the collection
+    base item fetched once). Returns the items in the
+    references order, with `None` for the missing ones.
+
+    """
+    ids: Dict[str, List[str]] = {}
+    for ref in items:
+        ids.setdefault(ref["collection"], []).append(ref["id"])
+
+    found: Dict[Tuple[str, str], Dict] = {}
+    async with acquire(pool) as conn:
+        for collection, collection_ids in ids.items():
+            with timer("db-query", function="pgstac.content_hydrate"):
+                rows = await conn.fetch(
+                    """
+                    SELECT i.id, pgstac.content_hydrate(i, c, '{}'::jsonb)
+                    FROM collections c
+                    JOIN items i ON i.collection = c.id
+                    WHERE c.id = $1 AND i.id = ANY($2::text[]);
+                    """,
+                    collection,
+                    list(set(collection_ids)),
+                )
+
+            for item_id, item in rows:
+                found[(collection, item_id)] = item
+
+    return [found.get((ref["collection"], ref["id"])) for ref in items]
+
+
+def validate_searches(
+    searches: List[Dict[str, Any]]
+) -> List[Union[ItemsSearch, HTTPException]]:
+    """Validate searches separately (invalid searches are returned as 422 errors)."""
+    results: List[Union[ItemsSearch, HTTPException]] = []
+    for search in searches:
+        try:
+            results.append(ItemsSearch.model_validate(search))
+        except ValidationError as e:
+            results.append(
+                HTTPException(status_code=422, detail=f"Invalid search: {e}")
+            )
+
+    return results
+
+
+async def pgstac_searches(
+    pool: asyncpg.BuildPgPool,
+    *,
+    searches: Sequence[Union[ItemsSearch, BaseException]],
+    catalog: Optional["PgSTACCatalog"] = None,
+) -> List[Union[ItemList, BaseException]]:
+    """Run PgSTAC searches concurrently.
+
+    At most `TIPG_STAC_BATCH_MAX_CONCURRENCY` searches (and database connections)
+    run at the same time. Failing searches (e.g database errors) return their
+    exception, and exceptions (e.g invalid searches) are returned as is.
+
+    """
+    semaphore = asyncio.Semaphore(batch_settings.max_concurrency)
+
+    async def _search(search: Union[ItemsSearch, BaseException]) -> ItemList:
+        if isinstance(search, BaseException):
+            raise search
+
+        async with semaphore:
+            return await pgstac_search(pool, search=search, catalog=catalog)
+
+    return await asyncio.gather(
+        *[_search(search) for search in searches], return_exceptions=True
+    )
+
+
+async def pgstac_where(conn: asyncpg.BuildPgConnection, search: ItemsSearch) -> str:
+    """Return the SQL WHERE clause generated by PgSTAC for a search."""
+    search = await preprocess_intersects(conn, search)
+    q, p = render(
+        """
+        SELECT pgstac.stac_search_to_where(:req::text::jsonb);
+        """,
+        req=search.model_dump_json(
+            exclude_none=True,
+            by_alias=True,
+            include={
+                "collections",
+                "ids",
+                "bbox",
+                "intersects",
+                "query",
+                "filter",
+                "datetime",
+                "filter_lang",
+            },
+        ),
+    )
+    return await conn.fetchval(q, *p)
+
 
 class PgSTACCollection(Collection):
     """Model for DB Table and Function."""
@@ -116,9 +333,17 @@ class PgSTACCollection(Collection):
         """Return crs of set geometry column."""
         return "http://www.opengis.net/def/crs/EPSG/0/4326"
 
-    async def features(  # noqa: C901
+    def get_geometry_column(self, name: Optional[str] = None) -> Optional[Column]:
+        """Return PgSTAC items geometry column."""
+        if name and name.lower() == "none":
+            return None
+
+        return Column(
+            name="geometry", type="geometry", geometry_type="Geometry", srid=4326
+        )
+
+    def search(  # noqa: C901
         self,
-        pool: asyncpg.BuildPgPool,
         *,
         ids_filter: Optional[List[str]] = None,
         bbox_filter: Optional[List[float]] = None,
@@ -129,8 +354,8 @@ class PgSTACCollection(Collection):
         properties: Optional[List[str]] = None,
         limit: Optional[int] = None,
         token: Optional[str] = None,
-    ) -> ItemList:
-        """Build and run PgSTAC query."""
+    ) -> ItemsSearch:
+        """Build PgSTAC search for the collection."""
         if datetime_filter:
             if len(datetime_filter) == 2:
                 start = (
@@ -196,23 +421,154 @@ class PgSTACCollection(Collection):
             if v is not None and v != []:
                 clean[k] = v
 
-        search = ItemsSearch.model_validate(clean)
-        return await pgstac_search(pool=pool, search=search)
+        return ItemsSearch.model_validate(clean)
+
+    async def features(
+        self,
+        pool: asyncpg.BuildPgPool,
+        *,
+        ids_filter: Optional[List[str]] = None,
+        bbox_filter: Optional[List[float]] = None,
+        datetime_filter: Optional[List[str]] = None,
+        cql_filter: Optional[AstType] = None,
+        query: Optional[str] = None,
+        sortby: Optional[str] = None,
+        properties: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        token: Optional[str] = None,
+        precision: Optional[int] = None,
+        simplify: Optional[float] = None,
+    ) -> ItemList:
+        """Build and run PgSTAC query."""
+        search = self.search(
+            ids_filter=ids_filter,
+            bbox_filter=bbox_filter,
+            datetime_filter=datetime_filter,
+            cql_filter=cql_filter,
+            query=query,
+            sortby=sortby,
+            properties=properties,
+            limit=limit,
+            token=token,
+        )
+        return await pgstac_search(
+            pool=pool, search=search, precision=precision, simplify=simplify
+        )
 
     async def get_tile(
         self,
         *,
         pool: asyncpg.BuildPgPool,
+        tms: TileMatrixSet,
+        tile: Tile,
+        ids_filter: Optional[List[str]] = None,
+        bbox_filter: Optional[List[float]] = None,
+        datetime_filter: Optional[List[str]] = None,
+        cql_filter: Optional[AstType] = None,
+        sortby: Optional[str] = None,
+        properties: Optional[List[str]] = None,
+        limit: Optional[int] = None,
         **kwargs: Any,
     ):
-        """Build query to get Vector Tile."""
-        raise NotImplementedError
+        """Build query to get Vector Tile of items footprints."""
+        limit = limit or mvt_settings.max_features_per_tile
+        if limit > mvt_settings.max_features_per_tile:
+            raise InvalidLimit(
+                f"Limit can not be set higher than the `tipg_max_features_per_tile` setting of {mvt_settings.max_features_per_tile}"
+            )
+
+        search = self.search(
+            ids_filter=ids_filter,
+            bbox_filter=bbox_filter,
+            datetime_filter=datetime_filter,
+            cql_filter=cql_filter,
+            sortby=sortby,
+        )
+
+        # Transform the geometries to TMS CRS using EPSG code or PROJ String
+        crs: Union[int, str]
+        if tms_srid := tms.crs.to_epsg():
+            crs, crs_type = tms_srid, "int"
+        else:
+            crs, crs_type = tms.crs.to_proj4(), "text"
+
+        bbox = tms.xy_bounds(tile)
+        geographic_bbox = tms.bounds(tile)
+
+        # Simplify geometries to the tile's pixel size before encoding
+        tolerance = (bbox.right - bbox.left) / mvt_settings.tile_resolution
+
+        async with pool.acquire() as conn:
+            q, p = render(
+                """
+                SELECT
+                    pgstac.stac_search_to_where(:req::text::jsonb),
+                    pgstac.sort_sqlorderby(:req::text::jsonb);
+                """,
+                req=search.model_dump_json(exclude_none=True, by_alias=True),
+            )
+            where, orderby = await conn.fetchrow(q, *p)
+
+            # NOTE: the WHERE clause can contain `:` so we can't use buildpg's render
+            return await conn.fetchval(
+                f"""
+                WITH t AS (
+                    SELECT
+                        id,
+                        collection,
+                        datetime,
+                        CASE WHEN $1::text[] IS NULL THEN NULL ELSE (
+                            SELECT jsonb_object_agg(key, value)
+                            FROM jsonb_each(content->'properties')
+                            WHERE key = ANY($1::text[])
+                        ) END AS properties,
+                        ST_AsMVTGeom(
+                            ST_SimplifyPreserveTopology(
+                                ST_Transform(geometry, $2::{crs_type}),
+                                $3::float
+                            ),
+                            ST_MakeEnvelope($4, $5, $6, $7),
+                            $8,
+                            $9,
+                            $10
+                        ) AS geom
+                    FROM items
+                    WHERE
+                        ST_Intersects(
+                            geometry,
+                            ST_MakeEnvelope($11, $12, $13, $14, 4326)
+                        )
+                        AND {where}
+                    ORDER BY {orderby}
+                    LIMIT $15
+                )
+                SELECT ST_AsMVT(t.*, $16) FROM t
+                """,
+                properties,
+                crs,
+                tolerance,
+                bbox.left,
+                bbox.bottom,
+                bbox.right,
+                bbox.top,
+                mvt_settings.tile_resolution,
+                mvt_settings.tile_buffer,
+                mvt_settings.tile_clip,
+                max(geographic_bbox.left, -180),
+                max(geographic_bbox.bottom, -90),
+                min(geographic_bbox.right, 180),
+                min(geographic_bbox.top, 90),
+                limit,
+                self.id if mvt_settings.set_mvt_layername is True else "default",
+            )
 
 
 class PgSTACCatalog(TypedDict):
     """Collection Catalog."""
 
     collections: Dict[str, PgSTACCollection]
+    index: ExtentIndex
+    extents_current: bool
     last_updated: datetime.datetime
 
 
@@ -223,3 +579,41 @@ class CollectionList(TypedDict):
     matched: Optional[int]
     next: Optional[int]
     prev: Optional[int]
+
+
+async def get_collection_index(db_pool: asyncpg.BuildPgPool) -> PgSTACCatalog:
+    """Fetch PgSTAC collections and index their extents."""
+    backend = get_backend(db_pool)
+    collections = await backend.all_collections()
+
+    # PgSTAC only keeps the collection extents up to date on ingest when
+    # `update_collection_extent` is set
+    extents_current = await backend.get_setting_bool("update_collection_extent")
+
+    collections = collections or []
+
+    catalog: Dict[str, PgSTACCollection] = {}
+    for collection in collections:
+        catalog[collection["id"]] = PgSTACCollection(
+            type="Collection",
+            id=collection["id"],
+            table="collections",
+            schema="pgstac",
+            title=collection.get("title"),
+            stac_extent=collection.get("extent"),
+            description=collection.get("description", None),
+            stac_version=collection.get("stac_version"),
+            stac_extensions=collection.get("stac_extensions", []),
+        )
+
+    return PgSTACCatalog(
+        collections=catalog,
+        index=ExtentIndex(collections),
+        extents_current=bool(extents_current),
+        last_updated=datetime.datetime.now(),
+    )
+
+
+async def register_collection_catalog(app: FastAPI, **kwargs: Any) -> None:
+    """Register PgSTAC collection catalog."""
+    app.state.collection_catalog = await get_collection_index(app.state.pool)
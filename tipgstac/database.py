@@ -11,20 +11,29 @@ from buildpg import asyncpg
 from fastapi import FastAPI
 
 from tipg.settings import PostgresSettings
+from tipgstac.settings import APISettings, TracingSettings
+from tipgstac.timing import timed_json_loads
+
+api_settings = APISettings()
+tracing_settings = TracingSettings()
 
 
 async def con_init(conn):
     """Use orjson for json returns."""
+    decoder = orjson.loads
+    if api_settings.server_timing or tracing_settings.enabled:
+        decoder = timed_json_loads
+
     await conn.set_type_codec(
         "json",
         encoder=orjson.dumps,
-        decoder=orjson.loads,
+        decoder=decoder,
         schema="pg_catalog",
     )
     await conn.set_type_codec(
         "jsonb",
         encoder=orjson.dumps,
-        decoder=orjson.loads,
+        decoder=decoder,
         schema="pg_catalog",
     )
 
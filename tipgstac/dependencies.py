@@ -3,11 +3,12 @@
 import json
 import re
 from typing import List, Literal, Optional, get_args
+from urllib.parse import unquote_plus
 
 from aiocache import cached
-from buildpg import render
 from ciso8601 import parse_rfc3339
 from fastapi import Depends, HTTPException, Path, Query
+from pydantic import TypeAdapter, ValidationError
 from pygeofilter.ast import AstType
 from pygeofilter.backends.cql2_json import to_cql2
 from starlette.requests import Request
@@ -19,17 +20,47 @@ from tipg.dependencies import (
     datetime_query,
     filter_query,
     ids_query,
+    properties_query,
     sortby_query,
 )
 from tipg.errors import InvalidDatetime
-from tipg.resources.enums import MediaType
-from tipgstac.collections import CollectionList, PgSTACCollection
-from tipgstac.models import CollectionsSearch
+from tipg.settings import FeaturesSettings
+from tipgstac import arrow
+from tipgstac.backend import get_backend
+from tipgstac.collections import CollectionList, PgSTACCatalog, PgSTACCollection
+from tipgstac.fgb import flatbuffers
+from tipgstac.index import SORTABLE_FIELDS
+from tipgstac.metrics import cache_metrics, cache_miss
+from tipgstac.models import Aggregation, CollectionsSearch, ItemsSearch
+from tipgstac.resources.enums import MediaType
 from tipgstac.settings import CacheSettings
+from tipgstac.snapshot import check_snapshots_enabled
+from tipgstac.timing import timed
 
 cache_config = CacheSettings()
-
-PostSearchResponseType = Literal["geojson", "json", "csv", "geojsonseq", "ndjson"]
+features_settings = FeaturesSettings()
+
+ItemsResponseType = Literal[
+    "geojson",
+    "html",
+    "json",
+    "csv",
+    "geojsonseq",
+    "ndjson",
+    "arrow",
+    "parquet",
+    "fgb",
+]
+PostSearchResponseType = Literal[
+    "geojson", "json", "csv", "geojsonseq", "ndjson", "arrow", "parquet", "fgb"
+]
+
+# Output types requiring optional dependencies
+OPTIONAL_OUTPUTS = {
+    MediaType.arrow: ("pyarrow", arrow.available),
+    MediaType.parquet: ("pyarrow", arrow.available),
+    MediaType.fgb: ("flatbuffers", flatbuffers is not None),
+}
 
 
 def collections_query(
@@ -41,6 +72,110 @@ def collections_query(
     return collections.split(",") if collections else None
 
 
+def aggregations_query(
+    aggregations: Annotated[
+        Optional[str],
+        Query(
+            description='JSON encoded list of aggregations (e.g `[{"type": "datetime_frequency", "interval": "day"}]`).',
+        ),
+    ] = None,
+) -> Optional[List[Aggregation]]:
+    """Aggregations dependency."""
+    if not aggregations:
+        return None
+
+    try:
+        return TypeAdapter(List[Aggregation]).validate_json(unquote_plus(aggregations))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid aggregations: {e}") from e
+
+
+def precision_query(
+    precision: Annotated[
+        Optional[int],
+        Query(
+            ge=0,
+            le=15,
+            description="Maximum number of decimal digits of the items geometry coordinates.",
+        ),
+    ] = None,
+) -> Optional[int]:
+    """Geometry coordinates precision dependency."""
+    return precision
+
+
+def simplify_query(
+    simplify: Annotated[
+        Optional[float],
+        Query(
+            ge=0,
+            description="Simplify the items geometry using a tolerance in degrees.",
+        ),
+    ] = None,
+) -> Optional[float]:
+    """Geometry simplification dependency."""
+    return simplify
+
+
+def compact_query(
+    compact: Annotated[
+        bool,
+        Query(
+            description="Return only the items `collection`, `id`, `bbox` and `datetime` as a compact JSON array of arrays.",
+        ),
+    ] = False,
+) -> bool:
+    """Compact response dependency."""
+    return compact
+
+
+def snapshot_query(
+    snapshot: Annotated[
+        bool,
+        Query(
+            description="Materialize the search results once and read the following pages from this snapshot.",
+        ),
+    ] = False,
+) -> bool:
+    """Snapshot pagination dependency."""
+    if snapshot:
+        check_snapshots_enabled()
+
+    return snapshot
+
+
+def check_output_type(output_type: Optional[MediaType]) -> Optional[MediaType]:
+    """Make sure the optional dependencies of the output type are installed."""
+    if output_type in OPTIONAL_OUTPUTS:
+        package, available = OPTIONAL_OUTPUTS[output_type]
+        if not available:
+            raise HTTPException(
+                status_code=400,
+                detail=f"`{package}` must be installed to use `{output_type.name}` output.",
+            )
+
+    return output_type
+
+
+def ItemsOutputType(
+    request: Request,
+    f: Annotated[
+        Optional[ItemsResponseType],
+        Query(
+            description="Response MediaType. Defaults to endpoint's default or value defined in `accept` header."
+        ),
+    ] = None,
+) -> Optional[MediaType]:
+    """Output MediaType: geojson, html, json, csv, geojsonseq, ndjson, arrow, parquet, fgb."""
+    if f:
+        return check_output_type(MediaType[f])
+
+    accepted_media = [MediaType[v] for v in get_args(ItemsResponseType)]
+    return check_output_type(
+        accept_media_type(request.headers.get("accept", ""), accepted_media)  # type: ignore
+    )
+
+
 def PostSearchOutputType(
     request: Request,
     f: Annotated[
@@ -50,14 +185,115 @@ def PostSearchOutputType(
         ),
     ] = None,
 ) -> Optional[MediaType]:
-    """Output MediaType: geojson, json, csv, geojsonseq, ndjson."""
+    """Output MediaType: geojson, json, csv, geojsonseq, ndjson, arrow, parquet, fgb."""
     if f:
-        return MediaType[f]
+        return check_output_type(MediaType[f])
 
     accepted_media = [MediaType[v] for v in get_args(PostSearchResponseType)]
-    return accept_media_type(request.headers.get("accept", ""), accepted_media)
+    return check_output_type(
+        accept_media_type(request.headers.get("accept", ""), accepted_media)  # type: ignore
+    )
 
 
+@timed("search-params")
+def ItemsSearchParams(  # noqa: C901
+    collections_filter: Annotated[Optional[List[str]], Depends(collections_query)],
+    ids_filter: Annotated[Optional[List[str]], Depends(ids_query)],
+    bbox_filter: Annotated[Optional[List[float]], Depends(bbox_query)],
+    datetime_filter: Annotated[Optional[List[str]], Depends(datetime_query)],
+    properties: Annotated[Optional[List[str]], Depends(properties_query)],
+    cql_filter: Annotated[Optional[AstType], Depends(filter_query)],
+    sortby: Annotated[Optional[str], Depends(sortby_query)],
+    query: Annotated[
+        Optional[str],
+        Query(
+            description="Additional filtering based on the properties of Item objects."
+        ),
+    ] = None,
+    limit: Annotated[
+        int,
+        Query(
+            ge=0,
+            le=features_settings.max_features_per_query,
+            description="Limits the number of features in the response.",
+        ),
+    ] = features_settings.default_features_limit,
+    offset: Annotated[
+        Optional[str],
+        Query(
+            description="Starts the response at an specific item.",
+        ),
+    ] = None,
+) -> ItemsSearch:
+    """PgSTAC Search from GET query parameters."""
+    if datetime_filter:
+        if len(datetime_filter) == 2:
+            start = (
+                parse_rfc3339(datetime_filter[0])
+                if datetime_filter[0] not in ["..", ""]
+                else None
+            )
+            end = (
+                parse_rfc3339(datetime_filter[1])
+                if datetime_filter[1] not in ["..", ""]
+                else None
+            )
+
+            if start is None and end is None:
+                raise InvalidDatetime(
+                    "Double open-ended datetime intervals are not allowed."
+                )
+
+            if start is not None and end is not None and start > end:
+                raise InvalidDatetime("Start datetime cannot be before end datetime.")
+
+        datetime_filter = "/".join(datetime_filter)  # type: ignore
+
+    base_args = {
+        "collections": collections_filter,
+        "ids": ids_filter,
+        "bbox": bbox_filter,
+        "limit": limit or features_settings.default_features_limit,
+        "token": offset,
+        "query": json.loads(unquote_plus(query)) if query else query,
+    }
+
+    if cql_filter:
+        base_args["filter"] = json.loads(to_cql2(cql_filter))
+        base_args["filter-lang"] = "cql2-json"
+
+    if datetime_filter:
+        base_args["datetime"] = datetime_filter
+
+    if sortby:
+        sort_param = []
+        for s in sortby.strip().split(","):
+            if part := re.match("^(?P<direction>[+-]?)(?P<prop>.*)$", s):
+                parts = part.groupdict()
+                direction = parts["direction"]
+                prop = parts["prop"].strip()
+                sort_param.append(
+                    {
+                        "field": prop,
+                        "direction": "desc" if direction == "-" else "asc",
+                    }
+                )
+
+        base_args["sortby"] = sort_param
+
+    if properties:
+        base_args["fields"] = {"include": set(properties)}
+
+    clean = {}
+    for k, v in base_args.items():
+        if v is not None and v != []:
+            clean[k] = v
+
+    return ItemsSearch.model_validate(clean)
+
+
+@timed("collections")
+@cache_metrics("collections")
 @cached(
     ttl=cache_config.ttl,
     key_builder=lambda _f, request, **kwargs: str(request.query_params),
@@ -86,6 +322,7 @@ async def CollectionsParams(  # noqa: C901
     ] = None,
 ) -> CollectionList:
     """Return Collections Catalog."""
+    cache_miss()
     limit = limit or 10
     offset = offset or 0
 
@@ -149,14 +386,38 @@ async def CollectionsParams(  # noqa: C901
     search = CollectionsSearch.model_validate(base_args)
     collections: List[PgSTACCollection] = []
 
-    async with request.app.state.pool.acquire() as conn:
-        q, p = render(
-            """
-            SELECT * FROM pgstac.collection_search(:req::text::jsonb);
-            """,
-            req=search.model_dump_json(exclude_none=True, by_alias=True),
+    # Use the in-memory catalog index when we don't need pgstac to parse a CQL2 filter
+    catalog: Optional[PgSTACCatalog] = getattr(
+        request.app.state, "collection_catalog", None
+    )
+    if (
+        catalog
+        and not cql_filter
+        and all(s["field"] in SORTABLE_FIELDS for s in search.sortby or [])
+    ):
+        index = catalog["index"]
+        collection_ids = index.search(
+            ids=ids_filter,
+            bbox=bbox_filter,
+            datetime=datetime_filter.split("/") if datetime_filter else None,  # type: ignore
         )
-        results = await conn.fetchval(q, *p)
+        collection_ids = index.sort(collection_ids, search.sortby)
+
+        matched = len(collection_ids)
+        collections = [
+            catalog["collections"][cid]
+            for cid in collection_ids[offset : offset + limit]
+        ]
+        returned = len(collections)
+
+        return CollectionList(
+            collections=collections,
+            matched=matched,
+            next=offset + returned if matched - returned > offset else None,
+            prev=max(offset - limit, 0) if offset else None,
+        )
+
+    results = await get_backend(request.app.state.pool).collection_search(search)
 
     matched = None
     if context := results.get("context"):
@@ -169,7 +430,7 @@ async def CollectionsParams(  # noqa: C901
                 id=collection["id"],
                 table="collections",
                 schema="pgstac",
-                extent=collection.get("extent"),
+                stac_extent=collection.get("extent"),
                 description=collection.get("description", None),
                 stac_version=collection.get("stac_version"),
                 stac_extensions=collection.get("stac_extensions", []),
@@ -186,6 +447,8 @@ async def CollectionsParams(  # noqa: C901
     )
 
 
+@timed("collection")
+@cache_metrics("collection")
 @cached(
     ttl=cache_config.ttl,
     key_builder=lambda _f, request, collectionId: collectionId,
@@ -195,45 +458,30 @@ async def CollectionParams(
     collectionId: Annotated[str, Path(description="Collection identifier")],
 ) -> PgSTACCollection:
     """Collection Dependency."""
-    async with request.app.state.pool.acquire() as conn:
-        q, p = render(
-            """
-            WITH t AS (
-                SELECT
-                    *
-                FROM
-                    pgstac.get_collection(:id::text) c,
-                    pgstac.get_queryables(:id::text) q
-            )
-            SELECT
-                COALESCE(c || jsonb_build_object('queryables', q))
-            FROM t;
-            """,
-            id=collectionId,
+    cache_miss()
+    try:
+        collection = await get_backend(request.app.state.pool).collection(collectionId)
+    except Exception:  # TODO: better error handling
+        collection = None
+        pass
+
+    if not collection:
+        raise HTTPException(
+            status_code=404, detail=f"Collection '{collectionId}' not found."
         )
-        try:
-            collection = await conn.fetchval(q, *p)
-        except Exception:  # TODO: better error handling
-            collection = None
-            pass
-
-        if not collection:
-            raise HTTPException(
-                status_code=404, detail=f"Collection '{collectionId}' not found."
-            )
 
-        queryables = None
-        if collection.get("queryables"):
-            queryables = collection["queryables"].get("properties")
-
-        return PgSTACCollection(
-            type="Collection",
-            id=collection["id"],
-            table="collections",
-            schema="pgstac",
-            stac_extent=collection.get("extent"),
-            description=collection.get("description", None),
-            stac_queryables=queryables,
-            stac_version=collection.get("stac_version"),
-            stac_extensions=collection.get("stac_extensions", []),
-        )
+    queryables = None
+    if collection.get("queryables"):
+        queryables = collection["queryables"].get("properties")
+
+    return PgSTACCollection(
+        type="Collection",
+        id=collection["id"],
+        table="collections",
+        schema="pgstac",
+        stac_extent=collection.get("extent"),
+        description=collection.get("description", None),
+        stac_queryables=queryables,
+        stac_version=collection.get("stac_version"),
+        stac_extensions=collection.get("stac_extensions", []),
+    )
@@ -0,0 +1,403 @@
+"""tipgstac.export: schema and pages for streamed exports.
+
+Exports (CSV, Arrow, GeoParquet, ...) have a fixed columnar schema: `id`, `collection`,
+`geometry` and one column per item property. Property columns are derived from the
+collection(s) `queryables` (or the `properties` requested by the user), completed by
+the properties found in the first page of items, so the schema stays the same for
+all the pages of the export. Without requested `properties`, a last `properties`
+JSON column holds the item properties which have no column of their own (e.g found
+after the first page), so no property is dropped.
+
+"""
+
+import csv
+import io
+import struct
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+import orjson
+from buildpg import asyncpg
+from ciso8601 import parse_rfc3339
+
+from tipg.settings import FeaturesSettings
+from tipgstac.backend import get_backend
+from tipgstac.collections import PgSTACCatalog, pgstac_search
+from tipgstac.models import ItemsSearch
+from tipgstac.settings import ExportSettings
+
+features_settings = FeaturesSettings()
+export_settings = ExportSettings()
+
+# Item attributes which are exported as their own columns
+RESERVED_FIELDS = {"id", "collection", "geometry"}
+
+# ISO WKB geometry type codes
+WKB_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+
+
+class Field(NamedTuple):
+    """Property column: name and type (string, number, integer, boolean, datetime, json)."""
+
+    name: str
+    type: str
+
+
+# JSON column of the properties without their own column
+EXTRA_FIELD = Field("properties", "json")
+
+
+def queryable_type(schema: Dict) -> str:
+    """Return the column type of a queryable JSON schema."""
+    dtype = schema.get("type")
+    if isinstance(dtype, list):
+        dtype = next((t for t in dtype if t != "null"), None)
+
+    if dtype == "string" and schema.get("format") == "date-time":
+        return "datetime"
+
+    if dtype in ["string", "number", "integer", "boolean"]:
+        return dtype  # type: ignore
+
+    return "json"
+
+
+def value_type(value: Any) -> str:
+    """Return the column type of a property value."""
+    if isinstance(value, bool):
+        return "boolean"
+
+    if isinstance(value, int):
+        return "integer"
+
+    if isinstance(value, float):
+        return "number"
+
+    if isinstance(value, str):
+        return "string"
+
+    return "json"
+
+
+def schema_fields(
+    queryables: Optional[Dict],
+    items: List[Dict],
+    properties: Optional[List[str]] = None,
+) -> List[Field]:
+    """Return the property columns of an export.
+
+    Columns are the requested `properties`, or the queryables followed by the
+    properties of the (first page) items and `EXTRA_FIELD`.
+
+    """
+    queryables = queryables or {}
+
+    types: Dict[str, str] = {
+        name: queryable_type(schema)
+        for name, schema in queryables.items()
+        if name not in RESERVED_FIELDS and name != EXTRA_FIELD.name
+    }
+    for item in items:
+        for name, value in (item.get("properties") or {}).items():
+            if name in RESERVED_FIELDS or name == EXTRA_FIELD.name or value is None:
+                continue
+
+            vtype = value_type(value)
+            dtype = types.get(name)
+            if dtype is None:
+                types[name] = vtype
+            elif name not in queryables and dtype != vtype:
+                # mixed integer/float values are numbers, anything else is json
+                numbers = {dtype, vtype} == {"integer", "number"}
+                types[name] = "number" if numbers else "json"
+
+    if properties is not None:
+        return [
+            Field(name, types.get(name, "json"))
+            for name in properties
+            if name not in RESERVED_FIELDS
+        ]
+
+    return [*[Field(name, dtype) for name, dtype in types.items()], EXTRA_FIELD]
+
+
+def property_values(item: Dict, fields: List[Field]) -> List[Any]:
+    """Return the (not converted) values of the property columns of an item."""
+    props = item.get("properties") or {}
+    values = [props.get(f.name) for f in fields]
+
+    if fields and fields[-1] == EXTRA_FIELD:
+        names = {f.name for f in fields[:-1]}
+        extra = {
+            name: value
+            for name, value in props.items()
+            if name not in names and name not in RESERVED_FIELDS and value is not None
+        }
+        values[-1] = extra or None
+
+    return values
+
+
+def _to_string(value: Any) -> Optional[str]:
+    return value if isinstance(value, str) else None
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+
+    return None
+
+
+def _to_integer(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+
+    return None
+
+
+def _to_boolean(value: Any) -> Optional[bool]:
+    return value if isinstance(value, bool) else None
+
+
+def _to_datetime(value: Any):
+    if isinstance(value, str):
+        try:
+            return parse_rfc3339(value)
+        except ValueError:
+            return None
+
+    return None
+
+
+def _to_json(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+
+    return orjson.dumps(value).decode()
+
+
+# Convert a property value to the column type, `None` if it can't be converted
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "string": _to_string,
+    "number": _to_number,
+    "integer": _to_integer,
+    "boolean": _to_boolean,
+    "datetime": _to_datetime,
+    "json": _to_json,
+}
+
+
+def _wkb_coords(coords: List, ndim: int) -> bytes:
+    return struct.pack(f"<{len(coords) * ndim}d", *(v for c in coords for v in c))
+
+
+def _wkb(geometry: Dict, ndim: int) -> bytes:
+    gtype = geometry["type"]
+    code = WKB_TYPES[gtype] + (1000 if ndim == 3 else 0)
+    header = struct.pack("<BI", 1, code)
+
+    if gtype == "GeometryCollection":
+        parts = geometry["geometries"]
+        return (
+            header
+            + struct.pack("<I", len(parts))
+            + b"".join(_wkb(g, ndim) for g in parts)
+        )
+
+    coords = geometry["coordinates"]
+    if gtype == "Point":
+        return header + _wkb_coords([coords], ndim)
+
+    if gtype == "LineString":
+        return header + struct.pack("<I", len(coords)) + _wkb_coords(coords, ndim)
+
+    if gtype == "Polygon":
+        return (
+            header
+            + struct.pack("<I", len(coords))
+            + b"".join(
+                struct.pack("<I", len(ring)) + _wkb_coords(ring, ndim)
+                for ring in coords
+            )
+        )
+
+    part = {"MultiPoint": "Point", "MultiLineString": "LineString"}.get(
+        gtype, "Polygon"
+    )
+    return (
+        header
+        + struct.pack("<I", len(coords))
+        + b"".join(_wkb({"type": part, "coordinates": c}, ndim) for c in coords)
+    )
+
+
+def _ndim(geometry: Dict) -> int:
+    if geometry["type"] == "GeometryCollection":
+        return max((_ndim(g) for g in geometry["geometries"]), default=2)
+
+    coords = geometry["coordinates"]
+    while coords and isinstance(coords[0], list):
+        coords = coords[0]
+
+    return 3 if len(coords) == 3 else 2
+
+
+def wkb(geometry: Optional[Dict]) -> Optional[bytes]:
+    """Encode a GeoJSON geometry to (ISO, little endian) WKB."""
+    if not geometry:
+        return None
+
+    return _wkb(geometry, _ndim(geometry))
+
+
+def _wkt_coords(coords: List) -> str:
+    return ", ".join(" ".join(str(float(v)) for v in c) for c in coords)
+
+
+def _wkt(geometry: Dict) -> str:
+    gtype = geometry["type"]
+    if gtype == "GeometryCollection":
+        return "(" + ", ".join(wkt(g) for g in geometry["geometries"]) + ")"  # type: ignore
+
+    coords = geometry["coordinates"]
+    if gtype == "Point":
+        return f"({_wkt_coords([coords])})"
+
+    if gtype == "LineString":
+        return f"({_wkt_coords(coords)})"
+
+    if gtype == "MultiPoint":
+        return "(" + ", ".join(f"({_wkt_coords([c])})" for c in coords) + ")"
+
+    if gtype in ["Polygon", "MultiLineString"]:
+        return "(" + ", ".join(f"({_wkt_coords(r)})" for r in coords) + ")"
+
+    return (
+        "("
+        + ", ".join(
+            "(" + ", ".join(f"({_wkt_coords(r)})" for r in polygon) + ")"
+            for polygon in coords
+        )
+        + ")"
+    )
+
+
+def wkt(geometry: Optional[Dict]) -> Optional[str]:
+    """Encode a GeoJSON geometry to WKT."""
+    if not geometry:
+        return None
+
+    z = " Z" if _ndim(geometry) == 3 else ""
+    return f"{geometry['type'].upper()}{z} {_wkt(geometry)}"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+
+    return orjson.dumps(value).decode()
+
+
+async def stream_csv(
+    pages: AsyncIterator[List[Dict]],
+    queryables: Optional[Dict] = None,
+    properties: Optional[List[str]] = None,
+) -> AsyncIterator[bytes]:
+    """Encode pages of items to CSV.
+
+    The header (`collectionId`, `itemId`, properties, `geometry` as WKT) is fixed from
+    the queryables and the first page, and each page is encoded as one chunk.
+
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    fields: Optional[List[Field]] = None
+
+    async for items in pages:
+        if fields is None:
+            fields = schema_fields(queryables, items, properties)
+            writer.writerow(
+                ["collectionId", "itemId", *[f.name for f in fields], "geometry"]
+            )
+
+        for item in items:
+            writer.writerow(
+                [
+                    item.get("collection"),
+                    item.get("id"),
+                    *[_csv_value(v) for v in property_values(item, fields)],
+                    wkt(item.get("geometry")),
+                ]
+            )
+
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Empty output
+    if fields is None:
+        fields = schema_fields(queryables, [], properties)
+        writer.writerow(
+            ["collectionId", "itemId", *[f.name for f in fields], "geometry"]
+        )
+        yield buffer.getvalue().encode()
+
+
+async def search_queryables(
+    pool: asyncpg.BuildPgPool, collections: Optional[List[str]] = None
+) -> Dict:
+    """Return the queryables of a search's collections."""
+    queryables = await get_backend(pool).queryables(collections)
+
+    return (queryables or {}).get("properties") or {}
+
+
+async def search_pages(
+    pool: asyncpg.BuildPgPool,
+    *,
+    search: ItemsSearch,
+    catalog: Optional[PgSTACCatalog] = None,
+    precision: Optional[int] = None,
+    simplify: Optional[float] = None,
+) -> AsyncIterator[List[Dict]]:
+    """Yield the items matching a search, page by page.
+
+    The search `limit` is the total number of items to export, which are fetched
+    from PgSTAC in pages of `TIPG_STAC_EXPORT_PAGE_SIZE` items.
+
+    """
+    remaining = search.limit or features_settings.default_features_limit
+    token = search.token
+    while remaining > 0:
+        size = min(export_settings.page_size, remaining)
+
+        item_list = await pgstac_search(
+            pool,
+            search=search.model_copy(update={"limit": size, "token": token}),
+            catalog=catalog,
+            precision=precision,
+            simplify=simplify,
+        )
+        items = item_list["items"]
+        if items:
+            yield items  # type: ignore
+
+        token = item_list["next"]  # type: ignore
+        if not token or not items:
+            break
+
+        remaining -= len(items)
@@ -4,25 +4,20 @@ PgSTAC uses `token: str` instead of `offset: int` which means we have to overwri
 """
 
 import json
-import re
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
-from urllib.parse import unquote_plus
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
 
-from ciso8601 import parse_rfc3339
-from fastapi import Body, Depends, Path, Query
-from fastapi.responses import ORJSONResponse
+from fastapi import Body, Depends, HTTPException, Path, Query
 from geojson_pydantic.geometries import parse_geometry_obj
 from pygeofilter.ast import AstType
-from pygeofilter.backends.cql2_json import to_cql2
 from starlette.datastructures import QueryParams
 from starlette.requests import Request
 from starlette.responses import StreamingResponse
 from typing_extensions import Annotated
 
 from tipg import factory, model
+from tipg.dependencies import ItemsOutputType as ItemOutputType
 from tipg.dependencies import (
-    ItemsOutputType,
     bbox_query,
     datetime_query,
     filter_query,
@@ -30,20 +25,117 @@ from tipg.dependencies import (
     properties_query,
     sortby_query,
 )
-from tipg.errors import InvalidDatetime, NotFound
-from tipg.resources.enums import MediaType
-from tipg.resources.response import GeoJSONResponse, orjsonDumps
+from tipg.errors import DEFAULT_STATUS_CODES, NotFound, TiPgError
+from tipg.resources.response import orjsonDumps
 from tipg.settings import FeaturesSettings
-from tipgstac.collections import CollectionList, PgSTACCollection, pgstac_search
+from tipgstac.aggregation import pgstac_aggregate, pgstac_coverage
+from tipgstac.arrow import stream_arrow
+from tipgstac.collections import (
+    CollectionList,
+    ItemList,
+    PgSTACCollection,
+    pgstac_items,
+    pgstac_search,
+    pgstac_searches,
+    validate_searches,
+)
 from tipgstac.dependencies import (
     CollectionParams,
     CollectionsParams,
+    ItemsOutputType,
+    ItemsSearchParams,
     PostSearchOutputType,
-    collections_query,
+    aggregations_query,
+    compact_query,
+    precision_query,
+    simplify_query,
+    snapshot_query,
 )
-from tipgstac.models import ItemsSearch, PostItems
+from tipgstac.export import search_pages, search_queryables, stream_csv
+from tipgstac.fgb import stream_fgb
+from tipgstac.models import (
+    COMPACT_COLUMNS,
+    COMPACT_FIELDS,
+    Aggregation,
+    AggregationSearch,
+    BatchItems,
+    BatchSearch,
+    CoverageSearch,
+    ItemsSearch,
+    PostItems,
+)
+from tipgstac.resources.enums import MediaType
+from tipgstac.resources.response import GeoJSONResponse, ORJSONResponse
+from tipgstac.settings import APISettings
+from tipgstac.timing import timer
 
 features_settings = FeaturesSettings()
+api_settings = APISettings()
+
+# Output types streamed from PgSTAC pages
+EXPORT_MEDIA_TYPES = (
+    MediaType.csv,
+    MediaType.arrow,
+    MediaType.parquet,
+    MediaType.fgb,
+)
+
+# Columnar outputs (CSV, Arrow, GeoParquet, FlatGeobuf) schema
+EXPORT_DESCRIPTION = (
+    "CSV, Arrow, GeoParquet and FlatGeobuf outputs have one column per property, "
+    "from the collection(s) queryables (or the requested `properties`) and the "
+    "properties of the first page of items. Without requested `properties`, the "
+    "other item properties (e.g found after the first page) are in a last "
+    "`properties` JSON column."
+)
+
+
+def geometry_options(
+    output_type: MediaType,
+    precision: Optional[int],
+    simplify: Optional[float],
+) -> Dict:
+    """Return the geometry options, using the HTML defaults for HTML responses."""
+    if output_type == MediaType.html:
+        if precision is None:
+            precision = api_settings.html_precision
+
+        if simplify is None:
+            simplify = api_settings.html_simplify
+
+    return {"precision": precision, "simplify": simplify}
+
+
+def compact_search(search: ItemsSearch, output_type: MediaType) -> ItemsSearch:
+    """Restrict the search `fields` to the compact response columns."""
+    if output_type not in (MediaType.geojson, MediaType.json):
+        raise HTTPException(
+            status_code=400,
+            detail="`compact` is only available for `geojson` and `json` outputs.",
+        )
+
+    return search.model_copy(update={"fields": COMPACT_FIELDS})
+
+
+def compact_response(item_list: ItemList, links: List[Dict]) -> ORJSONResponse:
+    """Return items as a JSON array of `[collection, id, bbox, datetime]` arrays."""
+    return ORJSONResponse(
+        {
+            "numberMatched": item_list["matched"],
+            "numberReturned": len(item_list["items"]),
+            "links": links,
+            "columns": COMPACT_COLUMNS,
+            "items": [
+                [
+                    f.get("collection"),
+                    f.get("id"),
+                    f.get("bbox"),
+                    (f.get("properties") or {}).get("datetime"),
+                ]
+                for f in item_list["items"]
+            ],
+        }
+    )
 
 
 @dataclass
@@ -57,6 +149,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
         """Register endpoints."""
         super().register_routes()
         self._searches_routes()
+        self._aggregation_routes()
+        self._coverage_routes()
+        self._batch_routes()
 
     def links(self, request: Request) -> List[model.Link]:
         """add more links."""
@@ -68,15 +163,50 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     request,
                     "search_get",
                 ),
-                type=MediaType.geojson,
+                type=MediaType.geojson,  # type: ignore
                 rel="data",
             ),
         ]
 
+    def _create_html_response(self, request: Request, data: str, template_name: str):
+        """Render HTML template (timed as the `serialize` phase)."""
+        with timer("serialize"):
+            return super()._create_html_response(request, data, template_name)
+
+    def _export_response(
+        self,
+        pages: AsyncIterator[List[Dict]],
+        output_type: MediaType,
+        queryables: Optional[Dict] = None,
+        properties: Optional[List[str]] = None,
+        filename: str = "items",
+    ) -> StreamingResponse:
+        """Stream items pages as CSV, Arrow IPC, GeoParquet or FlatGeobuf."""
+        if output_type == MediaType.csv:
+            content = stream_csv(pages, queryables=queryables, properties=properties)
+        elif output_type == MediaType.fgb:
+            content = stream_fgb(pages, queryables=queryables, properties=properties)
+        else:
+            content = stream_arrow(
+                pages,
+                queryables=queryables,
+                properties=properties,
+                geoparquet=output_type == MediaType.parquet,
+            )
+
+        return StreamingResponse(
+            content,
+            media_type=output_type,
+            headers={
+                "Content-Disposition": f"attachment;filename={filename}.{output_type.name}"
+            },
+        )
+
     def _items_route(self):  # noqa: C901
         @self.router.get(
             "/collections/{collectionId}/items",
             response_class=GeoJSONResponse,
+            description=EXPORT_DESCRIPTION,
             responses={
                 200: {
                     "content": {
@@ -86,6 +216,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                         MediaType.json.value: {},
                         MediaType.geojsonseq.value: {},
                         MediaType.ndjson.value: {},
+                        MediaType.arrow.value: {},
+                        MediaType.parquet.value: {},
+                        MediaType.fgb.value: {},
                     },
                     "model": model.Items,
                 },
@@ -126,11 +259,14 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
             output_type: Annotated[
                 Optional[MediaType], Depends(ItemsOutputType)
             ] = None,
+            precision: Annotated[Optional[int], Depends(precision_query)] = None,
+            simplify: Annotated[Optional[float], Depends(simplify_query)] = None,
+            compact: Annotated[bool, Depends(compact_query)] = False,
         ):
             output_type = output_type or MediaType.geojson
+            options = geometry_options(output_type, precision, simplify)
 
-            item_list = await collection.features(
-                request.app.state.pool,
+            search = collection.search(
                 ids_filter=ids_filter,
                 bbox_filter=bbox_filter,
                 datetime_filter=datetime_filter,
@@ -141,9 +277,23 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                 token=offset,
                 query=query,
             )
+            if compact:
+                search = compact_search(search, output_type)
+
+            # CSV/Arrow/GeoParquet/FlatGeobuf Response
+            if output_type in EXPORT_MEDIA_TYPES:
+                return self._export_response(
+                    search_pages(request.app.state.pool, search=search, **options),
+                    output_type,
+                    queryables=collection.stac_queryables,
+                    properties=properties,
+                )
 
-            if output_type in (
-                MediaType.csv,
+            item_list = await pgstac_search(
+                request.app.state.pool, search=search, **options
+            )
+
+            if not compact and output_type in (
                 MediaType.json,
                 MediaType.ndjson,
             ):
@@ -171,16 +321,6 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                         for f in item_list["items"]
                     )
 
-                # CSV Response
-                if output_type == MediaType.csv:
-                    return StreamingResponse(
-                        factory.create_csv_rows(rows),
-                        media_type=MediaType.csv,
-                        headers={
-                            "Content-Disposition": "attachment;filename=items.csv"
-                        },
-                    )
-
                 # JSON Response
                 if output_type == MediaType.json:
                     return ORJSONResponse(list(rows))
@@ -249,6 +389,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     },
                 )
 
+            if compact:
+                return compact_response(item_list, links)
+
             data = {
                 "type": "FeatureCollection",
                 "id": collection.id,
@@ -335,15 +478,14 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
             ],
             itemId: Annotated[str, Path(description="Item identifier")],
             properties: Optional[List[str]] = Depends(properties_query),
-            output_type: Annotated[
-                Optional[MediaType], Depends(ItemsOutputType)
-            ] = None,
+            output_type: Annotated[Optional[MediaType], Depends(ItemOutputType)] = None,
         ):
             output_type = output_type or MediaType.geojson
             item_list = await collection.features(
                 pool=request.app.state.pool,
                 ids_filter=[itemId],
                 properties=properties,
+                **geometry_options(output_type, None, None),
             )
 
             if not item_list["items"]:
@@ -430,6 +572,7 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
         @self.router.get(
             "/search",
             response_class=GeoJSONResponse,
+            description=EXPORT_DESCRIPTION,
             responses={
                 200: {
                     "content": {
@@ -439,6 +582,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                         MediaType.json.value: {},
                         MediaType.geojsonseq.value: {},
                         MediaType.ndjson.value: {},
+                        MediaType.arrow.value: {},
+                        MediaType.parquet.value: {},
+                        MediaType.fgb.value: {},
                     },
                     "model": model.Items,
                 },
@@ -447,113 +593,47 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
         )
         async def search_get(  # noqa: C901
             request: Request,
-            collections_filter: Annotated[
-                Optional[List[str]], Depends(collections_query)
-            ],
-            ids_filter: Annotated[Optional[List[str]], Depends(ids_query)],
-            bbox_filter: Annotated[Optional[List[float]], Depends(bbox_query)],
-            datetime_filter: Annotated[Optional[List[str]], Depends(datetime_query)],
-            properties: Annotated[Optional[List[str]], Depends(properties_query)],
-            cql_filter: Annotated[Optional[AstType], Depends(filter_query)],
-            sortby: Annotated[Optional[str], Depends(sortby_query)],
-            query: Annotated[
-                Optional[str],
-                Query(
-                    description="Additional filtering based on the properties of Item objects."
-                ),
-            ] = None,
-            limit: Annotated[
-                int,
-                Query(
-                    ge=0,
-                    le=features_settings.max_features_per_query,
-                    description="Limits the number of features in the response.",
-                ),
-            ] = features_settings.default_features_limit,
-            offset: Annotated[
-                Optional[str],
-                Query(
-                    description="Starts the response at an specific item.",
-                ),
-            ] = None,
+            search: Annotated[ItemsSearch, Depends(ItemsSearchParams)],
             output_type: Annotated[
                 Optional[MediaType], Depends(ItemsOutputType)
             ] = None,
+            precision: Annotated[Optional[int], Depends(precision_query)] = None,
+            simplify: Annotated[Optional[float], Depends(simplify_query)] = None,
+            compact: Annotated[bool, Depends(compact_query)] = False,
+            snapshot: Annotated[bool, Depends(snapshot_query)] = False,
         ):
             """PgSTAC GET Search endpoint."""
             output_type = output_type or MediaType.geojson
+            options = geometry_options(output_type, precision, simplify)
+            if compact:
+                search = compact_search(search, output_type)
+
+            # CSV/Arrow/GeoParquet/FlatGeobuf Response
+            if output_type in EXPORT_MEDIA_TYPES:
+                catalog = getattr(request.app.state, "collection_catalog", None)
+                return self._export_response(
+                    search_pages(
+                        request.app.state.pool,
+                        search=search,
+                        catalog=catalog,
+                        **options,
+                    ),
+                    output_type,
+                    queryables=await search_queryables(
+                        request.app.state.pool, search.collections
+                    ),
+                    filename="search",
+                )
 
-            if datetime_filter:
-                if len(datetime_filter) == 2:
-                    start = (
-                        parse_rfc3339(datetime_filter[0])
-                        if datetime_filter[0] not in ["..", ""]
-                        else None
-                    )
-                    end = (
-                        parse_rfc3339(datetime_filter[1])
-                        if datetime_filter[1] not in ["..", ""]
-                        else None
-                    )
-
-                    if start is None and end is None:
-                        raise InvalidDatetime(
-                            "Double open-ended datetime intervals are not allowed."
-                        )
-
-                    if start is not None and end is not None and start > end:
-                        raise InvalidDatetime(
-                            "Start datetime cannot be before end datetime."
-                        )
-
-                datetime_filter = "/".join(datetime_filter)  # type: ignore
-
-            base_args = {
-                "collections": collections_filter,
-                "ids": ids_filter,
-                "bbox": bbox_filter,
-                "limit": limit or features_settings.default_features_limit,
-                "token": offset,
-                "query": json.loads(unquote_plus(query)) if query else query,
-            }
-
-            if cql_filter:
-                base_args["filter"] = json.loads(to_cql2(cql_filter))
-                base_args["filter-lang"] = "cql2-json"
-
-            if datetime_filter:
-                base_args["datetime"] = datetime_filter
-
-            if sortby:
-                sort_param = []
-                for s in sortby.strip().split(","):
-                    if part := re.match("^(?P<direction>[+-]?)(?P<prop>.*)$", s):
-                        parts = part.groupdict()
-                        direction = parts["direction"]
-                        prop = parts["prop"].strip()
-                        sort_param.append(
-                            {
-                                "field": prop,
-                                "direction": "desc" if direction == "-" else "asc",
-                            }
-                        )
-
-                base_args["sortby"] = sort_param
-
-            if properties:
-                base_args["fields"] = {"include": set(properties)}
-
-            clean = {}
-            for k, v in base_args.items():
-                if v is not None and v != []:
-                    clean[k] = v
-
-            search = ItemsSearch.model_validate(clean)
-
-            item_list = await pgstac_search(request.app.state.pool, search=search)
+            item_list = await pgstac_search(
+                request.app.state.pool,
+                search=search,
+                catalog=getattr(request.app.state, "collection_catalog", None),
+                snapshot=snapshot,
+                **options,
+            )
 
-            if output_type in (
-                MediaType.csv,
+            if not compact and output_type in (
                 MediaType.json,
                 MediaType.ndjson,
             ):
@@ -573,16 +653,6 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     for f in item_list["items"]
                 )
 
-                # CSV Response
-                if output_type == MediaType.csv:
-                    return StreamingResponse(
-                        factory.create_csv_rows(rows),
-                        media_type=MediaType.csv,
-                        headers={
-                            "Content-Disposition": "attachment;filename=items.csv"
-                        },
-                    )
-
                 # JSON Response
                 if output_type == MediaType.json:
                     return ORJSONResponse(list(rows))
@@ -638,6 +708,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     },
                 )
 
+            if compact:
+                return compact_response(item_list, links)
+
             data = {
                 "type": "FeatureCollection",
                 "description": json.dumps({**request.query_params}),
@@ -697,6 +770,7 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
         @self.router.post(
             "/search",
             response_class=GeoJSONResponse,
+            description=EXPORT_DESCRIPTION,
             responses={
                 200: {
                     "content": {
@@ -706,6 +780,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                         MediaType.json.value: {},
                         MediaType.geojsonseq.value: {},
                         MediaType.ndjson.value: {},
+                        MediaType.arrow.value: {},
+                        MediaType.parquet.value: {},
+                        MediaType.fgb.value: {},
                     },
                     "model": PostItems,
                 },
@@ -721,15 +798,45 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
             output_type: Annotated[
                 Optional[MediaType], Depends(PostSearchOutputType)
             ] = None,
+            precision: Annotated[Optional[int], Depends(precision_query)] = None,
+            simplify: Annotated[Optional[float], Depends(simplify_query)] = None,
+            compact: Annotated[bool, Depends(compact_query)] = False,
+            snapshot: Annotated[bool, Depends(snapshot_query)] = False,
         ):
             """PgSTAC POST Search endpoint."""
             output_type = output_type or MediaType.geojson
+            options = geometry_options(output_type, precision, simplify)
 
             search = search or ItemsSearch()
-            item_list = await pgstac_search(request.app.state.pool, search=search)
+            if compact:
+                search = compact_search(search, output_type)
+
+            # CSV/Arrow/GeoParquet/FlatGeobuf Response
+            if output_type in EXPORT_MEDIA_TYPES:
+                catalog = getattr(request.app.state, "collection_catalog", None)
+                return self._export_response(
+                    search_pages(
+                        request.app.state.pool,
+                        search=search,
+                        catalog=catalog,
+                        **options,
+                    ),
+                    output_type,
+                    queryables=await search_queryables(
+                        request.app.state.pool, search.collections
+                    ),
+                    filename="search",
+                )
 
-            if output_type in (
-                MediaType.csv,
+            item_list = await pgstac_search(
+                request.app.state.pool,
+                search=search,
+                catalog=getattr(request.app.state, "collection_catalog", None),
+                snapshot=snapshot,
+                **options,
+            )
+
+            if not compact and output_type in (
                 MediaType.json,
                 MediaType.ndjson,
             ):
@@ -749,16 +856,6 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     for f in item_list["items"]
                 )
 
-                # CSV Response
-                if output_type == MediaType.csv:
-                    return StreamingResponse(
-                        factory.create_csv_rows(rows),
-                        media_type=MediaType.csv,
-                        headers={
-                            "Content-Disposition": "attachment;filename=items.csv"
-                        },
-                    )
-
                 # JSON Response
                 if output_type == MediaType.json:
                     return ORJSONResponse(list(rows))
@@ -780,12 +877,16 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     "href": self.url_for(request, "search_get") + qs,
                     "rel": "self",
                     "type": "application/geo+json",
-                    "body": search.model_dump(exclude_unset=True, exclude_none=True),
+                    "body": search.model_dump(
+                        exclude_unset=True, exclude_none=True, mode="json"
+                    ),
                 },
             ]
             if next_token := item_list["next"]:
                 url = self.url_for(request, "search_post") + qs
-                body = search.model_dump(exclude_unset=True, exclude_none=True)
+                body = search.model_dump(
+                    exclude_unset=True, exclude_none=True, mode="json"
+                )
                 body["token"] = next_token
                 links.append(
                     {
@@ -799,7 +900,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
 
             if item_list["prev"] is not None:
                 url = self.url_for(request, "search_post") + qs
-                body = search.model_dump(exclude_unset=True, exclude_none=True)
+                body = search.model_dump(
+                    exclude_unset=True, exclude_none=True, mode="json"
+                )
                 body["token"] = item_list["prev"]
                 links.append(
                     {
@@ -811,6 +914,9 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
                     },
                 )
 
+            if compact:
+                return compact_response(item_list, links)
+
             data = {
                 "type": "FeatureCollection",
                 "description": search.model_dump_json(
@@ -868,3 +974,289 @@ class OGCFeaturesFactory(factory.OGCFeaturesFactory):
 
             # Default to GeoJSON Response
             return GeoJSONResponse(data)
+
+    def _aggregation_routes(self):
+        @self.router.get(
+            "/aggregate",
+            response_class=ORJSONResponse,
+            tags=["OGC Features API"],
+        )
+        async def aggregate_get(
+            request: Request,
+            search: Annotated[ItemsSearch, Depends(ItemsSearchParams)],
+            aggregations: Annotated[
+                Optional[List[Aggregation]], Depends(aggregations_query)
+            ] = None,
+        ):
+            """PgSTAC GET Aggregation endpoint."""
+            agg_search = AggregationSearch.model_validate(
+                {
+                    **search.model_dump(exclude_none=True, by_alias=True),
+                    **({"aggregations": aggregations} if aggregations else {}),
+                }
+            )
+
+            qs = "?" + str(request.query_params) if request.query_params else ""
+            return {
+                "type": "AggregationCollection",
+                "aggregations": await pgstac_aggregate(
+                    request.app.state.pool, search=agg_search
+                ),
+                "links": [
+                    {
+                        "title": "Aggregate",
+                        "href": self.url_for(request, "aggregate_get") + qs,
+                        "rel": "self",
+                        "type": "application/json",
+                    },
+                ],
+            }
+
+        @self.router.post(
+            "/aggregate",
+            response_class=ORJSONResponse,
+            tags=["OGC Features API"],
+        )
+        async def aggregate_post(
+            request: Request,
+            search: Annotated[
+                Optional[AggregationSearch],
+                Body(description="PgSTAC Search with aggregations."),
+            ] = None,
+        ):
+            """PgSTAC POST Aggregation endpoint."""
+            search = search or AggregationSearch()
+
+            return {
+                "type": "AggregationCollection",
+                "aggregations": await pgstac_aggregate(
+                    request.app.state.pool, search=search
+                ),
+                "links": [
+                    {
+                        "title": "Aggregate",
+                        "href": self.url_for(request, "aggregate_post"),
+                        "rel": "self",
+                        "type": "application/json",
+                        "body": search.model_dump(
+                            exclude_unset=True, exclude_none=True
+                        ),
+                    },
+                ],
+            }
+
+    def _coverage_routes(self):
+        @self.router.get(
+            "/coverage",
+            response_class=GeoJSONResponse,
+            tags=["OGC Features API"],
+        )
+        async def coverage_get(
+            request: Request,
+            search: Annotated[ItemsSearch, Depends(ItemsSearchParams)],
+            simplify: Annotated[
+                Optional[float],
+                Query(
+                    ge=0,
+                    description="Simplify the coverage geometry using a tolerance in degrees.",
+                ),
+            ] = None,
+            precision: Annotated[
+                int,
+                Query(
+                    ge=0,
+                    le=15,
+                    description="Maximum number of decimal digits of the coverage coordinates.",
+                ),
+            ] = 9,
+        ):
+            """PgSTAC GET Coverage endpoint."""
+            cov_search = CoverageSearch.model_validate(
+                {
+                    **search.model_dump(exclude_none=True, by_alias=True),
+                    "simplify": simplify,
+                    "precision": precision,
+                }
+            )
+
+            qs = "?" + str(request.query_params) if request.query_params else ""
+            return {
+                **await pgstac_coverage(request.app.state.pool, search=cov_search),
+                "links": [
+                    {
+                        "title": "Coverage",
+                        "href": self.url_for(request, "coverage_get") + qs,
+                        "rel": "self",
+                        "type": "application/geo+json",
+                    },
+                ],
+            }
+
+        @self.router.post(
+            "/coverage",
+            response_class=GeoJSONResponse,
+            tags=["OGC Features API"],
+        )
+        async def coverage_post(
+            request: Request,
+            search: Annotated[
+                Optional[CoverageSearch],
+                Body(description="PgSTAC Search with coverage options."),
+            ] = None,
+        ):
+            """PgSTAC POST Coverage endpoint."""
+            search = search or CoverageSearch()
+
+            return {
+                **await pgstac_coverage(request.app.state.pool, search=search),
+                "links": [
+                    {
+                        "title": "Coverage",
+                        "href": self.url_for(request, "coverage_post"),
+                        "rel": "self",
+                        "type": "application/geo+json",
+                        "body": search.model_dump(
+                            exclude_unset=True, exclude_none=True
+                        ),
+                    },
+                ],
+            }
+
+    def _batch_routes(self):
+        @self.router.post(
+            "/batch/items",
+            response_class=GeoJSONResponse,
+            tags=["OGC Features API"],
+        )
+        async def batch_items(
+            request: Request,
+            batch: Annotated[
+                BatchItems,
+                Body(description="List of (collection, id) Item references."),
+            ],
+        ):
+            """Fetch many Items, from one or more collections, in one request."""
+            references = [ref.model_dump() for ref in batch.items]
+            results = await pgstac_items(request.app.state.pool, references)
+
+            features = []
+            missing = []
+            for index, (ref, feature) in enumerate(zip(references, results)):
+                if feature is None:
+                    missing.append({**ref, "index": index})
+                    continue
+
+                features.append(
+                    {
+                        **feature,
+                        "links": [
+                            {
+                                "title": "Collection",
+                                "href": self.url_for(
+                                    request,
+                                    "collection",
+                                    collectionId=feature["collection"],
+                                ),
+                                "rel": "collection",
+                                "type": "application/json",
+                            },
+                            {
+                                "title": "Item",
+                                "href": self.url_for(
+                                    request,
+                                    "item",
+                                    collectionId=feature["collection"],
+                                    itemId=feature["id"],
+                                ),
+                                "rel": "item",
+                                "type": "application/geo+json",
+                            },
+                        ],
+                    }
+                )
+
+            return {
+                "type": "FeatureCollection",
+                "numberRequested": len(references),
+                "numberReturned": len(features),
+                "features": features,
+                "missing": missing,
+            }
+
+        @self.router.post(
+            "/batch/search",
+            response_class=ORJSONResponse,
+            tags=["OGC Features API"],
+        )
+        async def batch_search(
+            request: Request,
+            batch: Annotated[
+                BatchSearch,
+                Body(description="List of PgSTAC Searches."),
+            ],
+        ):
+            """Run many PgSTAC Searches concurrently."""
+            searches = validate_searches(batch.searches)
+            results = await pgstac_searches(
+                request.app.state.pool,
+                searches=searches,
+                catalog=getattr(request.app.state, "collection_catalog", None),
+            )
+
+            return [
+                self._batch_search_response(request, search, result)
+                for search, result in zip(searches, results)
+            ]
+
+    def _batch_search_response(
+        self,
+        request: Request,
+        search: Union[ItemsSearch, BaseException],
+        result: Union[ItemList, BaseException],
+    ) -> Dict:
+        """Create the response of one of the searches of a batch."""
+        if isinstance(result, HTTPException):
+            return {"status": result.status_code, "detail": result.detail}
+
+        if isinstance(result, TiPgError):
+            return {
+                "status": DEFAULT_STATUS_CODES.get(type(result), 500),
+                "detail": str(result),
+            }
+
+        if isinstance(result, BaseException):
+            return {"status": 500, "detail": "Internal Server Error"}
+
+        links: List[Dict] = []
+        for rel, token in [("next", result["next"]), ("prev", result["prev"])]:
+            if token is None:
+                continue
+
+            body = search.model_dump(  # type: ignore
+                exclude_unset=True, exclude_none=True, mode="json"
+            )
+            body["token"] = token
+            links.append(
+                {
+                    "href": self.url_for(request, "search_post"),
+                    "rel": rel,
+                    "type": "application/geo+json",
+                    "body": body,
+                }
+            )
+
+        return {
+            "status": 200,
+            "type": "FeatureCollection",
+            "numberMatched": result["matched"],
+            "numberReturned": len(result["items"]),
+            "links": links,
+            "features": result["items"],
+        }
+
+
+@dataclass
+class OGCTilesFactory(factory.OGCTilesFactory):
+    """Use PgSTAC collection dependency for the Tiles endpoints."""
+
+    collection_dependency: Callable[..., PgSTACCollection] = CollectionParams
@@ -0,0 +1,395 @@
+"""tipgstac.fgb: FlatGeobuf output.
+
+ref: https://flatgeobuf.org
+
+Requires `flatbuffers` (`pip install tipgstac[fgb]`).
+
+When the whole result fits in `TIPG_STAC_EXPORT_FGB_INDEX_MAX_FEATURES` items, the
+features are sorted along a Hilbert curve and the file includes a packed Hilbert
+R-Tree index (enabling HTTP range reads in QGIS/GDAL), otherwise features are
+streamed page by page without index.
+
+"""
+
+import math
+import struct
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from tipgstac.collections import geometry_bounds
+from tipgstac.export import CONVERTERS, Field, property_values, schema_fields
+from tipgstac.settings import ExportSettings
+
+try:
+    import flatbuffers
+
+except ImportError:  # pragma: nocover
+    flatbuffers = None  # type: ignore
+
+
+export_settings = ExportSettings()
+
+MAGIC_BYTES = b"fgb\x03fgb\x00"
+NODE_SIZE = 16
+HILBERT_MAX = (1 << 16) - 1
+
+GEOMETRY_TYPES = {
+    "Point": 1,
+    "LineString": 2,
+    "Polygon": 3,
+    "MultiPoint": 4,
+    "MultiLineString": 5,
+    "MultiPolygon": 6,
+    "GeometryCollection": 7,
+}
+
+COLUMN_TYPES = {
+    "boolean": 2,  # Bool
+    "integer": 7,  # Long
+    "number": 10,  # Double
+    "string": 11,  # String
+    "json": 12,  # Json
+    "datetime": 13,  # DateTime
+}
+
+
+def _string_value(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack("<I", len(data)) + data
+
+
+def _encode_value(dtype: str, value) -> bytes:
+    if dtype == "boolean":
+        return struct.pack("<?", value)
+
+    if dtype == "integer":
+        return struct.pack("<q", value)
+
+    if dtype == "number":
+        return struct.pack("<d", value)
+
+    if dtype == "datetime":
+        return _string_value(value.isoformat())
+
+    return _string_value(value)
+
+
+def _properties(item: Dict, fields: List[Field]) -> bytes:
+    """Encode item attributes as FlatGeobuf properties: (column index, value)."""
+    values = [("string", item.get("id")), ("string", item.get("collection"))]
+    values.extend(
+        (f.type, CONVERTERS[f.type](value))
+        for f, value in zip(fields, property_values(item, fields))
+    )
+
+    return b"".join(
+        struct.pack("<H", i) + _encode_value(dtype, value)
+        for i, (dtype, value) in enumerate(values)
+        if value is not None
+    )
+
+
+def _vector(builder, values: Sequence, size: int, prepend) -> int:
+    builder.StartVector(size, len(values), size)
+    for v in reversed(values):
+        prepend(v)
+
+    return builder.EndVector()
+
+
+def _geometry(builder, geometry: Dict) -> int:
+    """Write FlatGeobuf Geometry table (2D)."""
+    gtype = geometry["type"]
+
+    if gtype in ["MultiPolygon", "GeometryCollection"]:
+        if gtype == "MultiPolygon":
+            parts = [
+                {"type": "Polygon", "coordinates": c} for c in geometry["coordinates"]
+            ]
+        else:
+            parts = geometry["geometries"]
+
+        offsets = [_geometry(builder, part) for part in parts]
+        parts_vector = _vector(builder, offsets, 4, builder.PrependUOffsetTRelative)
+
+        builder.StartObject(8)
+        builder.PrependUOffsetTRelativeSlot(7, parts_vector, 0)
+        builder.PrependUint8Slot(6, GEOMETRY_TYPES[gtype], 0)
+        return builder.EndObject()
+
+    coords = geometry["coordinates"]
+    if gtype == "Point":
+        rings = [[coords]]
+    elif gtype in ["LineString", "MultiPoint"]:
+        rings = [coords]
+    else:
+        rings = coords
+
+    xy = [v for ring in rings for c in ring for v in c[:2]]
+    xy_vector = _vector(builder, xy, 8, builder.PrependFloat64)
+
+    ends_vector = None
+    if len(rings) > 1:
+        ends: List[int] = []
+        for ring in rings:
+            ends.append((ends[-1] if ends else 0) + len(ring))
+
+        ends_vector = _vector(builder, ends, 4, builder.PrependUint32)
+
+    builder.StartObject(8)
+    builder.PrependUOffsetTRelativeSlot(1, xy_vector, 0)
+    if ends_vector is not None:
+        builder.PrependUOffsetTRelativeSlot(0, ends_vector, 0)
+    builder.PrependUint8Slot(6, GEOMETRY_TYPES[gtype], 0)
+    return builder.EndObject()
+
+
+def feature(item: Dict, fields: List[Field]) -> bytes:
+    """Encode an item as a size prefixed FlatGeobuf Feature."""
+    builder = flatbuffers.Builder(1024)
+
+    geometry = None
+    if item.get("geometry"):
+        geometry = _geometry(builder, item["geometry"])
+
+    properties = builder.CreateByteVector(_properties(item, fields))
+
+    builder.StartObject(3)
+    builder.PrependUOffsetTRelativeSlot(1, properties, 0)
+    if geometry is not None:
+        builder.PrependUOffsetTRelativeSlot(0, geometry, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+
+    return bytes(builder.Output())
+
+
+def header(
+    fields: List[Field],
+    features_count: int = 0,
+    envelope: Optional[List[float]] = None,
+    indexed: bool = False,
+) -> bytes:
+    """Encode the size prefixed FlatGeobuf Header."""
+    assert (
+        flatbuffers is not None
+    ), "`flatbuffers` must be installed to create FlatGeobuf outputs"
+
+    builder = flatbuffers.Builder(1024)
+
+    columns = []
+    for name, dtype in [
+        ("id", "string"),
+        ("collection", "string"),
+        *[(f.name, f.type) for f in fields],
+    ]:
+        column_name = builder.CreateString(name)
+        builder.StartObject(11)
+        builder.PrependUOffsetTRelativeSlot(0, column_name, 0)
+        builder.PrependUint8Slot(1, COLUMN_TYPES[dtype], 0)
+        columns.append(builder.EndObject())
+
+    columns_vector = _vector(builder, columns, 4, builder.PrependUOffsetTRelative)
+
+    org = builder.CreateString("EPSG")
+    builder.StartObject(6)
+    builder.PrependUOffsetTRelativeSlot(0, org, 0)
+    builder.PrependInt32Slot(1, 4326, 0)
+    crs = builder.EndObject()
+
+    envelope_vector = None
+    if envelope:
+        envelope_vector = _vector(builder, envelope, 8, builder.PrependFloat64)
+
+    name = builder.CreateString("items")
+
+    builder.StartObject(14)
+    builder.PrependUOffsetTRelativeSlot(0, name, 0)
+    if envelope_vector is not None:
+        builder.PrependUOffsetTRelativeSlot(1, envelope_vector, 0)
+    # Geometry type is set for each feature
+    builder.PrependUint8Slot(2, 0, 0)
+    builder.PrependUOffsetTRelativeSlot(7, columns_vector, 0)
+    builder.PrependUint64Slot(8, features_count, 0)
+    # `index_node_size` defaults to 16, 0 means no index
+    builder.PrependUint16Slot(9, NODE_SIZE if indexed else 0, NODE_SIZE)
+    builder.PrependUOffsetTRelativeSlot(10, crs, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+
+    return bytes(builder.Output())
+
+
+def hilbert(x: int, y: int) -> int:
+    """Return the position of (x, y) on a 16 bits Hilbert curve."""
+    a = x ^ y
+    b = 0xFFFF ^ a
+    c = 0xFFFF ^ (x | y)
+    d = x & (y ^ 0xFFFF)
+
+    A = a | (b >> 1)
+    B = (a >> 1) ^ a
+    C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+    D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 2)) ^ (b & (b >> 2))
+    B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+    C ^= (a & (c >> 2)) ^ (b & (d >> 2))
+    D ^= (b & (c >> 2)) ^ ((a ^ b) & (d >> 2))
+
+    a, b, c, d = A, B, C, D
+    A = (a & (a >> 4)) ^ (b & (b >> 4))
+    B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+    C ^= (a & (c >> 4)) ^ (b & (d >> 4))
+    D ^= (b & (c >> 4)) ^ ((a ^ b) & (d >> 4))
+
+    a, b, c, d = A, B, C, D
+    C ^= (a & (c >> 8)) ^ (b & (d >> 8))
+    D ^= (b & (c >> 8)) ^ ((a ^ b) & (d >> 8))
+
+    a = C ^ (C >> 1)
+    b = D ^ (D >> 1)
+
+    i0 = x ^ y
+    i1 = b | (0xFFFF ^ (i0 | a))
+
+    i0 = (i0 | (i0 << 8)) & 0x00FF00FF
+    i0 = (i0 | (i0 << 4)) & 0x0F0F0F0F
+    i0 = (i0 | (i0 << 2)) & 0x33333333
+    i0 = (i0 | (i0 << 1)) & 0x55555555
+
+    i1 = (i1 | (i1 << 8)) & 0x00FF00FF
+    i1 = (i1 | (i1 << 4)) & 0x0F0F0F0F
+    i1 = (i1 | (i1 << 2)) & 0x33333333
+    i1 = (i1 | (i1 << 1)) & 0x55555555
+
+    return ((i1 << 1) | i0) & 0xFFFFFFFF
+
+
+def _level_bounds(num_items: int) -> List[Tuple[int, int]]:
+    """Return [start, end) node positions of each tree level, leaves first."""
+    n = num_items
+    level_num_nodes = [n]
+    while True:
+        n = math.ceil(n / NODE_SIZE)
+        level_num_nodes.append(n)
+        if n == 1:
+            break
+
+    num_nodes = sum(level_num_nodes)
+
+    bounds = []
+    for size in level_num_nodes:
+        num_nodes -= size
+        bounds.append((num_nodes, num_nodes + size))
+
+    return bounds
+
+
+def packed_rtree(boxes: List[List[float]], offsets: List[int]) -> bytes:
+    """Encode the packed Hilbert R-Tree of the (sorted) features."""
+    levels = _level_bounds(len(boxes))
+    num_nodes = levels[0][1]
+    nodes: List[Tuple[float, float, float, float, int]] = [(0, 0, 0, 0, 0)] * num_nodes
+
+    start = levels[0][0]
+    for i, (box, offset) in enumerate(zip(boxes, offsets)):
+        nodes[start + i] = (box[0], box[1], box[2], box[3], offset)
+
+    for (pos, end), (parent, _) in zip(levels[:-1], levels[1:]):
+        while pos < end:
+            children = nodes[pos : min(pos + NODE_SIZE, end)]
+            nodes[parent] = (
+                min(n[0] for n in children),
+                min(n[1] for n in children),
+                max(n[2] for n in children),
+                max(n[3] for n in children),
+                pos,
+            )
+            pos += NODE_SIZE
+            parent += 1
+
+    return b"".join(struct.pack("<4dQ", *node) for node in nodes)
+
+
+def indexed_file(items: List[Dict], fields: List[Field]) -> bytes:
+    """Encode items as a FlatGeobuf file with a packed Hilbert R-Tree index."""
+    # Features without geometry can't be indexed
+    if not items or not all(item.get("geometry") for item in items):
+        return (
+            MAGIC_BYTES
+            + header(fields)
+            + b"".join(feature(item, fields) for item in items)
+        )
+
+    boxes = [geometry_bounds(item["geometry"]) for item in items]
+    extent = [
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    ]
+    width = extent[2] - extent[0]
+    height = extent[3] - extent[1]
+
+    def _hilbert(box: List[float]) -> int:
+        x = (
+            int(HILBERT_MAX * ((box[0] + box[2]) / 2 - extent[0]) / width)
+            if width
+            else 0
+        )
+        y = (
+            int(HILBERT_MAX * ((box[1] + box[3]) / 2 - extent[1]) / height)
+            if height
+            else 0
+        )
+        return hilbert(x, y)
+
+    order = sorted(range(len(items)), key=lambda i: _hilbert(boxes[i]), reverse=True)
+
+    features = [feature(items[i], fields) for i in order]
+    offsets = []
+    offset = 0
+    for data in features:
+        offsets.append(offset)
+        offset += len(data)
+
+    return b"".join(
+        [
+            MAGIC_BYTES,
+            header(fields, len(items), envelope=extent, indexed=True),
+            packed_rtree([boxes[i] for i in order], offsets),
+            *features,
+        ]
+    )
+
+
+async def stream_fgb(
+    pages: AsyncIterator[List[Dict]],
+    queryables: Optional[Dict] = None,
+    properties: Optional[List[str]] = None,
+) -> AsyncIterator[bytes]:
+    """Encode pages of items to FlatGeobuf."""
+    max_features = export_settings.fgb_index_max_features
+
+    fields: Optional[List[Field]] = None
+    buffered: List[Dict] = []
+    streaming = False
+
+    async for items in pages:
+        if fields is None:
+            fields = schema_fields(queryables, items, properties)
+
+        if streaming:
+            yield b"".join(feature(item, fields) for item in items)
+            continue
+
+        buffered.extend(items)
+        if len(buffered) > max_features:
+            streaming = True
+            yield MAGIC_BYTES + header(fields)
+            yield b"".join(feature(item, fields) for item in buffered)
+            buffered = []
+
+    if not streaming:
+        yield indexed_file(
+            buffered, fields or schema_fields(queryables, [], properties)
+        )
@@ -0,0 +1,271 @@
+"""tipgstac.index: in-memory spatio-temporal index of collection extents.
+
+The catalog of a PgSTAC database is usually small (a few hundred collections) and
+changes rarely, which means `bbox`/`datetime`/`ids` filtering can be answered from
+memory instead of calling `pgstac.collection_search`.
+
+"""
+
+import math
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from ciso8601 import parse_rfc3339
+
+# Maximum number of entries per R-Tree node
+NODE_CAPACITY = 16
+
+SORTABLE_FIELDS = {"id", "title", "datetime", "start_datetime", "end_datetime"}
+
+
+class Entry(NamedTuple):
+    """Spatio-temporal extent of one collection."""
+
+    id: str
+    title: Optional[str]
+    bbox: Optional[List[float]]
+    start: float
+    end: float
+
+
+class Node(NamedTuple):
+    """R-Tree node: bounding box and children (nodes or entry positions)."""
+
+    bbox: List[float]
+    children: List[Any]
+    leaf: bool
+
+
+def _bbox_union(boxes: Iterable[Sequence[float]]) -> List[float]:
+    xmin = ymin = math.inf
+    xmax = ymax = -math.inf
+    for b in boxes:
+        xmin = min(xmin, b[0])
+        ymin = min(ymin, b[1])
+        xmax = max(xmax, b[2])
+        ymax = max(ymax, b[3])
+
+    return [xmin, ymin, xmax, ymax]
+
+
+def _bbox_intersects(a: Sequence[float], b: Sequence[float]) -> bool:
+    return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+def _split_antimeridian(bbox: Sequence[float]) -> List[List[float]]:
+    """Return 2D bbox(es), splitting boxes crossing the antimeridian."""
+    if len(bbox) == 6:
+        xmin, ymin, _, xmax, ymax, _ = bbox
+    else:
+        xmin, ymin, xmax, ymax = bbox
+
+    if xmin > xmax:
+        return [[xmin, ymin, 180.0, ymax], [-180.0, ymin, xmax, ymax]]
+
+    return [[xmin, ymin, xmax, ymax]]
+
+
+def _timestamp(value: Optional[str], default: float) -> float:
+    if value in [None, "..", ""]:
+        return default
+
+    return parse_rfc3339(value).timestamp()  # type: ignore
+
+
+def datetime_range(interval: List[str]) -> List[float]:
+    """Convert a `datetime_query` value to a [start, end] timestamp range."""
+    if len(interval) == 1:
+        start = end = _timestamp(interval[0], -math.inf)
+    else:
+        start = _timestamp(interval[0], -math.inf)
+        end = _timestamp(interval[1], math.inf)
+
+    return [start, end]
+
+
+class ExtentIndex:
+    """Spatio-temporal index of collection extents.
+
+    Spatial extents are stored in a static (Sort-Tile-Recursive packed) R-Tree and
+    temporal extents in an interval list sorted by start date.
+
+    """
+
+    def __init__(self, collections: Iterable[Dict]):
+        """Build the index from a list of STAC collections."""
+        self.entries: List[Entry] = []
+        for collection in collections:
+            extent = collection.get("extent") or {}
+
+            bbox = None
+            if bboxes := (extent.get("spatial") or {}).get("bbox"):
+                bbox = bboxes[0]
+
+            start, end = -math.inf, math.inf
+            if intervals := (extent.get("temporal") or {}).get("interval"):
+                start = _timestamp(intervals[0][0], -math.inf)
+                end = _timestamp(intervals[0][1], math.inf)
+
+            self.entries.append(
+                Entry(
+                    id=collection["id"],
+                    title=collection.get("title"),
+                    bbox=bbox,
+                    start=start,
+                    end=end,
+                )
+            )
+
+        self.ids = {e.id: i for i, e in enumerate(self.entries)}
+        self._build_rtree()
+        self._build_intervals()
+
+    def __len__(self) -> int:
+        """Number of indexed collections."""
+        return len(self.entries)
+
+    def _build_rtree(self):
+        boxes = [
+            (pos, box)
+            for pos, entry in enumerate(self.entries)
+            if entry.bbox
+            for box in _split_antimeridian(entry.bbox)
+        ]
+        nodes = [Node(bbox=box, children=[pos], leaf=True) for pos, box in boxes]
+
+        # Collections without spatial extent
+        self.unbounded = {
+            pos for pos, entry in enumerate(self.entries) if not entry.bbox
+        }
+        while len(nodes) > NODE_CAPACITY:
+            nodes = self._pack(nodes)
+
+        self.root: Optional[Node] = (
+            Node(bbox=_bbox_union(n.bbox for n in nodes), children=nodes, leaf=False)
+            if nodes
+            else None
+        )
+
+    @staticmethod
+    def _pack(nodes: List[Node]) -> List[Node]:
+        """Sort-Tile-Recursive packing of one R-Tree level."""
+        nparents = math.ceil(len(nodes) / NODE_CAPACITY)
+        nslices = math.ceil(math.sqrt(nparents))
+        slice_size = nslices * NODE_CAPACITY
+
+        nodes = sorted(nodes, key=lambda n: n.bbox[0] + n.bbox[2])
+        parents = []
+        for i in range(0, len(nodes), slice_size):
+            tile = sorted(
+                nodes[i : i + slice_size], key=lambda n: n.bbox[1] + n.bbox[3]
+            )
+            for j in range(0, len(tile), NODE_CAPACITY):
+                children = tile[j : j + NODE_CAPACITY]
+                parents.append(
+                    Node(
+                        bbox=_bbox_union(c.bbox for c in children),
+                        children=children,
+                        leaf=False,
+                    )
+                )
+
+        return parents
+
+    def _build_intervals(self):
+        self.by_start = sorted(
+            range(len(self.entries)), key=lambda pos: self.entries[pos].start
+        )
+        self.starts = [self.entries[pos].start for pos in self.by_start]
+
+    def _spatial(self, bbox: Sequence[float]) -> Set[int]:
+        """Return entry positions whose spatial extent intersects the bbox."""
+        matches: Set[int] = set()
+        if self.root is None:
+            return matches
+
+        boxes = _split_antimeridian(bbox)
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if not any(_bbox_intersects(node.bbox, b) for b in boxes):
+                continue
+
+            if node.leaf:
+                matches.update(node.children)
+            else:
+                stack.extend(node.children)
+
+        return matches
+
+    def _temporal(self, interval: List[str]) -> Set[int]:
+        """Return entry positions whose temporal extent intersects the interval."""
+        start, end = datetime_range(interval)
+
+        # Only collections starting before the end of the interval can match
+        stop = bisect_right(self.starts, end)
+        return {pos for pos in self.by_start[:stop] if self.entries[pos].end >= start}
+
+    def search(
+        self,
+        ids: Optional[List[str]] = None,
+        bbox: Optional[List[float]] = None,
+        datetime: Optional[List[str]] = None,
+        include_unbounded: bool = False,
+    ) -> List[str]:
+        """Return the ids of collections matching all filters, in catalog order.
+
+        With `include_unbounded=True`, collections without spatial extent match any
+        `bbox`.
+
+        """
+        candidates: Optional[Set[int]] = None
+
+        if ids:
+            candidates = {self.ids[i] for i in ids if i in self.ids}
+
+        if bbox:
+            spatial = self._spatial(bbox)
+            if include_unbounded:
+                spatial |= self.unbounded
+            candidates = spatial if candidates is None else candidates & spatial
+
+        if datetime:
+            temporal = self._temporal(datetime)
+            candidates = temporal if candidates is None else candidates & temporal
+
+        if candidates is None:
+            return [e.id for e in self.entries]
+
+        return [self.entries[pos].id for pos in sorted(candidates)]
+
+    def sort(
+        self, ids: List[str], sortby: Optional[List[Dict[str, str]]] = None
+    ) -> List[str]:
+        """Sort collection ids like `pgstac.collection_search` (default: `id`)."""
+        sortby = sortby or [{"field": "id", "direction": "asc"}]
+
+        def _key(field: str):
+            def key(cid: str):
+                entry = self.entries[self.ids[cid]]
+                if field == "id":
+                    return entry.id
+
+                if field == "title":
+                    return entry.title or ""
+
+                if field == "end_datetime":
+                    return entry.end
+
+                return entry.start
+
+            return key
+
+        # Python sort is stable so we sort by the least significant key first
+        for sort in reversed(sortby):
+            ids = sorted(
+                ids,
+                key=_key(sort["field"]),
+                reverse=sort.get("direction") == "desc",
+            )
+
+        return ids
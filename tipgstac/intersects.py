@@ -0,0 +1,118 @@
+"""tipgstac.intersects: `intersects` geometry preprocessing.
+
+Large `intersects` geometries (e.g country boundaries) make each page of a search
+slower. Before a search is sent to PgSTAC, its `intersects` geometry is:
+
+- replaced by a `bbox` filter when it's a simple rectangle
+- simplified (topology preserving) when it has more than
+  `TIPG_STAC_INTERSECTS_SIMPLIFY_THRESHOLD` vertices and
+  `TIPG_STAC_INTERSECTS_SIMPLIFY_TOLERANCE` is set
+- rejected when it still has more than `TIPG_STAC_INTERSECTS_MAX_VERTICES` vertices
+
+Simplified geometries are cached, using the hash of the geometry, so the following
+pages of a search don't simplify the same geometry again.
+
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Union
+
+import orjson
+from aiocache import cached
+from buildpg import asyncpg
+from fastapi import HTTPException
+from geojson_pydantic.geometries import parse_geometry_obj
+
+from tipgstac.models import ItemsSearch
+from tipgstac.settings import CacheSettings, IntersectsSettings
+
+cache_config = CacheSettings()
+intersects_settings = IntersectsSettings()
+
+
+def count_vertices(geometry: Dict) -> int:
+    """Return the number of vertices of a GeoJSON geometry."""
+    if geometry["type"] == "GeometryCollection":
+        return sum(count_vertices(g) for g in geometry["geometries"])
+
+    def _count(coords) -> int:
+        if coords and isinstance(coords[0], (int, float)):
+            return 1
+
+        return sum(_count(c) for c in coords)
+
+    return _count(geometry["coordinates"])
+
+
+def rectangle_bbox(geometry: Dict) -> Optional[List[float]]:
+    """Return the bbox of an axis aligned rectangle Polygon, None otherwise."""
+    if geometry["type"] != "Polygon" or len(geometry["coordinates"]) != 1:
+        return None
+
+    ring = geometry["coordinates"][0]
+    if len(ring) != 5 or ring[0] != ring[-1]:
+        return None
+
+    xs = {c[0] for c in ring}
+    ys = {c[1] for c in ring}
+    if len(xs) != 2 or len(ys) != 2:
+        return None
+
+    # each edge must be vertical or horizontal
+    if not all(a[0] == b[0] or a[1] == b[1] for a, b in zip(ring[:-1], ring[1:])):
+        return None
+
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _geometry_key(_f, db, geometry: str, tolerance: float) -> str:
+    return hashlib.sha256(f"{tolerance}:{geometry}".encode()).hexdigest()
+
+
+@cached(ttl=cache_config.ttl, key_builder=_geometry_key)
+async def simplify_geometry(
+    db: Union[asyncpg.BuildPgPool, asyncpg.BuildPgConnection],
+    geometry: str,
+    tolerance: float,
+) -> Dict:
+    """Simplify a GeoJSON geometry in the database (preserving topology)."""
+    return await db.fetchval(
+        """
+        SELECT ST_AsGeoJSON(
+            ST_SimplifyPreserveTopology(ST_GeomFromGeoJSON($1::text), $2::float)
+        )::jsonb;
+        """,
+        geometry,
+        tolerance,
+    )
+
+
+async def preprocess_intersects(
+    db: Union[asyncpg.BuildPgPool, asyncpg.BuildPgConnection],
+    search: ItemsSearch,
+) -> ItemsSearch:
+    """Replace, simplify or reject the `intersects` geometry of a search."""
+    if search.intersects is None:
+        return search
+
+    geometry = search.intersects.model_dump(exclude_none=True)
+    if bbox := rectangle_bbox(geometry):
+        return search.model_copy(update={"intersects": None, "bbox": bbox})
+
+    vertices = count_vertices(geometry)
+    tolerance = intersects_settings.simplify_tolerance
+    if tolerance and vertices > intersects_settings.simplify_threshold:
+        geometry = await simplify_geometry(
+            db, geometry=orjson.dumps(geometry).decode(), tolerance=tolerance
+        )
+        vertices = count_vertices(geometry)
+        search = search.model_copy(update={"intersects": parse_geometry_obj(geometry)})
+
+    max_vertices = intersects_settings.max_vertices
+    if max_vertices and vertices > max_vertices:
+        raise HTTPException(
+            status_code=400,
+            detail=f"`intersects` geometry has too many vertices ({vertices}), the maximum is {max_vertices}.",
+        )
+
+    return search
@@ -0,0 +1,219 @@
+"""tipgstac.keyset: stateless keyset pagination.
+
+PgSTAC `next`/`prev` tokens reference an item which has to be looked up to resolve
+the page (and which might have been deleted since). When a search is sorted by
+`datetime` and/or `id` (the default order is `datetime` desc, `id` desc), pages are
+instead requested with a CQL2 filter on the sort values of the last (or first) item
+of the previous page, encoded in a `keyset:` token. Item ids are only unique within a
+collection, so `collection` is always added as the last sort field.
+
+"""
+
+import base64
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException
+
+from tipg.collections import ItemList
+from tipgstac.models import ItemsSearch
+
+KEYSET_PREFIX = "keyset:"
+
+# Sort orders supported by keyset pagination (as sorted `field` names, without the
+# `collection` tie-breaker)
+KEYSET_FIELDS = [["datetime", "id"], ["id"]]
+
+DEFAULT_SORTBY = [
+    {"field": "datetime", "direction": "desc"},
+    {"field": "id", "direction": "desc"},
+    {"field": "collection", "direction": "desc"},
+]
+
+
+def is_keyset_token(token: Optional[str]) -> bool:
+    """Check if a token is a keyset token."""
+    return bool(token and token.startswith(KEYSET_PREFIX))
+
+
+def encode_keyset_token(direction: str, values: List, matched: Optional[int]) -> str:
+    """Create keyset token."""
+    data = orjson.dumps({"d": direction, "v": values, "m": matched})
+    return KEYSET_PREFIX + base64.urlsafe_b64encode(data).decode()
+
+
+def decode_keyset_token(token: str) -> Dict:
+    """Decode keyset token."""
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(token[len(KEYSET_PREFIX) :]))
+        assert data["d"] in ["next", "prev"]
+        assert isinstance(data["v"], list)
+        return data
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid keyset token: {token}."
+        ) from e
+
+
+def keyset_sortby(search: ItemsSearch) -> Optional[List[Dict]]:
+    """Return the complete sort order of a search if it supports keyset pagination."""
+    if search.token and not is_keyset_token(search.token):
+        return None
+
+    if search.filter and search.filter_lang not in [None, "cql2-json"]:
+        return None
+
+    if not search.sortby:
+        return DEFAULT_SORTBY
+
+    sortby = [
+        {"field": s["field"], "direction": s.get("direction", "asc")}
+        for s in search.sortby
+    ]
+    tiebreaker = None
+    if len(sortby) > 1 and sortby[-1]["field"] == "collection":
+        *sortby, tiebreaker = sortby
+
+    fields = [s["field"] for s in sortby]
+    if fields == ["datetime"]:
+        sortby = [*sortby, {"field": "id", "direction": sortby[0]["direction"]}]
+    elif fields not in KEYSET_FIELDS:
+        return None
+
+    if tiebreaker is None:
+        tiebreaker = {"field": "collection", "direction": sortby[-1]["direction"]}
+
+    return [*sortby, tiebreaker]
+
+
+def _reverse(sortby: List[Dict]) -> List[Dict]:
+    return [
+        {
+            "field": s["field"],
+            "direction": "asc" if s["direction"] == "desc" else "desc",
+        }
+        for s in sortby
+    ]
+
+
+def _literal(field: str, value):
+    return {"timestamp": value} if field == "datetime" else value
+
+
+def keyset_filter(sortby: List[Dict], values: List) -> Dict:
+    """CQL2 filter selecting the items after `values` in the sort order."""
+    args = []
+    for i, sort in enumerate(sortby):
+        op = "<" if sort["direction"] == "desc" else ">"
+        args.append(
+            {
+                "op": "and",
+                "args": [
+                    *[
+                        {
+                            "op": "=",
+                            "args": [
+                                {"property": s["field"]},
+                                _literal(s["field"], v),
+                            ],
+                        }
+                        for s, v in zip(sortby[:i], values[:i])
+                    ],
+                    {
+                        "op": op,
+                        "args": [
+                            {"property": sort["field"]},
+                            _literal(sort["field"], values[i]),
+                        ],
+                    },
+                ],
+            }
+        )
+
+    return args[0] if len(args) == 1 else {"op": "or", "args": args}
+
+
+def keyset_search(
+    search: ItemsSearch, sortby: List[Dict]
+) -> Tuple[ItemsSearch, Optional[Dict]]:
+    """Return the PgSTAC search for a keyset page and the decoded token."""
+    update: Dict = {"sortby": sortby, "token": None}
+    if not search.token:
+        return search.model_copy(update=update), None
+
+    token = decode_keyset_token(search.token)
+    if len(token["v"]) != len(sortby):
+        raise HTTPException(
+            status_code=400, detail=f"Invalid keyset token: {search.token}."
+        )
+
+    if token["d"] == "prev":
+        sortby = _reverse(sortby)
+        update["sortby"] = sortby
+
+    cql = keyset_filter(sortby, token["v"])
+    if search.filter:
+        cql = {"op": "and", "args": [search.filter, cql]}
+
+    update.update({"filter": cql, "filter_lang": "cql2-json"})
+    return search.model_copy(update=update), token
+
+
+def _values(item: Mapping[str, Any], sortby: List[Dict]) -> Optional[List]:
+    props = item.get("properties") or {}
+    values = []
+    for sort in sortby:
+        if sort["field"] in ["id", "collection"]:
+            value = item.get(sort["field"])
+        else:
+            value = props.get("datetime") or props.get("start_datetime")
+
+        if value is None:
+            return None
+
+        values.append(value)
+
+    return values
+
+
+def keyset_page(
+    item_list: ItemList, sortby: List[Dict], token: Optional[Dict]
+) -> Optional[ItemList]:
+    """Replace PgSTAC tokens by keyset tokens.
+
+    Returns None when the items don't have the sort values (e.g excluded `fields`).
+
+    """
+    items = item_list["items"]
+    more = item_list["next"] is not None
+
+    matched = item_list["matched"]
+    if token:
+        # the keyset filter changes the number of matched items
+        matched = token["m"]
+
+    if token and token["d"] == "prev":
+        # items were fetched in the reverse order
+        items = items[::-1]
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = token is not None, more
+
+    if not items:
+        return ItemList(items=[], matched=matched, next=None, prev=None)  # type: ignore
+
+    first, last = _values(items[0], sortby), _values(items[-1], sortby)
+    if first is None or last is None:
+        return None
+
+    return ItemList(  # type: ignore
+        items=items,
+        matched=matched,
+        next=encode_keyset_token("next", last, matched)  # type: ignore
+        if has_next
+        else None,
+        prev=encode_keyset_token("prev", first, matched)  # type: ignore
+        if has_prev
+        else None,
+    )
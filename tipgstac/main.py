@@ -9,15 +9,29 @@ from starlette.templating import Jinja2Templates
 from starlette_cramjam.middleware import CompressionMiddleware
 
 from tipg.errors import DEFAULT_STATUS_CODES, add_exception_handlers
-from tipg.middleware import CacheControlMiddleware
+from tipg.middleware import CacheControlMiddleware, CatalogUpdateMiddleware
 from tipg.settings import PostgresSettings
 from tipgstac import __version__ as tipg_version
+from tipgstac.collections import register_collection_catalog
 from tipgstac.database import close_db_connection, connect_to_db
-from tipgstac.factory import OGCFeaturesFactory
-from tipgstac.settings import APISettings
+from tipgstac.factory import OGCFeaturesFactory, OGCTilesFactory
+from tipgstac.metrics import MetricsMiddleware, metrics
+from tipgstac.openapi import OpenAPIRoutes
+from tipgstac.settings import (
+    APISettings,
+    CatalogSettings,
+    ProfilingSettings,
+    TracingSettings,
+)
+from tipgstac.snapshot import close_snapshots, register_snapshots
+from tipgstac.timing import ServerTimingMiddleware
+from tipgstac.tracing import TracingMiddleware, load_exporter
 
 settings = APISettings()
+catalog_settings = CatalogSettings()
 postgres_settings = PostgresSettings()
+tracing_settings = TracingSettings()
+profiling_settings = ProfilingSettings()
 
 jinja2_env = jinja2.Environment(
     loader=jinja2.ChoiceLoader(
@@ -25,7 +39,12 @@ jinja2_env = jinja2.Environment(
             jinja2.PackageLoader(__package__, "templates"),
             jinja2.PackageLoader("tipg", "templates"),
         ]
-    )
+    ),
+    bytecode_cache=(
+        jinja2.FileSystemBytecodeCache(settings.template_cache_dir)
+        if settings.template_cache_dir
+        else None
+    ),
 )
 templates = Jinja2Templates(env=jinja2_env)
 
@@ -35,7 +54,25 @@ async def lifespan(app: FastAPI):
     """FastAPI Lifespan."""
     # Create Connection Pool
     await connect_to_db(app, settings=postgres_settings)
+
+    # Create in-memory Collection Catalog
+    if catalog_settings.index:
+        await register_collection_catalog(app)
+
+    # Create the snapshot tables and start the expired snapshots cleanup (if enabled)
+    await register_snapshots(app)
+
+    # Serialize and compress the OpenAPI document
+    openapi.build()
+
+    # Compile the templates (or load them from the bytecode cache)
+    if settings.template_cache_dir:
+        for name in jinja2_env.list_templates(extensions=["html"]):
+            jinja2_env.get_template(name)
+
     yield
+    await close_snapshots(app)
+
     # Close the Connection Pool
     await close_db_connection(app)
 
@@ -43,14 +80,20 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title=settings.name,
     version=tipg_version,
-    openapi_url="/api",
-    docs_url="/api.html",
+    openapi_url=None,
+    docs_url=None,
     lifespan=lifespan,
 )
 
+# `/api` and `/api.html` documents are precomputed and served from memory
+openapi = OpenAPIRoutes(app, openapi_url="/api", docs_url="/api.html")
+
 ogc_api = OGCFeaturesFactory(title=settings.name, templates=templates)
 app.include_router(ogc_api.router)
 
+ogc_tiles = OGCTilesFactory(title=settings.name, templates=templates, with_common=False)
+app.include_router(ogc_tiles.router)
+
 # Set all CORS enabled origins
 if settings.cors_origins:
     app.add_middleware(
@@ -62,7 +105,57 @@ if settings.cors_origins:
     )
 
 app.add_middleware(CacheControlMiddleware, cachecontrol=settings.cachecontrol)
-app.add_middleware(CompressionMiddleware)
+
+if catalog_settings.index:
+    app.add_middleware(
+        CatalogUpdateMiddleware,
+        func=register_collection_catalog,
+        ttl=catalog_settings.ttl,
+    )
+
+# `/api` and `/api.html` responses are already compressed
+app.add_middleware(CompressionMiddleware, exclude_path={r"/api", r"/api\.html"})
+
+if settings.server_timing:
+    app.add_middleware(ServerTimingMiddleware)
+
+if settings.metrics:
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route(
+        "/metrics",
+        metrics,
+        description="Prometheus metrics.",
+        summary="Prometheus metrics.",
+        operation_id="metrics",
+        tags=["Monitoring"],
+        include_in_schema=False,
+    )
+
+if tracing_settings.enabled:
+    app.add_middleware(
+        TracingMiddleware,
+        exporter=load_exporter(tracing_settings),
+        sample_rate=tracing_settings.sample_rate,
+    )
+
+if settings.debug and profiling_settings.token:
+    # Debug only: do not import the profilers (and `tracemalloc`) otherwise
+    from tipgstac.profiling import ProfilingMiddleware, tracemalloc_endpoint
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=profiling_settings.token,
+        interval=profiling_settings.interval,
+    )
+    app.add_api_route(
+        "/debug/tracemalloc",
+        tracemalloc_endpoint,
+        description="Memory allocations during a time window.",
+        summary="Memory allocations during a time window.",
+        operation_id="tracemalloc",
+        tags=["Debug"],
+        include_in_schema=False,
+    )
 
 add_exception_handlers(app, DEFAULT_STATUS_CODES)
 
@@ -0,0 +1,199 @@
+"""tipgstac.metrics: Prometheus metrics.
+
+Requires `prometheus-client` (`pip install tipgstac[metrics]`) and
+`TIPG_STAC_METRICS=TRUE`.
+
+When running multiple workers (e.g gunicorn), set the `PROMETHEUS_MULTIPROC_DIR`
+environment variable to an empty directory so the metrics of all the workers are
+aggregated by the `/metrics` endpoint.
+
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tipgstac.settings import APISettings
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, multiprocess
+
+except ImportError:  # pragma: nocover
+    prometheus_client = None  # type: ignore
+
+api_settings = APISettings()
+
+enabled = bool(api_settings.metrics and prometheus_client is not None)
+
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 1e7, 1e8)
+
+if prometheus_client is not None:
+    REQUESTS_IN_FLIGHT = Gauge(
+        "tipgstac_requests_in_flight",
+        "Number of requests being processed.",
+        multiprocess_mode="livesum",
+    )
+    REQUEST_DURATION = Histogram(
+        "tipgstac_request_duration_seconds",
+        "Request duration.",
+        ["method", "route", "media_type", "status"],
+    )
+    RESPONSE_SIZE = Histogram(
+        "tipgstac_response_size_bytes",
+        "Response body size.",
+        ["route", "media_type"],
+        buckets=SIZE_BUCKETS,
+    )
+    SEARCH_DURATION = Histogram(
+        "tipgstac_pgstac_search_duration_seconds",
+        "pgstac.search execution duration.",
+    )
+    SEARCH_ERRORS = Counter(
+        "tipgstac_pgstac_search_errors_total",
+        "Number of failed pgstac.search calls.",
+    )
+    CACHE_REQUESTS = Counter(
+        "tipgstac_cache_requests_total",
+        "Number of cached dependency calls.",
+        ["cache", "result"],
+    )
+    POOL_CONNECTIONS = Gauge(
+        "tipgstac_db_pool_connections",
+        "Number of database pool connections.",
+        ["state"],
+        multiprocess_mode="livesum",
+    )
+
+# Set to True by cached functions when they are executed (cache miss)
+_cache_miss: ContextVar[Optional[List[bool]]] = ContextVar(
+    "tipgstac_cache_miss", default=None
+)
+
+
+@contextmanager
+def search_metrics() -> Iterator[None]:
+    """Record pgstac.search duration and errors."""
+    if not enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SEARCH_ERRORS.inc()
+        raise
+    finally:
+        SEARCH_DURATION.observe(time.perf_counter() - start)
+
+
+def cache_metrics(name: str) -> Callable:
+    """Decorator counting cache hits and misses of an (async) cached function.
+
+    The cached function must call `cache_miss()`.
+
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not enabled:
+                return await func(*args, **kwargs)
+
+            miss: List[bool] = []
+            token = _cache_miss.set(miss)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _cache_miss.reset(token)
+                CACHE_REQUESTS.labels(name, "miss" if miss else "hit").inc()
+
+        return wrapper
+
+    return decorator
+
+
+def cache_miss() -> None:
+    """Mark the current cached function call as a cache miss."""
+    if (miss := _cache_miss.get()) is not None:
+        miss.append(True)
+
+
+def _route(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """Middleware to record requests metrics."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Init Middleware."""
+        assert (
+            prometheus_client is not None
+        ), "`prometheus-client` must be installed to record metrics"
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http" or not enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        media_type = ""
+        size = 0
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            nonlocal status, media_type, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                media_type = content_type.split(";")[0].strip()
+
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = _route(scope)
+            REQUEST_DURATION.labels(
+                scope["method"], route, media_type, str(status)
+            ).observe(time.perf_counter() - start)
+            RESPONSE_SIZE.labels(route, media_type).observe(size)
+
+            # `pool` can also be a `tipgstac.backend.Backend`
+            pool = getattr(scope["app"].state, "pool", None)
+            if hasattr(pool, "get_size"):
+                POOL_CONNECTIONS.labels("size").set(pool.get_size())
+                POOL_CONNECTIONS.labels("idle").set(pool.get_idle_size())
+
+
+def metrics(request: Request) -> Response:
+    """Return Prometheus metrics."""
+    registry = prometheus_client.REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return Response(
+        prometheus_client.generate_latest(registry),
+        media_type=prometheus_client.CONTENT_TYPE_LATEST,
+    )
@@ -4,11 +4,11 @@ tipgstac models.
 Note: This is mostly a copy of https://github.com/stac-utils/stac-fastapi/blob/master/stac_fastapi/pgstac/stac_fastapi/pgstac/types/search.py
 """
 
-from typing import Any, Dict, List, Literal, Optional, Set
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple
 
 from geojson_pydantic.geometries import Geometry
 from geojson_pydantic.types import BBox
-from pydantic import BaseModel, Field, ValidationInfo, field_validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator, model_validator
 from typing_extensions import Annotated
 
 from tipg import model
@@ -77,6 +77,105 @@ class ItemsSearch(BaseModel):
     v_bbox = field_validator("bbox")(validate_bbox)
 
 
+# PgSTAC `fields` and columns of the compact items responses
+COMPACT_FIELDS: Dict[str, Set] = {
+    "include": {"id", "collection", "bbox", "properties.datetime"}
+}
+COMPACT_COLUMNS = ["collection", "id", "bbox", "datetime"]
+
+
+# ref: https://github.com/stac-api-extensions/aggregation
+AggregationType = Literal[
+    "total_count",
+    "datetime_frequency",
+    "numeric_range",
+    "term_frequency",
+    "geohash_frequency",
+    "grid_frequency",
+]
+DatetimeInterval = Literal["year", "month", "week", "day", "hour", "minute"]
+
+
+class Aggregation(BaseModel):
+    """Aggregation definition."""
+
+    type: AggregationType
+    name: Optional[str] = None
+    property: Optional[str] = None
+    # datetime_frequency
+    interval: DatetimeInterval = "month"
+    # numeric_range: list of [from, to) ranges, `None` for open-ended
+    ranges: Optional[List[Tuple[Optional[float], Optional[float]]]] = None
+    # term_frequency: maximum number of buckets
+    limit: Annotated[int, Field(ge=1, le=1000)] = 10
+    # geohash_frequency
+    precision: Annotated[int, Field(ge=1, le=12)] = 1
+    # grid_frequency: cell size in degrees
+    resolution: Annotated[float, Field(gt=0)] = 1.0
+
+    model_config = {"extra": "ignore"}
+
+    @model_validator(mode="after")
+    def check_options(self):
+        """Check required options and set default name."""
+        if self.type in ["numeric_range", "term_frequency"] and not self.property:
+            raise ValueError(f"`property` is required for `{self.type}` aggregation")
+
+        if self.type == "numeric_range" and not self.ranges:
+            raise ValueError("`ranges` is required for `numeric_range` aggregation")
+
+        self.name = self.name or self.type
+        return self
+
+
+class AggregationSearch(ItemsSearch):
+    """PgSTAC Aggregation Query model."""
+
+    aggregations: Annotated[List[Aggregation], Field(min_length=1)] = [
+        Aggregation(type="total_count")
+    ]
+
+
+class CoverageSearch(ItemsSearch):
+    """PgSTAC Coverage Query model."""
+
+    # simplification tolerance in degrees
+    simplify: Annotated[Optional[float], Field(ge=0)] = None
+    # maximum number of decimal digits of the output coordinates
+    precision: Annotated[int, Field(ge=0, le=15)] = 9
+
+
+class ItemReference(BaseModel):
+    """Reference to a PgSTAC Item."""
+
+    collection: str
+    id: str
+
+
+class BatchItems(BaseModel):
+    """Batch Item retrieval model."""
+
+    items: Annotated[List[ItemReference], Field(min_length=1, max_length=10000)]
+
+
+class BatchSearch(BaseModel):
+    """Batch Search model.
+
+    Each search (`POST /search` body) is validated separately, so an invalid search
+    only fails its own result.
+
+    """
+
+    searches: Annotated[
+        List[Dict[str, Any]],
+        Field(
+            min_length=1,
+            max_length=100,
+            description="PgSTAC Searches (same body as `POST /search`).",
+        ),
+    ]
+
+
 class CollectionsSearch(BaseModel):
     """PgSTAC Collections Search Query model."""
 
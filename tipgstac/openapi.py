@@ -0,0 +1,159 @@
+"""tipgstac.openapi: precomputed OpenAPI document and Swagger UI page.
+
+The OpenAPI document (`/api`) and the Swagger UI page (`/api.html`) are serialized
+once (per `root_path`) and compressed with each of the `starlette_cramjam` encodings,
+then served from memory with an `ETag` (`If-None-Match` requests get a `304`).
+
+The documents are built on startup (see `OpenAPIRoutes.build`), or on first request,
+and rebuilt if the application schema changes.
+
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import FastAPI
+from fastapi.openapi.docs import get_swagger_ui_html
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette_cramjam.compression import Compression
+from starlette_cramjam.middleware import get_compression_backend
+
+# Preferred encodings (compression is done once, so favor the smaller outputs)
+ENCODINGS = [Compression.br, Compression.gzip, Compression.deflate]
+
+
+@dataclass
+class StaticDocument:
+    """Serialized document with its precompressed variants."""
+
+    body: bytes
+    media_type: str
+    digest: str = field(init=False)
+    encoded: Dict[str, bytes] = field(init=False)
+
+    def __post_init__(self):
+        """Hash and compress the document."""
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded = {
+            encoding.name: bytes(encoding.compress.compress(self.body))
+            for encoding in ENCODINGS
+        }
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        """Return the ETag of the document (each encoding has its own ETag)."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def not_modified(self, request: Request) -> bool:
+        """Check `If-None-Match` request header."""
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+
+        etags = {tag.strip() for tag in if_none_match.split(",")}
+        etags |= {tag[2:] for tag in etags if tag.startswith("W/")}
+        if "*" in etags:
+            return True
+
+        return any(self.etag(encoding) in etags for encoding in [None, *self.encoded])
+
+    def response(self, request: Request) -> Response:
+        """Return the (encoded) document or a `304 Not Modified` response."""
+        backend = get_compression_backend(
+            request.headers.get("accept-encoding", ""), ENCODINGS
+        )
+        encoding = backend.name if backend else None
+        headers = {"ETag": self.etag(encoding), "Vary": "Accept-Encoding"}
+
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(
+                self.encoded[encoding], media_type=self.media_type, headers=headers
+            )
+
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class OpenAPIRoutes:
+    """Serve the application OpenAPI document and Swagger UI page from memory.
+
+    The application must be created with `openapi_url=None` and `docs_url=None`,
+    and responses to `openapi_url` must not be compressed again (e.g with the
+    `exclude_path` option of `CompressionMiddleware`).
+
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        openapi_url: str = "/api",
+        docs_url: Optional[str] = "/api.html",
+    ) -> None:
+        """Add the routes to the application."""
+        self.app = app
+        self.openapi_url = openapi_url
+        self.docs_url = docs_url
+
+        # {root_path: (schema, document)}
+        self._openapi: Dict[str, Any] = {}
+        self._docs: Dict[str, StaticDocument] = {}
+
+        app.add_route(openapi_url, self.openapi, include_in_schema=False)
+        if docs_url:
+            app.add_route(docs_url, self.swagger_ui_html, include_in_schema=False)
+
+    def openapi_document(self, root_path: str = "") -> StaticDocument:
+        """Return the OpenAPI document for a `root_path`."""
+        schema = self.app.openapi()
+
+        cached = self._openapi.get(root_path)
+        if cached and cached[0] is schema:
+            return cached[1]
+
+        content = schema
+        if root_path and self.app.root_path_in_servers:
+            server_urls = {s.get("url") for s in schema.get("servers", [])}
+            if root_path not in server_urls:
+                content = {
+                    **schema,
+                    "servers": [{"url": root_path}, *schema.get("servers", [])],
+                }
+
+        document = StaticDocument(orjson.dumps(content), "application/json")
+        self._openapi[root_path] = (schema, document)
+        return document
+
+    def docs_document(self, root_path: str = "") -> StaticDocument:
+        """Return the Swagger UI page for a `root_path`."""
+        if root_path not in self._docs:
+            html = get_swagger_ui_html(
+                openapi_url=root_path + self.openapi_url,
+                title=f"{self.app.title} - Swagger UI",
+                init_oauth=self.app.swagger_ui_init_oauth,
+                swagger_ui_parameters=self.app.swagger_ui_parameters,
+            )
+            self._docs[root_path] = StaticDocument(html.body, "text/html")
+
+        return self._docs[root_path]
+
+    def build(self) -> None:
+        """Build the documents of the application `root_path`."""
+        root_path = self.app.root_path.rstrip("/")
+        self.openapi_document(root_path)
+        if self.docs_url:
+            self.docs_document(root_path)
+
+    async def openapi(self, request: Request) -> Response:
+        """OpenAPI document."""
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return self.openapi_document(root_path).response(request)
+
+    async def swagger_ui_html(self, request: Request) -> Response:
+        """Swagger UI page."""
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return self.docs_document(root_path).response(request)
@@ -0,0 +1,227 @@
+"""tipgstac.profiling: on-demand profiling.
+
+Only available with `TIPG_STAC_DEBUG=TRUE` and a `TIPG_STAC_PROFILING_TOKEN` secret
+(nothing is added to the application otherwise):
+
+- `ProfilingMiddleware`: requests with a `TiPgSTAC-Profile: {token}` header are
+  profiled by a sampling profiler and return the profile, in the collapsed stack
+  format used by flame graph tools (flamegraph.pl, speedscope), instead of the
+  response. The profiler samples all the threads of the process (the event loop and
+  the threadpool running sync dependencies) while the request runs, so the profile
+  also covers the concurrent requests.
+- `/debug/tracemalloc`: compare two `tracemalloc` snapshots taken `seconds` apart
+  (requires an `Authorization: Bearer {token}` header).
+
+"""
+
+import asyncio
+import collections
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from types import FrameType
+from typing import Counter, Dict, List, Optional
+
+from fastapi import HTTPException, Query
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing_extensions import Annotated
+
+from tipgstac.settings import ProfilingSettings
+
+profiling_settings = ProfilingSettings()
+
+PROFILE_HEADER = "TiPgSTAC-Profile"
+
+# Only one tracemalloc time window at a time
+_tracemalloc_running = False
+
+
+def check_token(value: Optional[str], token: str) -> bool:
+    """Compare a header value with the profiling token."""
+    return value is not None and secrets.compare_digest(value.encode(), token.encode())
+
+
+def _idle(frame: FrameType) -> bool:
+    """Check if a thread is waiting on a `threading` lock or condition."""
+    return frame.f_code.co_filename == threading.__file__ and frame.f_code.co_name in [
+        "wait",
+        "acquire",
+    ]
+
+
+class SamplingProfiler:
+    """Sample the stacks of the process threads at regular intervals.
+
+    The first frame of each stack is the thread name. Idle threads (waiting on a
+    `threading` lock or condition, e.g threadpool workers) are not sampled.
+
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        """Init profiler."""
+        self.interval = interval
+        self.stacks: Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self._thread.ident or _idle(frame):
+                continue
+
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._sample()
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Return the samples in the collapsed stack format."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class ProfilingMiddleware:
+    """Middleware to profile requests with a `TiPgSTAC-Profile` header."""
+
+    def __init__(self, app: ASGIApp, token: str, interval: float = 0.001) -> None:
+        """Init Middleware."""
+        self.app = app
+        self.token = token
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = Headers(scope=scope).get(PROFILE_HEADER)
+        if value is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not check_token(value, self.token):
+            response = PlainTextResponse("Invalid profiling token.", status_code=403)
+            await response(scope, receive, send)
+            return
+
+        status = None
+        size = 0
+
+        async def send_wrapper(message: Message):
+            """Discard the response."""
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+
+        profiler = SamplingProfiler(interval=self.interval)
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+
+        response = PlainTextResponse(
+            profiler.collapsed(),
+            headers={
+                "TiPgSTAC-Profile-Status": str(status),
+                "TiPgSTAC-Profile-Size": str(size),
+                "TiPgSTAC-Profile-Duration": f"{(time.perf_counter() - start):.3f}",
+            },
+        )
+        await response(scope, receive, send)
+
+
+async def tracemalloc_diff(seconds: float, limit: int = 25, frames: int = 1) -> Dict:
+    """Compare tracemalloc snapshots taken `seconds` apart."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    stats = after.compare_to(before, "traceback" if frames > 1 else "lineno")
+    return {
+        "seconds": seconds,
+        "current": current,
+        "peak": peak,
+        "stats": [
+            {
+                "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in stats[:limit]
+        ],
+    }
+
+
+async def tracemalloc_endpoint(
+    request: Request,
+    seconds: Annotated[
+        float,
+        Query(gt=0, le=profiling_settings.max_seconds, description="Time window."),
+    ] = 10,
+    limit: Annotated[
+        int, Query(gt=0, description="Number of allocation sites to return.")
+    ] = 25,
+    frames: Annotated[
+        int, Query(gt=0, le=50, description="Number of frames per traceback.")
+    ] = 1,
+):
+    """Return the memory allocations made during a time window."""
+    token = profiling_settings.token
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if not token or scheme.lower() != "bearer" or not check_token(credentials, token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token.")
+
+    global _tracemalloc_running
+    if _tracemalloc_running:
+        raise HTTPException(
+            status_code=409, detail="A tracemalloc window is already running."
+        )
+
+    _tracemalloc_running = True
+    try:
+        return await tracemalloc_diff(seconds, limit=limit, frames=frames)
+    finally:
+        _tracemalloc_running = False
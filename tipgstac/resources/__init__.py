@@ -0,0 +1 @@
+"""tipgstac resources."""
@@ -0,0 +1,30 @@
+"""tipgstac custom responses.
+
+JSON responses whose rendering is timed as the `serialize` phase.
+
+"""
+
+from typing import Any
+
+from fastapi import responses
+
+from tipg.resources import response
+from tipgstac.timing import timer
+
+
+class ORJSONResponse(responses.ORJSONResponse):
+    """ORJSON Response"""
+
+    def render(self, content: Any) -> bytes:
+        """Render the content into a JSON response using orjson"""
+        with timer("serialize"):
+            return super().render(content)
+
+
+class GeoJSONResponse(response.GeoJSONResponse):
+    """GeoJSON Response"""
+
+    def render(self, content: Any) -> bytes:
+        """Render the content into a JSON response using orjson"""
+        with timer("serialize"):
+            return super().render(content)
@@ -15,6 +15,19 @@ class APISettings(BaseSettings):
     cachecontrol: str = "public, max-age=3600"
     template_directory: Optional[str] = None
 
+    # Jinja bytecode cache directory (the templates are then compiled on startup)
+    template_cache_dir: Optional[str] = None
+
+    # Default geometry precision/simplification of the HTML items views
+    html_precision: Optional[int] = 6
+    html_simplify: Optional[float] = None
+
+    # Add per-phase `Server-Timing` headers and JSON access logs
+    server_timing: bool = False
+
+    # Expose Prometheus metrics on `/metrics` (requires `prometheus-client`)
+    metrics: bool = False
+
     model_config = {"env_prefix": "TIPG_STAC_", "env_file": ".env", "extra": "ignore"}
 
     @field_validator("cors_origins")
@@ -41,3 +54,165 @@ class CacheSettings(BaseSettings):
             self.ttl = 0
 
         return self
+
+
+class CatalogSettings(BaseSettings):
+    """Collection Catalog settings"""
+
+    # Keep an in-memory index of the collections extents
+    index: bool = False
+
+    # TTL of the catalog in seconds
+    ttl: int = 300
+
+    # Restrict `/search` requests without `collections` to the collections whose
+    # extent intersects the `bbox`/`intersects`/`datetime` filters. The catalog can
+    # be up to `ttl` seconds old, so collections created (or items ingested outside
+    # the collection extents) since the last refresh can be missed.
+    search_pruning: bool = False
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_CATALOG_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class SearchSettings(BaseSettings):
+    """Items search settings"""
+
+    # Use keyset tokens for the pagination of searches sorted by `datetime`/`id`
+    keyset_pagination: bool = False
+
+    # Log `pgstac.search` calls taking more than `slow_threshold` seconds (see
+    # `tipgstac.slowlog`)
+    slow_threshold: Optional[float] = None
+
+    # Fraction of the slow searches to run `EXPLAIN (ANALYZE, BUFFERS)` for
+    explain_sample_rate: float = 0.0
+
+    # Log file for the EXPLAIN plans (bounded to `explain_log_max_bytes`)
+    explain_log: Optional[str] = None
+    explain_log_max_bytes: int = 10000000
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_SEARCH_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class IntersectsSettings(BaseSettings):
+    """Search `intersects` geometry preprocessing settings"""
+
+    # Simplify `intersects` geometries with more than `simplify_threshold` vertices
+    # using this tolerance (in degrees). Disabled by default.
+    simplify_tolerance: Optional[float] = None
+    simplify_threshold: int = 1000
+
+    # Reject `intersects` geometries with more vertices (after simplification)
+    max_vertices: Optional[int] = None
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_INTERSECTS_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class SnapshotSettings(BaseSettings):
+    """Search snapshots settings"""
+
+    # Enable `snapshot=true` searches: the snapshot tables are created (if needed)
+    # on startup and the expired snapshots deleted by a background task
+    enabled: bool = False
+
+    # Lifetime of a snapshot in seconds
+    ttl: int = 3600
+
+    # Maximum number of items stored in a snapshot
+    max_items: int = 1000000
+
+    # Interval, in seconds, between deletions of the expired snapshots
+    cleanup_interval: int = 300
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_SNAPSHOT_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class ExportSettings(BaseSettings):
+    """Binary/Streamed exports settings"""
+
+    # Number of items fetched from PgSTAC for each batch of the export
+    page_size: int = 1000
+
+    # Maximum number of items for which FlatGeobuf outputs include a spatial index
+    # (the items are kept in memory to create the index), 0 to disable.
+    fgb_index_max_features: int = 10000
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_EXPORT_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class BatchSettings(BaseSettings):
+    """Batch endpoints settings"""
+
+    # Maximum number of searches of a `/batch/search` request running concurrently
+    # (each one uses a database connection)
+    max_concurrency: int = 4
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_BATCH_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class TracingSettings(BaseSettings):
+    """Request tracing settings"""
+
+    # Record request spans (see `tipgstac.tracing`)
+    enabled: bool = False
+
+    # Span exporter: `file`, `memory` or the import path (`module:attribute`) of a
+    # `tipgstac.tracing.SpanExporter` class
+    exporter: str = "file"
+
+    # JSON lines file of the `file` exporter
+    file: str = "traces.jsonl"
+
+    service_name: str = "tipgstac"
+
+    # Fraction of the requests to trace when they have no `traceparent` header
+    sample_rate: float = 1.0
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_TRACING_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
+
+
+class ProfilingSettings(BaseSettings):
+    """On-demand profiling settings (requires `TIPG_STAC_DEBUG=TRUE`)"""
+
+    # Secret expected in the `TiPgSTAC-Profile` header, profiling is disabled if unset
+    token: Optional[str] = None
+
+    # Sampling profiler interval in seconds
+    interval: float = 0.001
+
+    # Maximum `/debug/tracemalloc` time window in seconds
+    max_seconds: float = 60
+
+    model_config = {
+        "env_prefix": "TIPG_STAC_PROFILING_",
+        "env_file": ".env",
+        "extra": "ignore",
+    }
@@ -0,0 +1,126 @@
+"""tipgstac.slowlog: slow searches log.
+
+`pgstac.search` calls taking more than `TIPG_STAC_SEARCH_SLOW_THRESHOLD` seconds are
+logged (as JSON, by the `tipgstac.slow_search` logger) with the search, its duration,
+the number of returned/matched items and the collections.
+
+A sample (`TIPG_STAC_SEARCH_EXPLAIN_SAMPLE_RATE`) of the slow searches is then
+explained, in the background, with `EXPLAIN (ANALYZE, BUFFERS)` of the items query
+generated by PgSTAC's `stac_search_to_where`/`sort_sqlorderby` functions. The plans
+are logged by the `tipgstac.explain` logger, in the `TIPG_STAC_SEARCH_EXPLAIN_LOG`
+file if set (rotated at `TIPG_STAC_SEARCH_EXPLAIN_LOG_MAX_BYTES`).
+
+"""
+
+import asyncio
+import logging
+import logging.handlers
+import random
+from typing import Dict, Optional, Set
+
+import orjson
+from buildpg import asyncpg
+
+from tipg.settings import FeaturesSettings
+from tipgstac.models import ItemsSearch
+from tipgstac.settings import SearchSettings
+
+features_settings = FeaturesSettings()
+search_settings = SearchSettings()
+
+logger = logging.getLogger("tipgstac.slow_search")
+explain_logger = logging.getLogger("tipgstac.explain")
+
+# Keep references of the running EXPLAIN tasks
+_tasks: Set[asyncio.Task] = set()
+
+
+def _setup_explain_log() -> None:
+    if search_settings.explain_log and not explain_logger.handlers:
+        handler = logging.handlers.RotatingFileHandler(
+            search_settings.explain_log,
+            maxBytes=search_settings.explain_log_max_bytes,
+            backupCount=1,
+        )
+        explain_logger.addHandler(handler)
+        explain_logger.setLevel(logging.INFO)
+        explain_logger.propagate = False
+
+
+def canonical_search(search: ItemsSearch) -> Dict:
+    """Return the search as sent to PgSTAC."""
+    return orjson.loads(search.model_dump_json(exclude_none=True, by_alias=True))
+
+
+async def explain_search(
+    pool: asyncpg.BuildPgPool, search: ItemsSearch, limit: int
+) -> Optional[Dict]:
+    """Return the EXPLAIN (ANALYZE, BUFFERS) plan of PgSTAC's items query."""
+    async with pool.acquire() as conn:
+        where, orderby = await conn.fetchrow(
+            """
+            SELECT
+                pgstac.stac_search_to_where($1::text::jsonb),
+                pgstac.sort_sqlorderby($1::text::jsonb);
+            """,
+            search.model_dump_json(exclude_none=True, by_alias=True),
+        )
+
+        # NOTE: the WHERE clause can contain `:` so we can't use buildpg's render
+        plan = await conn.fetchval(
+            f"""
+            EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+            SELECT * FROM items WHERE {where} ORDER BY {orderby} LIMIT $1;
+            """,
+            limit,
+        )
+
+    return orjson.loads(plan) if isinstance(plan, str) else plan
+
+
+async def _log_explain(pool: asyncpg.BuildPgPool, search: ItemsSearch, limit: int):
+    try:
+        plan = await explain_search(pool, search, limit)
+    except Exception as e:
+        explain_logger.warning(f"Could not explain search: {e}")
+        return
+
+    _setup_explain_log()
+    explain_logger.info(
+        orjson.dumps({"search": canonical_search(search), "plan": plan}).decode()
+    )
+
+
+def log_slow_search(
+    pool: asyncpg.BuildPgPool,
+    *,
+    search: ItemsSearch,
+    duration: float,
+    fc: Optional[Dict],
+) -> None:
+    """Log the search if it took more than `TIPG_STAC_SEARCH_SLOW_THRESHOLD`."""
+    threshold = search_settings.slow_threshold
+    if threshold is None or duration < threshold:
+        return
+
+    fc = fc or {}
+    logger.warning(
+        orjson.dumps(
+            {
+                "search": canonical_search(search),
+                "duration": round(duration, 3),
+                "returned": len(fc.get("features") or []),
+                "matched": (fc.get("context") or {}).get("matched"),
+                "collections": search.collections,
+            }
+        ).decode()
+    )
+
+    if random.random() < search_settings.explain_sample_rate:
+        task = asyncio.create_task(
+            _log_explain(
+                pool, search, search.limit or features_settings.default_features_limit
+            )
+        )
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
@@ -0,0 +1,284 @@
+"""tipgstac.snapshot: materialized search results for deep pagination.
+
+PgSTAC tokens are resolved by looking up the token item and re-running the search
+from it, so each page of a large result gets slower and the result can change while
+paging (e.g ongoing ingestion). In snapshot mode, the ordered list of the items
+matching a search is stored once in an UNLOGGED table and the pages are then read by
+position, using `snapshot:{id}:{offset}` tokens, until the snapshot expires.
+
+Snapshots are disabled unless `TIPG_STAC_SNAPSHOT_ENABLED=TRUE`. The snapshot tables
+(`SNAPSHOT_SQL`) are then created on startup, if they don't exist, and the expired
+snapshots are deleted by a background task (see `register_snapshots`).
+
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from buildpg import asyncpg
+from fastapi import FastAPI, HTTPException
+
+from tipg.collections import ItemList
+from tipg.settings import FeaturesSettings
+from tipgstac.intersects import preprocess_intersects
+from tipgstac.models import ItemsSearch
+from tipgstac.settings import SnapshotSettings
+from tipgstac.timing import acquire
+
+features_settings = FeaturesSettings()
+snapshot_settings = SnapshotSettings()
+
+logger = logging.getLogger("tipgstac.snapshot")
+
+SNAPSHOT_PREFIX = "snapshot:"
+
+SNAPSHOT_TABLE = "public.tipgstac_snapshots"
+SNAPSHOT_ITEMS_TABLE = "public.tipgstac_snapshot_items"
+
+SNAPSHOT_SQL = f"""
+    CREATE UNLOGGED TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+        snapshot uuid PRIMARY KEY,
+        matched bigint NOT NULL,
+        expires timestamptz NOT NULL
+    );
+    CREATE UNLOGGED TABLE IF NOT EXISTS {SNAPSHOT_ITEMS_TABLE} (
+        snapshot uuid NOT NULL REFERENCES {SNAPSHOT_TABLE} ON DELETE CASCADE,
+        n int NOT NULL,
+        collection text NOT NULL,
+        id text NOT NULL,
+        PRIMARY KEY (snapshot, n)
+    );
+"""
+
+# Apply precision/simplification to the (hydrated) item `h.f`
+GEOMETRY_FEATURE = """
+    CASE WHEN jsonb_typeof(h.f->'geometry') = 'object' THEN
+        h.f || jsonb_build_object(
+            'geometry',
+            ST_AsGeoJSON(
+                CASE WHEN $6::float > 0 THEN
+                    ST_SimplifyPreserveTopology(ST_GeomFromGeoJSON(h.f->'geometry'), $6::float)
+                ELSE ST_GeomFromGeoJSON(h.f->'geometry') END,
+                $5::int
+            )::jsonb
+        )
+    ELSE h.f END
+"""
+
+
+async def create_snapshot_tables(pool: asyncpg.BuildPgPool) -> None:
+    """Create the snapshot tables if they don't exist."""
+    async with pool.acquire() as conn:
+        exists = await conn.fetchval(
+            "SELECT to_regclass($1) IS NOT NULL AND to_regclass($2) IS NOT NULL;",
+            SNAPSHOT_TABLE,
+            SNAPSHOT_ITEMS_TABLE,
+        )
+        if not exists:
+            await conn.execute(SNAPSHOT_SQL)
+
+
+async def delete_expired_snapshots(pool: asyncpg.BuildPgPool) -> None:
+    """Delete the expired snapshots."""
+    async with pool.acquire() as conn:
+        await conn.execute(f"DELETE FROM {SNAPSHOT_TABLE} WHERE expires < now();")
+
+
+async def _expire_snapshots(pool: asyncpg.BuildPgPool) -> None:
+    while True:
+        await asyncio.sleep(snapshot_settings.cleanup_interval)
+        try:
+            await delete_expired_snapshots(pool)
+
+        except asyncpg.PostgresError as e:
+            logger.warning(f"Could not delete the expired snapshots: {e}")
+
+
+async def register_snapshots(app: FastAPI) -> None:
+    """Create the snapshot tables and start the expired snapshots cleanup.
+
+    Nothing is done unless `TIPG_STAC_SNAPSHOT_ENABLED=TRUE`. Startup fails if the
+    tables don't exist and the database user can't create them.
+
+    """
+    if not snapshot_settings.enabled:
+        return
+
+    await create_snapshot_tables(app.state.pool)
+    app.state.snapshots_cleanup = asyncio.create_task(_expire_snapshots(app.state.pool))
+
+
+async def close_snapshots(app: FastAPI) -> None:
+    """Stop the expired snapshots cleanup."""
+    if task := getattr(app.state, "snapshots_cleanup", None):
+        task.cancel()
+
+
+def is_snapshot_token(token: Optional[str]) -> bool:
+    """Check if a token is a snapshot token."""
+    return bool(token and token.startswith(SNAPSHOT_PREFIX))
+
+
+def check_snapshots_enabled() -> None:
+    """Make sure snapshot pagination is enabled."""
+    if not snapshot_settings.enabled:
+        raise HTTPException(
+            status_code=501,
+            detail="Snapshot pagination is not enabled (TIPG_STAC_SNAPSHOT_ENABLED).",
+        )
+
+
+def snapshot_token(snapshot: str, offset: int) -> str:
+    """Create snapshot token."""
+    return f"{SNAPSHOT_PREFIX}{snapshot}:{offset}"
+
+
+def parse_snapshot_token(token: str) -> Tuple[str, int]:
+    """Return snapshot id and offset from a snapshot token."""
+    try:
+        snapshot, offset = token[len(SNAPSHOT_PREFIX) :].rsplit(":", 1)
+        return str(uuid.UUID(snapshot)), max(int(offset), 0)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid snapshot token: {token}."
+        ) from e
+
+
+async def create_snapshot(conn: asyncpg.BuildPgConnection, search: ItemsSearch) -> str:
+    """Store the ordered list of the items matching a search.
+
+    At most `TIPG_STAC_SNAPSHOT_MAX_ITEMS` items are stored, but the number of
+    matching items is always recorded.
+
+    """
+    search = await preprocess_intersects(conn, search)
+    req = search.model_dump_json(
+        exclude_none=True,
+        by_alias=True,
+        exclude={"fields", "limit", "token"},
+    )
+    where, orderby = await conn.fetchrow(
+        """
+        SELECT
+            pgstac.stac_search_to_where($1::text::jsonb),
+            pgstac.sort_sqlorderby($1::text::jsonb);
+        """,
+        req,
+    )
+
+    snapshot = str(uuid.uuid4())
+
+    # NOTE: the WHERE clause can contain `:` so we can't use buildpg's render
+    await conn.execute(
+        f"""
+        WITH matches AS (
+            SELECT
+                collection,
+                id,
+                row_number() OVER (ORDER BY {orderby}) AS n,
+                count(*) OVER () AS matched
+            FROM items
+            WHERE {where}
+            ORDER BY {orderby}
+            LIMIT $3
+        ), created AS (
+            INSERT INTO {SNAPSHOT_TABLE} (snapshot, matched, expires)
+            SELECT
+                $1::uuid,
+                COALESCE(max(matched), 0),
+                now() + make_interval(secs => $2::int)
+            FROM matches
+            RETURNING snapshot
+        )
+        INSERT INTO {SNAPSHOT_ITEMS_TABLE} (snapshot, n, collection, id)
+        SELECT s.snapshot, m.n, m.collection, m.id
+        FROM matches m, created s;
+        """,
+        snapshot,
+        snapshot_settings.ttl,
+        snapshot_settings.max_items,
+    )
+
+    return snapshot
+
+
+async def snapshot_search(
+    pool: asyncpg.BuildPgPool,
+    *,
+    search: ItemsSearch,
+    precision: Optional[int] = None,
+    simplify: Optional[float] = None,
+) -> ItemList:
+    """Return a page of a search snapshot.
+
+    A new snapshot of the search is created, unless the search `token` is a snapshot
+    token. `matched` is the number of items matching the search, the pages stop
+    after the first `TIPG_STAC_SNAPSHOT_MAX_ITEMS` items.
+
+    """
+    check_snapshots_enabled()
+
+    limit = search.limit or features_settings.default_features_limit
+    fields: Dict[str, List[str]] = {
+        k: sorted(v) for k, v in (search.fields or {}).items()
+    }
+
+    feature, geometry_args = "h.f", []
+    if precision is not None or simplify:
+        feature = GEOMETRY_FEATURE
+        geometry_args = [9 if precision is None else precision, simplify or 0]
+
+    created = not is_snapshot_token(search.token)
+    async with acquire(pool) as conn:
+        if created:
+            async with conn.transaction():
+                snapshot = await create_snapshot(conn, search)
+            offset = 0
+        else:
+            snapshot, offset = parse_snapshot_token(search.token)  # type: ignore
+
+        matched, items = await conn.fetchrow(
+            f"""
+            SELECT
+                (
+                    SELECT matched FROM {SNAPSHOT_TABLE}
+                    WHERE snapshot = $1::uuid AND expires > now()
+                ),
+                (
+                    SELECT jsonb_agg({feature} ORDER BY s.n)
+                    FROM {SNAPSHOT_ITEMS_TABLE} s
+                    JOIN items i ON i.collection = s.collection AND i.id = s.id
+                    CROSS JOIN LATERAL (
+                        SELECT pgstac.content_hydrate(i, $4::text::jsonb) AS f
+                    ) h
+                    WHERE s.snapshot = $1::uuid AND s.n > $2 AND s.n <= $2 + $3
+                );
+            """,
+            snapshot,
+            offset,
+            limit,
+            json.dumps(fields),
+            *geometry_args,
+        )
+
+    if matched is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Snapshot {snapshot} not found or expired.",
+        )
+
+    stored = min(matched, snapshot_settings.max_items)
+    return ItemList(  # type: ignore
+        items=items or [],
+        matched=matched,
+        next=snapshot_token(snapshot, offset + limit)  # type: ignore
+        if offset + limit < stored
+        else None,
+        prev=snapshot_token(snapshot, max(offset - limit, 0))  # type: ignore
+        if offset
+        else None,
+    )
@@ -0,0 +1,151 @@
+"""tipgstac.timing: per-phase request timings.
+
+When `TIPG_STAC_SERVER_TIMING=TRUE`, `ServerTimingMiddleware` collects the duration
+of the request phases (measured with `timer`) and returns them in a `Server-Timing`
+header. They are also logged, with the total request duration, as a JSON access log
+by the `tipgstac.access` logger.
+
+Timed phases are also recorded as spans when tracing is enabled (see
+`tipgstac.tracing`). When disabled, `timer` only checks context variables.
+
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import orjson
+from buildpg import asyncpg
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tipgstac.tracing import span
+
+logger = logging.getLogger("tipgstac.access")
+
+# Phases durations (in ms) of the current request
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "tipgstac_timings", default=None
+)
+
+
+@contextmanager
+def timer(name: str, **attributes: Any) -> Iterator[None]:
+    """Add the duration of the block to the `name` phase of the current request.
+
+    The block is also recorded as a `name` span, with `attributes`, when the request
+    is traced.
+
+    """
+    with span(name, **attributes):
+        timings = _timings.get()
+        if timings is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            timings[name] = timings.get(name, 0.0) + duration
+
+
+def timed(name: str) -> Callable:
+    """Decorator adding the duration of a function call to the `name` phase."""
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with timer(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@asynccontextmanager
+async def acquire(
+    pool: asyncpg.BuildPgPool,
+) -> AsyncIterator[asyncpg.BuildPgConnection]:
+    """Acquire a pool connection, timed as the `db-acquire` phase."""
+    with timer("db-acquire"):
+        conn = await pool.acquire()
+
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+def timed_json_loads(data: Any) -> Any:
+    """Decode JSON, timed as the `json-decode` phase."""
+    with timer("json-decode"):
+        return orjson.loads(data)
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Format timings as a Server-Timing header value."""
+    return ", ".join(f"{name};dur={duration:.2f}" for name, duration in timings.items())
+
+
+class ServerTimingMiddleware:
+    """Middleware to add Server-Timing header and log the request timings."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Init Middleware."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = None
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings["app"] = (time.perf_counter() - start) * 1000
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("Server-Timing", server_timing(timings))
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            _timings.reset(token)
+            logger.info(
+                orjson.dumps(
+                    {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "query": scope["query_string"].decode(),
+                        "status": status,
+                        "duration": round((time.perf_counter() - start) * 1000, 2),
+                        "timings": {k: round(v, 2) for k, v in timings.items()},
+                    }
+                ).decode()
+            )
@@ -0,0 +1,277 @@
+"""tipgstac.tracing: request tracing.
+
+When `TIPG_STAC_TRACING_ENABLED=TRUE`, `TracingMiddleware` records a span for each
+request and, as children, for each phase measured with `tipgstac.timing.timer`
+(dependencies, pool acquisitions, PgSTAC calls, JSON decoding and serialization).
+
+The trace context is read from the W3C `traceparent` request header, so the spans
+are part of the caller's (e.g gateway) trace, and returned in a `traceresponse`
+header. The spans of each request are sent to a `SpanExporter`: `file` (JSON lines),
+`memory` or the import path (`module:attribute`) of a custom exporter class.
+
+When disabled, `span` only checks a context variable.
+
+"""
+
+import abc
+import importlib
+import logging
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tipgstac.settings import TracingSettings
+
+logger = logging.getLogger("tipgstac.tracing")
+
+TRACEPARENT = re.compile(
+    r"^(?P<version>[0-9a-f]{2})-(?P<trace_id>[0-9a-f]{32})-(?P<parent_id>[0-9a-f]{16})-(?P<flags>[0-9a-f]{2})"
+)
+
+
+@dataclass
+class Span:
+    """Span."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: int = field(default_factory=time.time_ns)
+    end_time: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+
+    def end(self) -> None:
+        """End span."""
+        self.end_time = time.time_ns()
+
+    def to_dict(self) -> Dict:
+        """Return span as dict."""
+        return asdict(self)
+
+
+# Spans of the current request and current span
+_spans: ContextVar[Optional[List[Span]]] = ContextVar("tipgstac_spans", default=None)
+_current: ContextVar[Optional[Span]] = ContextVar("tipgstac_span", default=None)
+
+
+class SpanExporter(metaclass=abc.ABCMeta):
+    """Span exporter."""
+
+    @abc.abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """Export the spans of a request."""
+        ...
+
+
+class InMemoryExporter(SpanExporter):
+    """Keep spans in memory (for testing)."""
+
+    def __init__(self) -> None:
+        """Init exporter."""
+        self.spans: List[Span] = []
+
+    def export(self, spans: List[Span]) -> None:
+        """Export the spans of a request."""
+        self.spans.extend(spans)
+
+    def clear(self) -> None:
+        """Remove the exported spans."""
+        self.spans.clear()
+
+
+class FileExporter(SpanExporter):
+    """Append spans to a JSON lines file.
+
+    `export` only queues the serialized spans, they are written by a background
+    thread so the event loop never waits on the file.
+
+    """
+
+    def __init__(self, path: str, service_name: str = "tipgstac") -> None:
+        """Init exporter."""
+        self.path = path
+        self.service_name = service_name
+        self._queue: "queue.Queue[bytes]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._write, name="tipgstac-tracing", daemon=True
+        )
+        self._thread.start()
+
+    def _write(self) -> None:
+        while True:
+            data = [self._queue.get()]
+            while True:
+                try:
+                    data.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                with open(self.path, "ab") as f:
+                    f.write(b"".join(data))
+
+            except OSError as e:
+                logger.warning(f"Could not write spans to {self.path}: {e}")
+
+            finally:
+                for _ in data:
+                    self._queue.task_done()
+
+    def export(self, spans: List[Span]) -> None:
+        """Export the spans of a request."""
+        self._queue.put(
+            b"".join(
+                orjson.dumps({"service": self.service_name, **s.to_dict()}) + b"\n"
+                for s in spans
+            )
+        )
+
+    def flush(self) -> None:
+        """Wait for the exported spans to be written."""
+        self._queue.join()
+
+
+def load_exporter(settings: TracingSettings) -> SpanExporter:
+    """Create the exporter defined in the tracing settings."""
+    if settings.exporter == "file":
+        return FileExporter(settings.file, service_name=settings.service_name)
+
+    if settings.exporter == "memory":
+        return InMemoryExporter()
+
+    module, _, attribute = settings.exporter.partition(":")
+    return getattr(importlib.import_module(module), attribute)()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return trace id, parent span id and sampled flag from a traceparent header."""
+    if not value or not (match := TRACEPARENT.match(value.strip().lower())):
+        return None
+
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or not int(trace_id, 16) or not int(parent_id, 16):
+        return None
+
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def traceparent(span: Span) -> str:
+    """Format a span as a traceparent header value."""
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record the block as a child span of the current span."""
+    spans = _spans.get()
+    if spans is None:
+        yield None
+        return
+
+    parent = _current.get()
+    s = Span(
+        name=name,
+        trace_id=parent.trace_id,  # type: ignore
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id,  # type: ignore
+        attributes=attributes,
+    )
+    token = _current.set(s)
+    try:
+        yield s
+
+    except BaseException as e:
+        s.status = "error"
+        s.attributes["exception"] = repr(e)
+        raise
+
+    finally:
+        _current.reset(token)
+        s.end()
+        spans.append(s)
+
+
+class TracingMiddleware:
+    """Middleware to trace requests."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        exporter: SpanExporter,
+        sample_rate: float = 1.0,
+    ) -> None:
+        """Init Middleware."""
+        self.app = app
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if context := parse_traceparent(Headers(scope=scope).get("traceparent")):
+            trace_id, parent_id, sampled = context
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_rate
+
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(
+            name=scope["method"],
+            trace_id=trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent_id,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        spans: List[Span] = []
+        spans_token = _spans.set(spans)
+        current_token = _current.set(root)
+
+        async def send_wrapper(message: Message):
+            """Send Message."""
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append("traceresponse", traceparent(root))
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        except BaseException as e:
+            root.status = "error"
+            root.attributes["exception"] = repr(e)
+            raise
+
+        finally:
+            _current.reset(current_token)
+            _spans.reset(spans_token)
+
+            if route := getattr(scope.get("route"), "path", None):
+                root.name = f"{scope['method']} {route}"
+                root.attributes["http.route"] = route
+
+            if root.attributes.get("http.status_code", 500) >= 500:
+                root.status = "error"
+
+            root.end()
+            self.exporter.export([root, *spans])